@@ -6,10 +6,12 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt, QDate, pyqtSignal
 from PyQt6.QtGui import QPixmap 
 import os 
-import shutil 
 import uuid 
 
 import coin_data_manager
+import compresion
+import hash_perceptual
+import instrumentacion
 
 class AddCoinTab(QWidget):
     coin_added = pyqtSignal()
@@ -200,11 +202,11 @@ class AddCoinTab(QWidget):
 
         if file_path:
             # Generar un nombre de archivo único para evitar colisiones
-            unique_filename = f"{uuid.uuid4().hex}_{os.path.basename(file_path)}"
-            destination_path = os.path.join(initial_dir, unique_filename)
+            # (la extensión la decide la recodificación opcional de la imagen)
+            unique_stem = f"{uuid.uuid4().hex}_{os.path.splitext(os.path.basename(file_path))[0]}"
 
             try:
-                shutil.copyfile(file_path, destination_path)
+                destination_path = compresion.recodificar_imagen(file_path, os.path.join(initial_dir, unique_stem))
             except Exception as e:
                 QMessageBox.critical(self, "Error de Copia", f"No se pudo copiar el archivo: {e}")
                 return
@@ -213,7 +215,8 @@ class AddCoinTab(QWidget):
             relative_path = os.path.relpath(destination_path, os.path.dirname(os.path.abspath(__file__)))
 
             # Mostrar la imagen en el QLabel
-            pixmap = QPixmap(destination_path)
+            with instrumentacion.medir("cargar_imagen", "imagenes"):
+                pixmap = QPixmap(destination_path)
             if not pixmap.isNull():
                 image_label_widget.setPixmap(pixmap.scaled(image_label_widget.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)) 
                 image_label_widget.setText("") # Borrar texto si la imagen se carga
@@ -221,12 +224,30 @@ class AddCoinTab(QWidget):
                 
                 # Actualizar la ruta en el atributo de la instancia
                 setattr(self, path_attr_name, relative_path)
+                self._warn_possible_duplicates(destination_path)
             else:
                 QMessageBox.warning(self, "Error de Carga", "No se pudo cargar la imagen seleccionada. Formato inválido o archivo corrupto.")
                 image_label_widget.setText("Error")
                 image_label_widget.setStyleSheet("border: 2px dashed #E74C3C; background-color: #FAE0E0; border-radius: 8px; color: #E74C3C;")
                 setattr(self, path_attr_name, '') # Limpiar la ruta si falla
 
+    def _warn_possible_duplicates(self, image_path):
+        """Avisa si la imagen recién importada parece la misma foto que otra ya guardada."""
+        try:
+            similar = hash_perceptual.registrar_imagen(image_path)
+        except (ImportError, OSError, ValueError):
+            return # Sin hash no se puede comprobar; la imagen se usa igualmente
+        if not similar:
+            return
+        coins_by_image = coin_data_manager.obtener_monedas_por_imagen([key for _, key in similar])
+        lines = []
+        for dist, key in similar[:5]:
+            coins = ", ".join(sorted({code for code, _ in coins_by_image.get(key, [])})) or "ninguna moneda"
+            lines.append(f"• {key} (diferencia {dist}) — {coins}")
+        QMessageBox.warning(self, "Posible Duplicado",
+                            "La imagen seleccionada se parece a otras ya guardadas:\n\n" + "\n".join(lines)
+                            + "\n\nCompruebe que no está registrando una moneda repetida.")
+
     def save_coin(self):
         coin_data = {}
         for field_name, widget in self.fields.items():
@@ -0,0 +1,184 @@
+import datetime
+import gzip
+import json
+import os
+
+from bloqueo_archivo import BloqueoArchivo
+
+# =========================================================================
+# Almacén de versiones de la colección
+# =========================================================================
+# Cada versión se guarda como un delta comprimido (gzip) respecto a una versión
+# base completa, con diferencias por moneda indexadas por codigo_unico:
+#   {"anadidas": [moneda, ...],
+#    "modificadas": {codigo: {campo: valor_nuevo}},
+#    "eliminadas": [codigo, ...]}
+# Recuperar cualquier versión cuesta leer su base y un único delta. Cuando el
+# delta crece demasiado respecto a la base, o hay muchas versiones sobre la misma
+# base, la nueva versión se guarda como base completa (rebase), de modo que el
+# tiempo de restauración se mantiene acotado.
+#
+# Estructura del directorio:
+#   indice.json                   lista de versiones
+#   base_000001.json.gz           colección completa
+#   delta_000002.json.gz          delta de la versión 2 respecto a su base
+# =========================================================================
+
+ARCHIVO_INDICE = 'indice.json'
+# Número máximo de versiones delta sobre una misma base
+MAX_DELTAS_POR_BASE = 30
+# Si el delta comprimido supera esta fracción del tamaño de la base, se crea una base nueva
+MAX_PROPORCION_DELTA = 0.5
+NIVEL_COMPRESION = 6
+
+
+def calcular_delta(base, coleccion, campo_codigo='codigo_unico'):
+    """Diferencias por moneda entre la colección base y la actual."""
+    base_por_codigo = {moneda.get(campo_codigo): moneda for moneda in base}
+    anadidas = []
+    modificadas = {}
+    codigos_actuales = set()
+    for moneda in coleccion:
+        codigo = moneda.get(campo_codigo)
+        codigos_actuales.add(codigo)
+        anterior = base_por_codigo.get(codigo)
+        if anterior is None:
+            anadidas.append(moneda)
+            continue
+        cambios = {campo: valor for campo, valor in moneda.items() if anterior.get(campo) != valor}
+        # Los campos que ya no existen se guardan como None
+        cambios.update({campo: None for campo in anterior if campo not in moneda})
+        if cambios:
+            modificadas[codigo] = cambios
+    eliminadas = [codigo for codigo in base_por_codigo if codigo not in codigos_actuales]
+    return {"anadidas": anadidas, "modificadas": modificadas, "eliminadas": eliminadas}
+
+
+def aplicar_delta(base, delta, campo_codigo='codigo_unico'):
+    """Reconstruye una versión a partir de su base y su delta. No modifica 'base'."""
+    eliminadas = set(delta["eliminadas"])
+    modificadas = delta["modificadas"]
+    coleccion = []
+    for moneda in base:
+        codigo = moneda.get(campo_codigo)
+        if codigo in eliminadas:
+            continue
+        moneda = dict(moneda)
+        moneda.update(modificadas.get(codigo, {}))
+        coleccion.append(moneda)
+    coleccion.extend(dict(moneda) for moneda in delta["anadidas"])
+    return coleccion
+
+
+class AlmacenVersiones:
+    """Versiones de la colección guardadas en un directorio como bases y deltas comprimidos."""
+    def __init__(self, directorio, campo_codigo='codigo_unico'):
+        self.directorio = directorio
+        self.campo_codigo = campo_codigo
+        self._base_cacheada = None # (archivo, colección)
+
+    def _ruta(self, nombre):
+        return os.path.join(self.directorio, nombre)
+
+    def _bloqueo(self):
+        return BloqueoArchivo(self._ruta('.lock'))
+
+    def _leer_indice(self):
+        try:
+            with open(self._ruta(ARCHIVO_INDICE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def _escribir_atomico(self, nombre, datos, comprimir):
+        ruta = self._ruta(nombre)
+        ruta_temporal = f"{ruta}.tmp"
+        contenido = json.dumps(datos, ensure_ascii=False).encode('utf-8')
+        if comprimir:
+            contenido = gzip.compress(contenido, NIVEL_COMPRESION)
+        with open(ruta_temporal, 'wb') as f:
+            f.write(contenido)
+        os.replace(ruta_temporal, ruta)
+        return len(contenido)
+
+    def _leer_comprimido(self, nombre):
+        with gzip.open(self._ruta(nombre), 'rt', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _leer_base(self, archivo):
+        if self._base_cacheada is None or self._base_cacheada[0] != archivo:
+            self._base_cacheada = (archivo, self._leer_comprimido(archivo))
+        return self._base_cacheada[1]
+
+    def listar_versiones(self):
+        """Retorna la lista de versiones: dicts con version, fecha, tipo, base, monedas, bytes y descripcion."""
+        return self._leer_indice()
+
+    def ultima_version(self):
+        indice = self._leer_indice()
+        return indice[-1] if indice else None
+
+    def guardar_version(self, coleccion, descripcion="", firma=None):
+        """
+        Guarda la colección como nueva versión. Si no ha cambiado desde la última,
+        no se crea ninguna. Retorna la entrada del índice de la versión resultante.
+        'firma' identifica el archivo del que se leyó la colección (por ejemplo, tamaño y fecha)
+        y se anota en la entrada, también en la última si la colección no ha cambiado.
+        """
+        os.makedirs(self.directorio, exist_ok=True)
+        with self._bloqueo():
+            indice = self._leer_indice()
+            ultima = indice[-1] if indice else None
+            numero = ultima["version"] + 1 if ultima else 1
+            entrada = {
+                "version": numero,
+                "fecha": datetime.datetime.now().isoformat(timespec='seconds'),
+                "monedas": len(coleccion),
+                "descripcion": descripcion,
+            }
+            if firma is not None:
+                entrada["firma"] = firma
+            delta = None
+            if ultima is not None:
+                entrada_base = next(e for e in indice if e["version"] == ultima["base"])
+                delta = calcular_delta(self._leer_base(entrada_base["archivo"]), coleccion, self.campo_codigo)
+                if ((ultima["tipo"] == "delta" and delta == self._leer_comprimido(ultima["archivo"]))
+                        or (ultima["tipo"] == "base" and not any(delta.values()))):
+                    if firma is not None and ultima.get("firma") != firma:
+                        ultima["firma"] = firma
+                        self._escribir_atomico(ARCHIVO_INDICE, indice, comprimir=False)
+                    return ultima
+                deltas_en_base = sum(1 for e in indice if e["base"] == entrada_base["version"]) - 1
+                if deltas_en_base >= MAX_DELTAS_POR_BASE:
+                    delta = None
+            if delta is not None:
+                archivo = f"delta_{numero:06d}.json.gz"
+                tamano = self._escribir_atomico(archivo, delta, comprimir=True)
+                if tamano > MAX_PROPORCION_DELTA * entrada_base["bytes"]:
+                    # Rebase: el delta ya no compensa frente a una base nueva
+                    os.remove(self._ruta(archivo))
+                    delta = None
+                else:
+                    entrada.update(tipo="delta", base=entrada_base["version"], archivo=archivo, bytes=tamano)
+            if delta is None:
+                archivo = f"base_{numero:06d}.json.gz"
+                # Copia: la caché de la base no debe cambiar cuando se editen las monedas en memoria
+                datos = [dict(moneda) for moneda in coleccion]
+                tamano = self._escribir_atomico(archivo, datos, comprimir=True)
+                entrada.update(tipo="base", base=numero, archivo=archivo, bytes=tamano)
+                self._base_cacheada = (archivo, datos)
+            indice.append(entrada)
+            self._escribir_atomico(ARCHIVO_INDICE, indice, comprimir=False)
+            return entrada
+
+    def obtener_version(self, numero):
+        """Reconstruye la colección de una versión (base + un delta como máximo)."""
+        indice = self._leer_indice()
+        entrada = next((e for e in indice if e["version"] == numero), None)
+        if entrada is None:
+            raise KeyError(f"No existe la versión {numero}.")
+        entrada_base = next(e for e in indice if e["version"] == entrada["base"])
+        base = self._leer_base(entrada_base["archivo"])
+        if entrada["tipo"] == "base":
+            return [dict(moneda) for moneda in base]
+        return aplicar_delta(base, self._leer_comprimido(entrada["archivo"]), self.campo_codigo)
@@ -0,0 +1,324 @@
+"""
+Servidor HTTP/JSON local para consultar y modificar la colección desde otras herramientas.
+
+Solo usa la biblioteca estándar y coin_data_manager (sin PyQt6). Por defecto escucha
+únicamente en 127.0.0.1.
+
+    python api_server.py --puerto 8765
+
+Rutas:
+    GET    /version                      -> {"version": n}
+    GET    /monedas?campo=valor&limite=&desplazamiento=
+                                         -> página de resultados de buscar_monedas
+    GET    /monedas?campo=valor&limite=&despues_de=
+                                         -> página por clave (orden de código único);
+                                            'siguiente' es el 'despues_de' de la próxima
+    GET    /monedas/<codigo_unico>       -> una moneda
+    GET    /estadisticas                 -> KPIs y distribuciones
+    POST   /monedas                      -> añade una moneda (cuerpo: objeto JSON)
+    PATCH  /monedas/<codigo_unico>       -> actualiza campos (cuerpo: objeto JSON)
+    DELETE /monedas/<codigo_unico>       -> elimina una moneda
+
+Todas las respuestas llevan la versión de los datos en la cabecera ETag. Un cliente
+puede enviar 'If-None-Match' en las lecturas para recibir 304 si nada ha cambiado,
+e 'If-Match' en las modificaciones para que fallen con 412 si los datos cambiaron
+desde su última lectura.
+"""
+import argparse
+import contextlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import coin_data_manager
+
+PUERTO_POR_DEFECTO = 8765
+# Tamaño de página por defecto y máximo para /monedas
+LIMITE_POR_DEFECTO = 100
+LIMITE_MAXIMO = 1000
+# Segundos entre comprobaciones de cambios hechos en disco por otras instancias
+INTERVALO_RESINCRONIZACION = 2.0
+
+
+class BloqueoLecturaEscritura:
+    """
+    Bloqueo lectores/escritor entre hilos: varias lecturas a la vez, escrituras en
+    exclusiva. Los escritores tienen preferencia para que un flujo continuo de
+    lecturas no los deje esperando indefinidamente.
+    """
+    def __init__(self):
+        self._condicion = threading.Condition(threading.Lock())
+        self._lectores = 0
+        self._escribiendo = False
+        self._escritores_esperando = 0
+
+    @contextlib.contextmanager
+    def lectura(self):
+        with self._condicion:
+            while self._escribiendo or self._escritores_esperando:
+                self._condicion.wait()
+            self._lectores += 1
+        try:
+            yield
+        finally:
+            with self._condicion:
+                self._lectores -= 1
+                if self._lectores == 0:
+                    self._condicion.notify_all()
+
+    @contextlib.contextmanager
+    def escritura(self):
+        with self._condicion:
+            self._escritores_esperando += 1
+            while self._escribiendo or self._lectores:
+                self._condicion.wait()
+            self._escritores_esperando -= 1
+            self._escribiendo = True
+        try:
+            yield
+        finally:
+            with self._condicion:
+                self._escribiendo = False
+                self._condicion.notify_all()
+
+
+class ErrorAPI(Exception):
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+def _etag(version):
+    return f'"{version}"'
+
+
+def _codificar(datos):
+    """
+    Serializa la respuesta. Se llama dentro del bloqueo porque los diccionarios son los
+    mismos objetos de la colección y un escritor podría modificarlos en cuanto se libere;
+    el envío por la red se hace ya fuera del bloqueo.
+    """
+    return json.dumps(datos, ensure_ascii=False).encode('utf-8')
+
+
+class ManejadorAPI(BaseHTTPRequestHandler):
+    server_version = "TheCoinVaultAPI/1.0"
+    protocol_version = "HTTP/1.1"
+
+    # ---------------------------------------------------------------------
+    # Utilidades de petición y respuesta
+    # ---------------------------------------------------------------------
+    def _enviar_json(self, estado, datos, version=None):
+        """Envía 'datos' como JSON. Si ya es bytes, se envía tal cual (ver _codificar)."""
+        cuerpo = datos if isinstance(datos, bytes) else _codificar(datos)
+        self.send_response(estado)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        if version is not None:
+            self.send_header("ETag", _etag(version))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def _enviar_no_modificado(self, version):
+        self.send_response(304)
+        self.send_header("ETag", _etag(version))
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _leer_cuerpo_json(self):
+        longitud = int(self.headers.get("Content-Length") or 0)
+        try:
+            datos = json.loads(self.rfile.read(longitud) or b"{}")
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            raise ErrorAPI(400, f"JSON inválido: {e}")
+        if not isinstance(datos, dict):
+            raise ErrorAPI(400, "Se esperaba un objeto JSON.")
+        return datos
+
+    def _ruta(self):
+        partes = urlsplit(self.path)
+        segmentos = [unquote(s) for s in partes.path.strip('/').split('/') if s]
+        return segmentos, parse_qs(partes.query)
+
+    def _atender(self, metodo):
+        try:
+            segmentos, consulta = self._ruta()
+            metodo(segmentos, consulta)
+        except ErrorAPI as e:
+            # El cuerpo de la petición puede no haberse leído: no reutilizar la conexión
+            self.close_connection = True
+            self._enviar_json(e.estado, {"error": str(e)})
+        except coin_data_manager.ConflictoDeEdicion as e:
+            self._enviar_json(409, {"error": str(e)}, coin_data_manager.obtener_version_datos())
+        except TimeoutError as e:
+            self._enviar_json(503, {"error": str(e)})
+        except Exception as e:
+            self._enviar_json(500, {"error": f"Error interno: {e}"})
+
+    def log_message(self, formato, *args):
+        if self.server.registrar_peticiones:
+            super().log_message(formato, *args)
+
+    # ---------------------------------------------------------------------
+    # Lecturas
+    # ---------------------------------------------------------------------
+    def do_GET(self):
+        self._atender(self._get)
+
+    def _get(self, segmentos, consulta):
+        # Varias lecturas pueden construir a la vez los índices y cachés perezosos de
+        # coin_data_manager o decodificar monedas de la instantánea: eso lo serializa
+        # coin_data_manager, así que aquí basta con el bloqueo de lectura.
+        bloqueo = self.server.bloqueo
+        with bloqueo.lectura():
+            version = coin_data_manager.obtener_version_datos()
+            if self.headers.get("If-None-Match") == _etag(version):
+                self._enviar_no_modificado(version)
+                return
+            if segmentos == ["version"]:
+                datos = {"version": version}
+            elif segmentos == ["estadisticas"]:
+                datos = coin_data_manager.obtener_resumen_estadisticas()
+            elif segmentos == ["monedas"]:
+                datos = self._pagina_monedas(consulta)
+            elif len(segmentos) == 2 and segmentos[0] == "monedas":
+                datos = coin_data_manager.obtener_moneda_por_id(segmentos[1])
+                if datos is None:
+                    raise ErrorAPI(404, f"No existe la moneda '{segmentos[1]}'.")
+            else:
+                raise ErrorAPI(404, "Ruta no encontrada.")
+            cuerpo = _codificar(datos)
+        self._enviar_json(200, cuerpo, version)
+
+    def _pagina_monedas(self, consulta):
+        try:
+            limite = min(int(consulta.pop("limite", [LIMITE_POR_DEFECTO])[0]), LIMITE_MAXIMO)
+            desplazamiento = max(int(consulta.pop("desplazamiento", [0])[0]), 0)
+        except ValueError:
+            raise ErrorAPI(400, "'limite' y 'desplazamiento' deben ser enteros.")
+        despues_de = consulta.pop("despues_de", [None])[0]
+        criterios = {}
+        for campo, valores in consulta.items():
+            if campo not in coin_data_manager.TODOS_LOS_CAMPOS_LLAVES:
+                raise ErrorAPI(400, f"Campo desconocido '{campo}'.")
+            criterios[campo] = valores[0]
+        if despues_de is not None:
+            # Paginación por clave: no hace falta recorrer ni contar los resultados anteriores
+            monedas, siguiente = coin_data_manager.buscar_monedas_pagina(criterios, max(limite, 0), despues_de or None)
+            return {"limite": limite, "despues_de": despues_de, "siguiente": siguiente, "monedas": monedas}
+        resultados = coin_data_manager.buscar_monedas(criterios)
+        return {
+            "total": len(resultados),
+            "limite": limite,
+            "desplazamiento": desplazamiento,
+            "monedas": resultados[desplazamiento:desplazamiento + max(limite, 0)],
+        }
+
+    # ---------------------------------------------------------------------
+    # Modificaciones
+    # ---------------------------------------------------------------------
+    def do_POST(self):
+        self._atender(self._post)
+
+    def do_PATCH(self):
+        self._atender(self._patch)
+
+    def do_DELETE(self):
+        self._atender(self._delete)
+
+    @contextlib.contextmanager
+    def _modificacion(self):
+        """Bloqueo de escritura con la comprobación opcional de 'If-Match'."""
+        with self.server.bloqueo.escritura():
+            esperada = self.headers.get("If-Match")
+            if esperada and esperada != "*" and esperada != _etag(coin_data_manager.obtener_version_datos()):
+                raise ErrorAPI(412, "Los datos han cambiado desde la versión indicada en If-Match.")
+            yield
+
+    def _post(self, segmentos, consulta):
+        if segmentos != ["monedas"]:
+            raise ErrorAPI(404, "Ruta no encontrada.")
+        moneda = self._leer_cuerpo_json()
+        with self._modificacion():
+            coin_data_manager.anadir_moneda(moneda)
+            codigo = moneda[coin_data_manager.CAMPO_CODIGO_UNICO]
+            datos = _codificar(coin_data_manager.obtener_moneda_por_id(codigo))
+            version = coin_data_manager.obtener_version_datos()
+        self._enviar_json(201, datos, version)
+
+    def _patch(self, segmentos, consulta):
+        if len(segmentos) != 2 or segmentos[0] != "monedas":
+            raise ErrorAPI(404, "Ruta no encontrada.")
+        nuevos_datos = self._leer_cuerpo_json()
+        nuevos_datos.pop(coin_data_manager.CAMPO_CODIGO_UNICO, None)
+        with self._modificacion():
+            if not coin_data_manager.actualizar_moneda(segmentos[1], nuevos_datos):
+                raise ErrorAPI(404, f"No existe la moneda '{segmentos[1]}'.")
+            datos = _codificar(coin_data_manager.obtener_moneda_por_id(segmentos[1]))
+            version = coin_data_manager.obtener_version_datos()
+        self._enviar_json(200, datos, version)
+
+    def _delete(self, segmentos, consulta):
+        if len(segmentos) != 2 or segmentos[0] != "monedas":
+            raise ErrorAPI(404, "Ruta no encontrada.")
+        with self._modificacion():
+            if not coin_data_manager.eliminar_moneda(segmentos[1]):
+                raise ErrorAPI(404, f"No existe la moneda '{segmentos[1]}'.")
+            version = coin_data_manager.obtener_version_datos()
+        self._enviar_json(200, {"eliminada": segmentos[1]}, version)
+
+
+class ServidorAPI(ThreadingHTTPServer):
+    """Servidor multihilo que comparte un bloqueo lectores/escritor sobre la colección."""
+    daemon_threads = True
+
+    def __init__(self, direccion, registrar_peticiones=False):
+        super().__init__(direccion, ManejadorAPI)
+        self.bloqueo = BloqueoLecturaEscritura()
+        self.registrar_peticiones = registrar_peticiones
+        self._detener = threading.Event()
+        self._hilo_resincronizacion = threading.Thread(target=self._resincronizar_periodicamente, daemon=True)
+
+    def _resincronizar_periodicamente(self):
+        """Incorpora los cambios que la aplicación u otras instancias guarden en disco."""
+        while not self._detener.wait(INTERVALO_RESINCRONIZACION):
+            try:
+                with self.bloqueo.escritura():
+                    coin_data_manager.resincronizar()
+            except (OSError, ValueError, TimeoutError, coin_data_manager.ConflictoDeEdicion) as e:
+                print(f"Advertencia: no se pudo resincronizar la colección: {e}")
+
+    def serve_forever(self, poll_interval=0.5):
+        self._hilo_resincronizacion.start()
+        try:
+            super().serve_forever(poll_interval)
+        finally:
+            self._detener.set()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor HTTP/JSON local de The Coin Vault.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=PUERTO_POR_DEFECTO)
+    parser.add_argument('--archivo', help=f"Archivo de la colección (por defecto {coin_data_manager.ARCHIVO_COLECCION}).")
+    parser.add_argument('--registrar', action='store_true', help="Mostrar cada petición en la consola.")
+    args = parser.parse_args(argv)
+    if args.archivo:
+        coin_data_manager.ARCHIVO_COLECCION = args.archivo
+        coin_data_manager.ARCHIVO_SNAPSHOT = f"{args.archivo}.snapshot"
+    coin_data_manager.cargar_coleccion()
+
+    servidor = ServidorAPI((args.host, args.puerto), registrar_peticiones=args.registrar)
+    print(f"Servidor de The Coin Vault escuchando en http://{args.host}:{args.puerto}/")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
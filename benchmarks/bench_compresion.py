@@ -0,0 +1,127 @@
+"""
+Benchmark de la compresión del archivo de la colección y de la recodificación de imágenes.
+
+Para cada tamaño de colección guarda el JSON en cada formato (sangrado, compacto,
+gzip y zstd si está disponible) y mide el tamaño en disco, el tiempo de escritura
+y el tiempo de carga (mediana). La carga se mide leyendo el JSON directamente, sin
+la instantánea binaria, que es el caso del primer arranque o de una instantánea caducada.
+
+Con --imagenes se recodifican las imágenes de un directorio (PNG optimizado y WebP
+sin pérdidas) y se compara el tamaño total. Necesita Pillow.
+
+Uso:
+    python benchmarks/bench_compresion.py --tamanos 1000 10000 100000
+    python benchmarks/bench_compresion.py --tamanos 100000 --imagenes assets/imagenes_monedas
+"""
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+DIRECTORIO_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if DIRECTORIO_RAIZ not in sys.path:
+    sys.path.insert(0, DIRECTORIO_RAIZ)
+
+import coin_data_manager
+import compresion
+from generador_sintetico import generar_coleccion
+
+# (nombre, formato de compresión, sangrado)
+FORMATOS = [
+    ("json sangrado", "", True),
+    ("json compacto", "", False),
+    ("gzip", "gzip", False),
+    ("zstd", "zstd", False),
+]
+
+
+def _escribir(ruta, coleccion, formato, sangrado):
+    with compresion.abrir_escritura(ruta, formato) as f:
+        if sangrado:
+            json.dump(coleccion, f, indent=4, ensure_ascii=False)
+        else:
+            json.dump(coleccion, f, separators=(',', ':'), ensure_ascii=False)
+
+
+def medir_formatos(n, repeticiones, directorio):
+    coleccion = generar_coleccion(n)
+    resultados = []
+    for nombre, formato, sangrado in FORMATOS:
+        if formato == 'zstd' and not compresion.ZSTD_DISPONIBLE:
+            print(f"  {nombre:<14} omitido (pip install zstandard)")
+            continue
+        ruta = os.path.join(directorio, f"coleccion_{n}_{nombre.replace(' ', '_')}")
+        inicio = time.perf_counter()
+        _escribir(ruta, coleccion, formato, sangrado)
+        escritura_ms = (time.perf_counter() - inicio) * 1000
+
+        coin_data_manager.ARCHIVO_COLECCION = ruta
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            cargadas = coin_data_manager._leer_json_coleccion()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+            assert len(cargadas) == n
+            del cargadas
+        resultado = {
+            "tamano": n, "formato": nombre, "bytes": os.path.getsize(ruta),
+            "escritura_ms": round(escritura_ms, 1), "carga_ms": round(statistics.median(tiempos), 1),
+        }
+        resultados.append(resultado)
+        print(f"  {nombre:<14} {resultado['bytes'] / 1024 / 1024:>9.2f} MB"
+              f"  escritura {resultado['escritura_ms']:>9.1f} ms  carga {resultado['carga_ms']:>9.1f} ms")
+        os.remove(ruta)
+    return resultados
+
+
+def medir_imagenes(directorio_imagenes, directorio):
+    if importlib.util.find_spec("PIL") is None:
+        print("Pillow no está instalado: se omite la recodificación de imágenes.")
+        return []
+    rutas = [os.path.join(directorio_imagenes, nombre) for nombre in sorted(os.listdir(directorio_imagenes))
+             if os.path.splitext(nombre)[1].lower() in ('.png', '.gif', '.bmp', '.jpg', '.jpeg')]
+    original = sum(os.path.getsize(ruta) for ruta in rutas)
+    resultados = [{"modo": "original", "imagenes": len(rutas), "bytes": original}]
+    print(f"  {'original':<8} {len(rutas):>6} imágenes {original / 1024 / 1024:>9.2f} MB")
+    for modo in ('png', 'webp'):
+        total = 0
+        inicio = time.perf_counter()
+        for i, ruta in enumerate(rutas):
+            destino = compresion.recodificar_imagen(ruta, os.path.join(directorio, f"{modo}_{i:06d}"), modo)
+            total += os.path.getsize(destino)
+            os.remove(destino)
+        segundos = time.perf_counter() - inicio
+        resultados.append({"modo": modo, "imagenes": len(rutas), "bytes": total, "segundos": round(segundos, 2)})
+        print(f"  {modo:<8} {len(rutas):>6} imágenes {total / 1024 / 1024:>9.2f} MB"
+              f"  ({100 * (1 - total / original) if original else 0:.1f}% menos, {segundos:.2f} s)")
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tamanos', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--imagenes', help="Directorio con imágenes para medir la recodificación")
+    parser.add_argument('--json', help="Guardar los resultados en este archivo")
+    args = parser.parse_args()
+
+    resultados = {"colecciones": [], "imagenes": []}
+    with tempfile.TemporaryDirectory() as directorio:
+        for n in args.tamanos:
+            print(f"Colección de {n} monedas:")
+            resultados["colecciones"].extend(medir_formatos(n, args.repeticiones, directorio))
+        if args.imagenes:
+            print(f"Imágenes de {args.imagenes}:")
+            resultados["imagenes"] = medir_imagenes(args.imagenes, directorio)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=4, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+Benchmark del tiempo de importación de los módulos de la aplicación.
+
+Ejecuta 'python -X importtime -c "import <modulo>"' en un proceso nuevo varias veces,
+toma la mediana del tiempo acumulado por módulo y lo compara con una referencia
+guardada para detectar regresiones en el arranque.
+
+Uso:
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --actualizar-referencia
+    python benchmarks/bench_import_time.py --modulos main statistics_tab --repeticiones 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+DIRECTORIO_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARCHIVO_REFERENCIA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'import_time_referencia.json')
+
+MODULOS_POR_DEFECTO = ['coin_data_manager', 'main', 'add_coin_tab', 'search_coin_tab', 'statistics_tab']
+
+# Paquetes pesados que no deben cargarse al importar la ventana principal
+PAQUETES_DIFERIDOS = ['matplotlib', 'numpy', 'PIL']
+
+
+def medir_importacion(modulo):
+    """
+    Importa un módulo en un proceso nuevo con -X importtime.
+    Retorna (tiempo total en µs, {paquete: tiempo acumulado en µs}) o lanza RuntimeError.
+    """
+    proceso = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {modulo}'],
+        cwd=DIRECTORIO_RAIZ, capture_output=True, text=True,
+        env={**os.environ, 'QT_QPA_PLATFORM': 'offscreen'},
+    )
+    if proceso.returncode != 0:
+        ultima_linea = proceso.stderr.strip().splitlines()[-1] if proceso.stderr.strip() else ''
+        raise RuntimeError(f"No se pudo importar '{modulo}': {ultima_linea}")
+
+    acumulados = {}
+    total = 0
+    for linea in proceso.stderr.splitlines():
+        # Formato: "import time:  self [us] | cumulative | imported package"
+        if not linea.startswith('import time:') or 'imported package' in linea:
+            continue
+        _, propio, acumulado, nombre = [p.strip() for p in linea.replace('import time:', '|', 1).split('|')]
+        paquete = nombre.strip()
+        # Las importaciones de primer nivel no tienen sangría adicional en la columna del nombre
+        es_primer_nivel = not linea.split('|')[2].startswith('   ')
+        acumulados[paquete] = int(acumulado)
+        if es_primer_nivel:
+            total += int(acumulado)
+    return total, acumulados
+
+
+def ejecutar(modulos, repeticiones):
+    """Mide cada módulo varias veces y retorna un diccionario con las medianas."""
+    resultados = {}
+    for modulo in modulos:
+        totales = []
+        ultimo_detalle = {}
+        try:
+            for _ in range(repeticiones):
+                total, detalle = medir_importacion(modulo)
+                totales.append(total)
+                ultimo_detalle = detalle
+        except RuntimeError as e:
+            print(f"  {modulo}: ERROR - {e}")
+            resultados[modulo] = {"error": str(e)}
+            continue
+
+        mas_lentos = sorted(ultimo_detalle.items(), key=lambda item: item[1], reverse=True)[:10]
+        cargados = [p for p in PAQUETES_DIFERIDOS if p in ultimo_detalle]
+        resultados[modulo] = {
+            "mediana_ms": statistics.median(totales) / 1000,
+            "minimo_ms": min(totales) / 1000,
+            "maximo_ms": max(totales) / 1000,
+            "paquetes_diferidos_cargados": cargados,
+            "mas_lentos_ms": {nombre: t / 1000 for nombre, t in mas_lentos},
+        }
+    return resultados
+
+
+def comparar(resultados, referencia, tolerancia):
+    """Compara con la referencia. Retorna la lista de regresiones detectadas."""
+    regresiones = []
+    for modulo, datos in resultados.items():
+        if "error" in datos:
+            continue
+        ref = referencia.get(modulo)
+        if ref and "mediana_ms" in ref:
+            limite = ref["mediana_ms"] * (1 + tolerancia)
+            if datos["mediana_ms"] > limite:
+                regresiones.append(
+                    f"{modulo}: {datos['mediana_ms']:.1f} ms > {limite:.1f} ms "
+                    f"(referencia {ref['mediana_ms']:.1f} ms + {tolerancia:.0%})"
+                )
+        if modulo == 'main' and datos["paquetes_diferidos_cargados"]:
+            regresiones.append(
+                f"main: importa paquetes que deberían cargarse de forma diferida: "
+                f"{', '.join(datos['paquetes_diferidos_cargados'])}"
+            )
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide el tiempo de importación de los módulos de The Coin Vault.")
+    parser.add_argument('--modulos', nargs='+', default=MODULOS_POR_DEFECTO)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--tolerancia', type=float, default=0.25,
+                        help="Aumento relativo permitido respecto a la referencia (por defecto 0.25).")
+    parser.add_argument('--referencia', default=ARCHIVO_REFERENCIA)
+    parser.add_argument('--actualizar-referencia', action='store_true',
+                        help="Guarda los resultados actuales como nueva referencia.")
+    parser.add_argument('--json', help="Ruta donde guardar los resultados completos en JSON.")
+    args = parser.parse_args()
+
+    print(f"Midiendo tiempo de importación ({args.repeticiones} repeticiones por módulo)...")
+    resultados = ejecutar(args.modulos, args.repeticiones)
+    for modulo, datos in resultados.items():
+        if "error" in datos:
+            continue
+        print(f"  {modulo}: mediana {datos['mediana_ms']:.1f} ms "
+              f"(mín {datos['minimo_ms']:.1f}, máx {datos['maximo_ms']:.1f})")
+        for nombre, t in list(datos["mas_lentos_ms"].items())[:5]:
+            print(f"      {t:8.1f} ms  {nombre}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=4, ensure_ascii=False)
+
+    if args.actualizar_referencia:
+        with open(args.referencia, 'w', encoding='utf-8') as f:
+            json.dump({m: {"mediana_ms": d["mediana_ms"]} for m, d in resultados.items() if "error" not in d},
+                      f, indent=4, ensure_ascii=False)
+        print(f"Referencia actualizada en {args.referencia}")
+        return 0
+
+    referencia = {}
+    if os.path.exists(args.referencia):
+        with open(args.referencia, 'r', encoding='utf-8') as f:
+            referencia = json.load(f)
+
+    regresiones = comparar(resultados, referencia, args.tolerancia)
+    if regresiones:
+        print("Regresiones detectadas:")
+        for regresion in regresiones:
+            print(f"  - {regresion}")
+        return 1
+    print("Sin regresiones.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""
+Benchmark de escalabilidad del mantenimiento de imágenes (mantenimiento_imagenes).
+
+Genera imágenes sintéticas y ejecuta la comprobación con generación de miniaturas
+y hashes perceptuales (forzada, para que siempre se decodifiquen todas) con distinto
+número de procesos, mostrando el tiempo y la aceleración respecto a un solo proceso.
+Necesita Pillow o PyQt6 para decodificar las imágenes.
+
+Uso:
+    python benchmarks/bench_mantenimiento.py --imagenes 2000 --tamano 1024
+    python benchmarks/bench_mantenimiento.py --procesos 1 2 4 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+DIRECTORIO_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if DIRECTORIO_RAIZ not in sys.path:
+    sys.path.insert(0, DIRECTORIO_RAIZ)
+
+import hash_perceptual
+import mantenimiento_imagenes
+from generador_sintetico import generar_imagenes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--imagenes', type=int, default=1000)
+    parser.add_argument('--tamano', type=int, default=1024, help="Lado de las imágenes sintéticas en píxeles")
+    parser.add_argument('--procesos', type=int, nargs='+')
+    args = parser.parse_args()
+
+    nucleos = os.cpu_count() or 1
+    procesos = args.procesos or sorted({1, 2, 4, nucleos} & set(range(1, nucleos + 1)))
+    with tempfile.TemporaryDirectory() as directorio:
+        directorio_imagenes = os.path.join(directorio, 'imagenes')
+        rutas = generar_imagenes(directorio_imagenes, args.imagenes, tamano=args.tamano)
+        referencias = {os.path.abspath(ruta): [(f"SIN-{i:06d}", 'foto_anverso')] for i, ruta in enumerate(rutas)}
+        base = None
+        for n in procesos:
+            try:
+                informe = mantenimiento_imagenes.ejecutar_mantenimiento(
+                    referencias, directorio_imagenes, os.path.join(directorio, 'miniaturas'), procesos=n, forzar=True,
+                    almacen_hashes=hash_perceptual.AlmacenHashes(os.path.join(directorio, 'hashes.json')))
+            except ImportError:
+                print("Se necesita Pillow o PyQt6 para decodificar las imágenes.")
+                return 1
+            base = base or informe["segundos"]
+            print(f"{n:>3} procesos: {informe['segundos']:>8.2f} s  "
+                  f"({informe['imagenes'] / informe['segundos']:.0f} imágenes/s, aceleración x{base / informe['segundos']:.2f})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
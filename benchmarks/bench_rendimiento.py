@@ -0,0 +1,211 @@
+"""
+Benchmark de escalabilidad de coin_data_manager y de las pestañas.
+
+Genera colecciones sintéticas de distintos tamaños y mide, para cada operación,
+los percentiles de latencia (p50/p90/p99) y el pico de memoria (tracemalloc).
+El pico de memoria se mide en una ejecución aparte para no alterar los tiempos.
+
+Las operaciones de Qt (SearchCoinTab.display_results) se miden en modo sin
+ventana (QT_QPA_PLATFORM=offscreen) y se omiten si PyQt6 no está instalado.
+
+Uso:
+    python benchmarks/bench_rendimiento.py --tamanos 1000 10000 100000
+    python benchmarks/bench_rendimiento.py --tamanos 1000000 --repeticiones 3 --json resultados.json
+    python benchmarks/bench_rendimiento.py --referencia resultados_anteriores.json --tolerancia 0.2
+"""
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+DIRECTORIO_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if DIRECTORIO_RAIZ not in sys.path:
+    sys.path.insert(0, DIRECTORIO_RAIZ)
+
+import coin_data_manager
+from generador_sintetico import generar_coleccion, generar_imagenes
+
+
+def percentil(valores, p):
+    """Percentil por interpolación lineal de una lista de valores."""
+    ordenados = sorted(valores)
+    if len(ordenados) == 1:
+        return ordenados[0]
+    posicion = (len(ordenados) - 1) * p / 100
+    inferior = int(posicion)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicion - inferior)
+
+
+def medir(operacion, repeticiones, preparar=None):
+    """
+    Ejecuta 'operacion' varias veces y retorna las estadísticas de latencia en ms
+    y el pico de memoria en MB. 'preparar' se ejecuta antes de cada repetición sin medirse.
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        if preparar:
+            preparar()
+        gc.collect()
+        inicio = time.perf_counter()
+        operacion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+
+    if preparar:
+        preparar()
+    gc.collect()
+    tracemalloc.start()
+    operacion()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "p50_ms": percentil(tiempos, 50),
+        "p90_ms": percentil(tiempos, 90),
+        "p99_ms": percentil(tiempos, 99),
+        "media_ms": statistics.fmean(tiempos),
+        "pico_memoria_mb": pico / (1024 * 1024),
+    }
+
+
+def _crear_pestana_busqueda():
+    """Crea una SearchCoinTab sin ventana. Retorna None si PyQt6 no está disponible."""
+    try:
+        from PyQt6.QtWidgets import QApplication
+    except ImportError:
+        return None
+    app = QApplication.instance() or QApplication([])
+    from search_coin_tab import SearchCoinTab
+    pestana = SearchCoinTab()
+    pestana._app = app  # Mantener viva la aplicación mientras exista la pestaña
+    return pestana
+
+
+def ejecutar_tamano(n, repeticiones, con_imagenes, directorio):
+    """Ejecuta todas las operaciones para una colección de tamaño n."""
+    imagenes = None
+    if con_imagenes:
+        imagenes = generar_imagenes(os.path.join(directorio, 'imagenes'), min(n, 2000))
+    coleccion = generar_coleccion(n, semilla=n, imagenes=imagenes)
+
+    coin_data_manager.ARCHIVO_COLECCION = os.path.join(directorio, f'coleccion_{n}.json')
+    coin_data_manager.ARCHIVO_SNAPSHOT = os.path.join(directorio, f'coleccion_{n}.snapshot')
+    coin_data_manager.mi_coleccion = coleccion
+    coin_data_manager.guardar_coleccion()
+
+    def cargar_sin_snapshot():
+        coin_data_manager.USAR_SNAPSHOT_BINARIO = False
+        try:
+            coin_data_manager.cargar_coleccion()
+        finally:
+            coin_data_manager.USAR_SNAPSHOT_BINARIO = True
+
+    def restaurar_lista():
+        coin_data_manager.mi_coleccion = list(coleccion)
+
+    codigo_existente = coleccion[n // 2][coin_data_manager.CAMPO_CODIGO_UNICO]
+    criterios_pais = {coin_data_manager.CAMPO_PAIS_EMISOR: "alemania"}
+    criterios_multiples = {
+        coin_data_manager.CAMPO_PAIS_EMISOR: "españa",
+        coin_data_manager.CAMPO_CECA: "madrid",
+        coin_data_manager.CAMPO_ESTADO: "sc",
+    }
+
+    operaciones = [
+        ("cargar_coleccion (JSON)", cargar_sin_snapshot, None),
+        ("cargar_coleccion (snapshot)", coin_data_manager.cargar_coleccion, None),
+        ("guardar_coleccion", coin_data_manager.guardar_coleccion, restaurar_lista),
+        ("generar_codigo_unico", lambda: coin_data_manager.generar_codigo_unico("España", 1980), restaurar_lista),
+        ("obtener_moneda_por_id", lambda: coin_data_manager.obtener_moneda_por_id(codigo_existente), restaurar_lista),
+        ("buscar_monedas (país)", lambda: coin_data_manager.buscar_monedas(criterios_pais), restaurar_lista),
+        ("buscar_monedas (3 criterios)", lambda: coin_data_manager.buscar_monedas(criterios_multiples), restaurar_lista),
+        ("buscar_monedas_pagina (primera, 100)",
+         lambda: coin_data_manager.buscar_monedas_pagina(criterios_pais, limite=100), restaurar_lista),
+        ("iterar_monedas (primeras 100)",
+         lambda: list(coin_data_manager.iterar_monedas(criterios_pais, limite=100)), restaurar_lista),
+    ]
+    for nombre in ("por_pais", "por_ceca", "por_estado_conservacion", "por_tipo", "por_orientacion"):
+        funcion = getattr(coin_data_manager, f"obtener_distribucion_{nombre}")
+        operaciones.append((f"obtener_distribucion_{nombre}", funcion, restaurar_lista))
+    operaciones.append(("obtener_distribucion_desmonetizacion",
+                        coin_data_manager.obtener_distribucion_desmonetizacion, restaurar_lista))
+
+    pestana = _crear_pestana_busqueda()
+    if pestana is not None:
+        # Primera página (lo que ve el usuario al instante) y tabla completa
+        operaciones.append(("SearchCoinTab.display_results (1ª página)", lambda: pestana.display_results(coleccion), None))
+
+        def mostrar_todo():
+            pestana.display_results(coleccion)
+            pestana._finish_loading_results()
+        operaciones.append(("SearchCoinTab.display_results (completa)", mostrar_todo, None))
+
+    resultados = {}
+    for nombre, operacion, preparar in operaciones:
+        estadisticas = medir(operacion, repeticiones, preparar)
+        resultados[nombre] = estadisticas
+        print(f"  {nombre:<45} p50 {estadisticas['p50_ms']:10.2f} ms   p90 {estadisticas['p90_ms']:10.2f} ms   "
+              f"p99 {estadisticas['p99_ms']:10.2f} ms   pico {estadisticas['pico_memoria_mb']:8.2f} MB")
+    if pestana is None:
+        print("  (PyQt6 no disponible: se omite SearchCoinTab.display_results)")
+    return resultados
+
+
+def comparar(resultados, referencia, tolerancia):
+    """Retorna la lista de operaciones cuyo p50 empeora más que la tolerancia respecto a la referencia."""
+    regresiones = []
+    for tamano, operaciones in resultados.items():
+        for nombre, datos in operaciones.items():
+            ref = referencia.get(tamano, {}).get(nombre)
+            if ref and datos["p50_ms"] > ref["p50_ms"] * (1 + tolerancia):
+                regresiones.append(f"n={tamano} {nombre}: {datos['p50_ms']:.2f} ms "
+                                   f"(referencia {ref['p50_ms']:.2f} ms)")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de escalabilidad de The Coin Vault.")
+    parser.add_argument('--tamanos', nargs='+', type=int, default=[1000, 10000, 100000])
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--con-imagenes', action='store_true',
+                        help="Genera imágenes PNG y las asigna a las fotos de anverso y reverso.")
+    parser.add_argument('--json', help="Ruta donde guardar los resultados en JSON.")
+    parser.add_argument('--referencia', help="Resultados JSON anteriores con los que comparar.")
+    parser.add_argument('--tolerancia', type=float, default=0.25)
+    args = parser.parse_args()
+
+    resultados = {}
+    with tempfile.TemporaryDirectory(prefix='coinvault_bench_') as directorio:
+        for n in args.tamanos:
+            print(f"Colección sintética de {n} monedas:")
+            resultados[str(n)] = ejecutar_tamano(n, args.repeticiones, args.con_imagenes, directorio)
+            if isinstance(coin_data_manager.mi_coleccion, coin_data_manager.coin_snapshot.ColeccionSnapshot):
+                coin_data_manager.mi_coleccion.cerrar()
+            coin_data_manager.mi_coleccion = []
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=4, ensure_ascii=False)
+
+    if args.referencia:
+        with open(args.referencia, 'r', encoding='utf-8') as f:
+            referencia = json.load(f)
+        regresiones = comparar(resultados, referencia, args.tolerancia)
+        if regresiones:
+            print("Regresiones detectadas:")
+            for regresion in regresiones:
+                print(f"  - {regresion}")
+            return 1
+        print("Sin regresiones.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
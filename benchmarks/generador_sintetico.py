@@ -0,0 +1,128 @@
+"""
+Generador de colecciones sintéticas de monedas para los benchmarks.
+
+Las distribuciones de país, ceca, estado, tipo y composición están sesgadas
+(ley de Zipf), como en una colección real: unos pocos países acumulan la mayoría
+de las monedas y hay una cola larga de países con muy pocas.
+"""
+import os
+import random
+import struct
+import sys
+import zlib
+
+DIRECTORIO_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if DIRECTORIO_RAIZ not in sys.path:
+    sys.path.insert(0, DIRECTORIO_RAIZ)
+
+import coin_data_manager
+
+PAISES = [
+    "España", "Alemania", "Francia", "Italia", "Portugal", "Reino Unido", "Estados Unidos", "México",
+    "Argentina", "Chile", "Colombia", "Perú", "Venezuela", "Uruguay", "Brasil", "Canadá", "Japón",
+    "China", "India", "Rusia", "Grecia", "Países Bajos", "Bélgica", "Suiza", "Austria", "Suecia",
+    "Noruega", "Dinamarca", "Finlandia", "Polonia", "Hungría", "República Checa", "Turquía", "Egipto",
+    "Marruecos", "Sudáfrica", "Australia", "Nueva Zelanda", "Irlanda", "Israel", "Cuba", "Ecuador",
+    "Bolivia", "Paraguay", "Costa Rica", "Panamá", "Guatemala", "Honduras", "Nicaragua", "El Salvador",
+    "Filipinas", "Tailandia", "Vietnam", "Corea del Sur", "Indonesia", "Malasia", "Singapur", "Irán",
+    "Arabia Saudí", "Túnez", "Argelia", "Kenia", "Nigeria", "Etiopía", "Islandia", "Luxemburgo",
+    "Mónaco", "San Marino", "Vaticano", "Andorra", "Malta", "Chipre", "Croacia", "Eslovenia",
+    "Eslovaquia", "Rumanía", "Bulgaria", "Serbia", "Ucrania", "Lituania", "Letonia", "Estonia",
+]
+CECAS = [
+    "Madrid", "Berlín (A)", "Múnich (D)", "Stuttgart (F)", "Karlsruhe (G)", "Hamburgo (J)", "París",
+    "Pessac", "Roma", "Lisboa", "Londres", "Filadelfia (P)", "Denver (D)", "San Francisco (S)",
+    "Ciudad de México (Mo)", "Santiago (So)", "Utrecht", "Bruselas", "Viena", "Kongsberg",
+]
+ESTADOS = ["SC", "EBC", "MBC", "BC", "RC", "MC", "Proof"]
+TIPOS = ["Circulación", "Conmemorativa", "Bullion", "Prueba", "Fantasía"]
+COMPOSICIONES = ["Cuproníquel", "Acero", "Latón", "Bronce", "Plata", "Aluminio", "Bimetálica", "Oro", "Zinc"]
+UNIDADES = ["Euro", "Peseta", "Marco", "Franco", "Lira", "Dólar", "Peso", "Libra", "Escudo", "Céntimo"]
+ORIENTACIONES = ["Medalla", "Moneda"]
+VALORES_NOMINALES = ["1", "2", "5", "10", "20", "25", "50", "100", "200", "500"]
+
+
+def _pesos_zipf(n, exponente=1.1):
+    return [1.0 / (rango ** exponente) for rango in range(1, n + 1)]
+
+
+def _png_minimo(ancho, alto, color):
+    """Crea un PNG RGB de color liso sin depender de Pillow."""
+    def bloque(tipo, datos):
+        return struct.pack('>I', len(datos)) + tipo + datos + struct.pack('>I', zlib.crc32(tipo + datos) & 0xFFFFFFFF)
+    fila = b'\x00' + bytes(color) * ancho
+    return (b'\x89PNG\r\n\x1a\n'
+            + bloque(b'IHDR', struct.pack('>IIBBBBB', ancho, alto, 8, 2, 0, 0, 0))
+            + bloque(b'IDAT', zlib.compress(fila * alto))
+            + bloque(b'IEND', b''))
+
+
+def generar_imagenes(directorio, cantidad, semilla=0, tamano=256):
+    """Genera 'cantidad' imágenes PNG en 'directorio' y retorna sus rutas."""
+    os.makedirs(directorio, exist_ok=True)
+    rng = random.Random(semilla)
+    rutas = []
+    for i in range(cantidad):
+        ruta = os.path.join(directorio, f"sintetica_{i:06d}.png")
+        if not os.path.exists(ruta):
+            color = (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+            with open(ruta, 'wb') as f:
+                f.write(_png_minimo(tamano, tamano, color))
+        rutas.append(ruta)
+    return rutas
+
+
+def generar_coleccion(n, semilla=0, imagenes=None):
+    """
+    Genera una lista de 'n' monedas con todas las claves de TODOS_LOS_CAMPOS_LLAVES.
+    'imagenes' es una lista opcional de rutas que se asignan a los campos de foto.
+    """
+    rng = random.Random(semilla)
+    pesos_paises = _pesos_zipf(len(PAISES))
+    pesos_cecas = _pesos_zipf(len(CECAS))
+    pesos_estados = _pesos_zipf(len(ESTADOS), 0.8)
+    pesos_tipos = _pesos_zipf(len(TIPOS), 1.5)
+    pesos_composiciones = _pesos_zipf(len(COMPOSICIONES))
+
+    paises = rng.choices(PAISES, pesos_paises, k=n)
+    cecas = rng.choices(CECAS, pesos_cecas, k=n)
+    estados = rng.choices(ESTADOS, pesos_estados, k=n)
+    tipos = rng.choices(TIPOS, pesos_tipos, k=n)
+    composiciones = rng.choices(COMPOSICIONES, pesos_composiciones, k=n)
+
+    secuenciales = {}
+    coleccion = []
+    for i in range(n):
+        pais = paises[i]
+        ano = rng.randint(1850, 2024)
+        prefijo = "".join(filter(str.isalpha, pais)).upper()[:3]
+        secuencial = secuenciales.get((prefijo, ano), 0) + 1
+        secuenciales[(prefijo, ano)] = secuencial
+        moneda = {key: None for key in coin_data_manager.TODOS_LOS_CAMPOS_LLAVES}
+        moneda.update({
+            coin_data_manager.CAMPO_CODIGO_UNICO: f"{prefijo}-{ano}-{secuencial:06d}",
+            coin_data_manager.CAMPO_PAIS_EMISOR: pais,
+            coin_data_manager.CAMPO_ANO_ACUNACION: ano,
+            coin_data_manager.CAMPO_TIPO: tipos[i],
+            coin_data_manager.CAMPO_ANOS_DE_EMISION: f"{ano}-{ano + rng.randint(0, 10)}",
+            coin_data_manager.CAMPO_VALOR: round(rng.lognormvariate(0.5, 1.2), 2),
+            coin_data_manager.CAMPO_VALOR_NOMINAL: rng.choice(VALORES_NOMINALES),
+            coin_data_manager.CAMPO_UNIDAD_MONETARIA: rng.choice(UNIDADES),
+            coin_data_manager.CAMPO_COMPOSICION: composiciones[i],
+            coin_data_manager.CAMPO_PESO: round(rng.uniform(1.0, 35.0), 2),
+            coin_data_manager.CAMPO_DIAMETRO: round(rng.uniform(14.0, 40.0), 2),
+            coin_data_manager.CAMPO_GROSOR: round(rng.uniform(1.0, 3.5), 2),
+            coin_data_manager.CAMPO_ORIENTACION: rng.choice(ORIENTACIONES),
+            coin_data_manager.CAMPO_DESMONETIZADA: rng.random() < 0.4,
+            coin_data_manager.CAMPO_CANTO: rng.choice(["Liso", "Estriado", "Con inscripción", None]),
+            coin_data_manager.CAMPO_CECA: cecas[i] if rng.random() < 0.8 else None,
+            coin_data_manager.CAMPO_TIRADA: rng.randint(1_000, 500_000_000),
+            coin_data_manager.CAMPO_CANTIDAD: rng.choices([1, 2, 3, 5, 10], [70, 15, 8, 5, 2])[0],
+            coin_data_manager.CAMPO_ESTADO: estados[i],
+            coin_data_manager.CAMPO_NOTA_IMPORTANTE: "Variante rara" if rng.random() < 0.02 else None,
+        })
+        if imagenes:
+            moneda[coin_data_manager.CAMPO_FOTO_ANVERSO] = imagenes[(2 * i) % len(imagenes)]
+            moneda[coin_data_manager.CAMPO_FOTO_REVERSO] = imagenes[(2 * i + 1) % len(imagenes)]
+        coleccion.append(moneda)
+    return coleccion
@@ -0,0 +1,81 @@
+import os
+import time
+
+# =========================================================================
+# Bloqueo consultivo (advisory lock) entre procesos
+# =========================================================================
+# Se bloquea un archivo auxiliar '<archivo>.lock' en lugar del propio archivo de
+# datos, porque este se reemplaza de forma atómica en cada guardado.
+# En Linux/macOS se usa fcntl.flock y en Windows msvcrt.locking.
+# =========================================================================
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Intervalo entre intentos mientras se espera a que otro proceso libere el bloqueo
+INTERVALO_REINTENTO = 0.05
+
+
+class BloqueoArchivo:
+    """
+    Bloqueo consultivo entre procesos sobre una ruta. Se usa como contexto:
+
+        with BloqueoArchivo('coleccion.json.lock'):
+            ...
+
+    'compartido=True' permite varios lectores a la vez (solo con fcntl; en Windows
+    el bloqueo es siempre exclusivo). Si no se obtiene en 'tiempo_espera' segundos
+    se lanza TimeoutError.
+    """
+    def __init__(self, ruta, compartido=False, tiempo_espera=10.0):
+        self.ruta = ruta
+        self.compartido = compartido
+        self.tiempo_espera = tiempo_espera
+        self._archivo = None
+
+    def adquirir(self):
+        directorio = os.path.dirname(os.path.abspath(self.ruta))
+        os.makedirs(directorio, exist_ok=True)
+        self._archivo = open(self.ruta, 'a+b')
+        limite = time.monotonic() + self.tiempo_espera
+        while True:
+            try:
+                self._intentar_bloquear()
+                return self
+            except OSError:
+                if time.monotonic() >= limite:
+                    self._archivo.close()
+                    self._archivo = None
+                    raise TimeoutError(f"No se pudo obtener el bloqueo de '{self.ruta}' en {self.tiempo_espera} s.")
+                time.sleep(INTERVALO_REINTENTO)
+
+    def _intentar_bloquear(self):
+        if fcntl is not None:
+            modo = fcntl.LOCK_SH if self.compartido else fcntl.LOCK_EX
+            fcntl.flock(self._archivo.fileno(), modo | fcntl.LOCK_NB)
+        else:
+            self._archivo.seek(0)
+            msvcrt.locking(self._archivo.fileno(), msvcrt.LK_NBLCK, 1)
+
+    def liberar(self):
+        if self._archivo is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._archivo.fileno(), fcntl.LOCK_UN)
+            else:
+                self._archivo.seek(0)
+                msvcrt.locking(self._archivo.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._archivo.close()
+            self._archivo = None
+
+    def __enter__(self):
+        return self.adquirir()
+
+    def __exit__(self, *exc):
+        self.liberar()
+        return False
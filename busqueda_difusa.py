@@ -0,0 +1,178 @@
+import unicodedata
+
+from indice_facetas import iterar_posiciones, mapa_de_posiciones, quitar_posiciones
+
+# =========================================================================
+# Búsqueda aproximada con trigramas
+# =========================================================================
+# Los textos se normalizan (minúsculas, sin acentos, solo letras y números) y se
+# descomponen en trigramas al estilo de pg_trgm: cada palabra se rellena con dos
+# espacios delante y uno detrás ("rfa" -> "  r", " rf", "rfa", "fa "). Dos textos
+# se parecen tanto como trigramas comparten, así que "Alemania RFA", "alemania" y
+# "Alemana" (con errata) se encuentran entre sí.
+#
+# El índice guarda los trigramas de cada valor distinto (hay muchos menos valores
+# distintos que monedas) y, por campo, un mapa de bits (como en IndiceFacetas) con las
+# posiciones de las monedas que tienen cada valor.
+# =========================================================================
+
+# Puntuación mínima (0-1) para considerar que un valor coincide
+UMBRAL_SIMILITUD = 0.35
+
+
+def normalizar_texto(texto):
+    """Minúsculas, sin acentos y con cualquier signo de puntuación convertido en espacio."""
+    if texto is None:
+        return ""
+    descompuesto = unicodedata.normalize('NFKD', str(texto).lower())
+    caracteres = []
+    for caracter in descompuesto:
+        if unicodedata.combining(caracter):
+            continue
+        caracteres.append(caracter if caracter.isalnum() else ' ')
+    return ' '.join(''.join(caracteres).split())
+
+
+def trigramas(texto_normalizado):
+    """Conjunto de trigramas de un texto ya normalizado."""
+    resultado = set()
+    for palabra in texto_normalizado.split():
+        relleno = f"  {palabra} "
+        for i in range(len(relleno) - 2):
+            resultado.add(relleno[i:i + 3])
+    return resultado
+
+
+def similitud(trigramas_consulta, trigramas_valor):
+    """
+    Media entre la similitud de Jaccard y la proporción de trigramas de la consulta
+    presentes en el valor. La segunda favorece los valores que contienen la consulta
+    ("alemania" en "Alemania RFA") sin que la longitud del valor la penalice demasiado.
+    """
+    if not trigramas_consulta or not trigramas_valor:
+        return 0.0
+    comunes = len(trigramas_consulta & trigramas_valor)
+    jaccard = comunes / len(trigramas_consulta | trigramas_valor)
+    contencion = comunes / len(trigramas_consulta)
+    return (jaccard + contencion) / 2
+
+
+class IndiceTrigramas:
+    """Índice de trigramas sobre los valores de varios campos de la colección."""
+    def __init__(self, campos):
+        self.campos = list(campos)
+        self.n = 0
+        # texto normalizado -> identificador, y trigramas de cada identificador
+        self._ids = {}
+        self._trigramas = []
+        # trigrama -> conjunto de identificadores de texto que lo contienen
+        self._textos_por_trigrama = {}
+        # campo -> {identificador de texto: mapa de bits de posiciones}
+        self._posiciones = {campo: {} for campo in self.campos}
+        # Versión de los datos con la que se corresponde el índice
+        self.version = None
+
+    def _id_texto(self, valor):
+        normalizado = normalizar_texto(valor)
+        if not normalizado:
+            return None
+        id_texto = self._ids.get(normalizado)
+        if id_texto is None:
+            id_texto = len(self._trigramas)
+            self._ids[normalizado] = id_texto
+            trigramas_texto = trigramas(normalizado)
+            self._trigramas.append(trigramas_texto)
+            for trigrama in trigramas_texto:
+                self._textos_por_trigrama.setdefault(trigrama, set()).add(id_texto)
+        return id_texto
+
+    def construir(self, n, valores_campo):
+        """Construye el índice en una pasada por campo. valores_campo(campo) itera la columna."""
+        self.n = n
+        # Los valores se repiten mucho: se normaliza cada valor distinto una sola vez
+        ids_por_valor = {}
+        for campo in self.campos:
+            posiciones_por_id = {}
+            for posicion, valor in enumerate(valores_campo(campo)):
+                if not valor:
+                    continue
+                clave = valor if isinstance(valor, (str, int, float)) else str(valor)
+                if clave in ids_por_valor:
+                    id_texto = ids_por_valor[clave]
+                else:
+                    id_texto = ids_por_valor[clave] = self._id_texto(valor)
+                if id_texto is not None:
+                    posiciones_por_id.setdefault(id_texto, []).append(posicion)
+            self._posiciones[campo] = {id_texto: mapa_de_posiciones(posiciones, n)
+                                       for id_texto, posiciones in posiciones_por_id.items()}
+
+    def anadir(self, moneda):
+        """Añade una moneda al final (posición n)."""
+        for campo in self.campos:
+            id_texto = self._id_texto(moneda.get(campo))
+            if id_texto is not None:
+                posiciones_campo = self._posiciones[campo]
+                posiciones_campo[id_texto] = posiciones_campo.get(id_texto, 0) | (1 << self.n)
+        self.n += 1
+
+    def actualizar(self, posicion, diferencias):
+        """Aplica {campo: (valor_anterior, valor_nuevo)} a la moneda de la posición indicada."""
+        for campo in self.campos:
+            if campo not in diferencias:
+                continue
+            anterior, nuevo = diferencias[campo]
+            id_anterior = self._id_texto(anterior)
+            posiciones_campo = self._posiciones[campo]
+            if id_anterior is not None and id_anterior in posiciones_campo:
+                mapa = posiciones_campo[id_anterior] & ~(1 << posicion)
+                if mapa:
+                    posiciones_campo[id_anterior] = mapa
+                else:
+                    del posiciones_campo[id_anterior]
+            id_nuevo = self._id_texto(nuevo)
+            if id_nuevo is not None:
+                posiciones_campo[id_nuevo] = posiciones_campo.get(id_nuevo, 0) | (1 << posicion)
+
+    def eliminar(self, posiciones):
+        """Quita las monedas de 'posiciones' (ordenadas) y renumera las siguientes."""
+        for campo, posiciones_campo in self._posiciones.items():
+            compactados = {}
+            for id_texto, mapa in posiciones_campo.items():
+                mapa = quitar_posiciones(mapa, posiciones)
+                if mapa:
+                    compactados[id_texto] = mapa
+            self._posiciones[campo] = compactados
+        self.n -= len(posiciones)
+
+    def buscar(self, texto, umbral=UMBRAL_SIMILITUD, campos=None):
+        """Retorna {posición: puntuación} de las monedas con algún campo parecido al texto."""
+        trigramas_consulta = trigramas(normalizar_texto(texto))
+        if not trigramas_consulta:
+            return {}
+        # Solo se puntúan los textos que comparten al menos un trigrama con la consulta
+        candidatos = set()
+        for trigrama in trigramas_consulta:
+            candidatos |= self._textos_por_trigrama.get(trigrama, set())
+        puntuaciones_texto = {}
+        for id_texto in candidatos:
+            puntuacion = similitud(trigramas_consulta, self._trigramas[id_texto])
+            if puntuacion >= umbral:
+                puntuaciones_texto[id_texto] = puntuacion
+
+        # Cada moneda se queda con la mejor puntuación de sus campos: se unen los mapas
+        # por puntuación y se recorren de mayor a menor, sin repetir posiciones
+        mapas_por_puntuacion = {}
+        for campo in campos or self.campos:
+            posiciones_campo = self._posiciones.get(campo, {})
+            for id_texto, puntuacion in puntuaciones_texto.items():
+                mapa = posiciones_campo.get(id_texto)
+                if mapa:
+                    mapas_por_puntuacion[puntuacion] = mapas_por_puntuacion.get(puntuacion, 0) | mapa
+        puntuaciones = {}
+        vistas = 0
+        for puntuacion in sorted(mapas_por_puntuacion, reverse=True):
+            mapa = mapas_por_puntuacion[puntuacion]
+            for posicion in iterar_posiciones(mapa & ~vistas):
+                puntuaciones[posicion] = puntuacion
+            vistas |= mapa
+        return puntuaciones
@@ -0,0 +1,147 @@
+import threading
+from collections import OrderedDict
+
+# =========================================================================
+# Caché LRU de resultados de búsqueda
+# =========================================================================
+# Cada entrada guarda la lista de monedas de una búsqueda junto con la versión de
+# los datos con la que es válida. Los cambios individuales (añadir, actualizar,
+# eliminar) se trasladan a las entradas afectadas sin recalcularlas; cualquier otro
+# cambio (recarga, fusión con otra instancia, deshacer) solo aumenta la versión de
+# los datos y deja todas las entradas obsoletas.
+#
+# La caché se modifica también al leer (orden LRU, contadores), y la API atiende
+# búsquedas desde varios hilos a la vez, así que todas las operaciones usan un cerrojo.
+# =========================================================================
+
+# Número máximo de búsquedas distintas que se conservan
+MAX_ENTRADAS = 128
+# Número máximo de referencias a monedas entre todas las entradas. Las búsquedas con
+# más resultados que este límite no se guardan (recorrerlas cuesta lo mismo que copiarlas).
+MAX_RESULTADOS = 500000
+
+
+class CacheConsultas:
+    """Caché LRU de resultados indexada por los criterios normalizados de la búsqueda."""
+    def __init__(self, max_entradas=MAX_ENTRADAS, max_resultados=MAX_RESULTADOS):
+        self.max_entradas = max_entradas
+        self.max_resultados = max_resultados
+        # clave -> [version, lista_de_monedas]
+        self._entradas = OrderedDict()
+        self._total_resultados = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.invalidaciones = 0
+        self.actualizaciones = 0
+        self._cerrojo = threading.Lock()
+
+    @staticmethod
+    def crear_clave(criterios_normalizados):
+        """Los criterios se ordenan para que el orden en que se indiquen no importe."""
+        return tuple(sorted(criterios_normalizados))
+
+    def obtener(self, clave, version):
+        """Retorna la lista cacheada si es válida para 'version', o None."""
+        with self._cerrojo:
+            entrada = self._entradas.get(clave)
+            if entrada is None or entrada[0] != version:
+                if entrada is not None:
+                    self._eliminar(clave)
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return entrada[1]
+
+    def guardar(self, clave, version, resultados):
+        if len(resultados) > self.max_resultados:
+            return
+        with self._cerrojo:
+            self._eliminar(clave)
+            self._entradas[clave] = [version, resultados]
+            self._total_resultados += len(resultados)
+            while self._entradas and (len(self._entradas) > self.max_entradas
+                                      or self._total_resultados > self.max_resultados):
+                self._eliminar(next(iter(self._entradas)))
+
+    def _eliminar(self, clave):
+        """Quita una entrada si existe. Se llama con el cerrojo adquirido."""
+        entrada = self._entradas.pop(clave, None)
+        if entrada is not None:
+            self._total_resultados -= len(entrada[1])
+
+    def aplicar_cambio(self, tipo, moneda, campos, version_actual, version_nueva, coincide):
+        """
+        Traslada un cambio individual a las entradas válidas para 'version_actual':
+          - 'anadir': se añade 'moneda' al final de las búsquedas en las que coincide.
+          - 'eliminar': se quita 'moneda' de las búsquedas que la contenían.
+          - 'actualizar': se descartan solo las búsquedas que filtran por alguno de
+            los 'campos' modificados; las demás siguen siendo correctas tal cual.
+        'coincide(moneda, criterios_normalizados)' es la función de filtrado de la búsqueda.
+        """
+        with self._cerrojo:
+            self._aplicar_cambio(tipo, moneda, campos, version_actual, version_nueva, coincide)
+
+    def _aplicar_cambio(self, tipo, moneda, campos, version_actual, version_nueva, coincide):
+        for clave in list(self._entradas):
+            entrada = self._entradas[clave]
+            if entrada[0] != version_actual:
+                self._eliminar(clave)
+                continue
+            if tipo == 'actualizar':
+                if any(campo in campos for campo, _ in clave):
+                    self._eliminar(clave)
+                    self.invalidaciones += 1
+                    continue
+            elif tipo == 'anadir':
+                if coincide(moneda, clave):
+                    entrada[1].append(moneda)
+                    self._total_resultados += 1
+            elif tipo == 'eliminar':
+                if coincide(moneda, clave):
+                    restantes = [m for m in entrada[1] if m is not moneda]
+                    self._total_resultados -= len(entrada[1]) - len(restantes)
+                    entrada[1] = restantes
+            entrada[0] = version_nueva
+            self.actualizaciones += 1
+
+    def aplicar_eliminaciones(self, monedas, version_actual, version_nueva, coincide):
+        """
+        Quita de una vez varias monedas eliminadas de las entradas válidas para
+        'version_actual' (cada entrada se recorre una sola vez, no una por moneda).
+        """
+        with self._cerrojo:
+            eliminadas = {id(moneda) for moneda in monedas}
+            for clave in list(self._entradas):
+                entrada = self._entradas[clave]
+                if entrada[0] != version_actual:
+                    self._eliminar(clave)
+                    continue
+                # Comprobar si la entrada contiene alguna solo compensa con pocas monedas
+                if len(monedas) > len(entrada[1]) or any(coincide(moneda, clave) for moneda in monedas):
+                    restantes = [m for m in entrada[1] if id(m) not in eliminadas]
+                    self._total_resultados -= len(entrada[1]) - len(restantes)
+                    entrada[1] = restantes
+                entrada[0] = version_nueva
+                self.actualizaciones += 1
+
+    def vaciar(self):
+        with self._cerrojo:
+            self._entradas.clear()
+            self._total_resultados = 0
+
+    def obtener_metricas(self):
+        with self._cerrojo:
+            return self._metricas()
+
+    def _metricas(self):
+        consultas = self.aciertos + self.fallos
+        return {
+            "entradas": len(self._entradas),
+            "resultados_cacheados": self._total_resultados,
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+            "invalidaciones": self.invalidaciones,
+            "actualizaciones": self.actualizaciones,
+        }
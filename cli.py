@@ -0,0 +1,387 @@
+"""
+Interfaz de línea de comandos de The Coin Vault.
+
+Permite operar sobre la colección sin abrir la aplicación gráfica: solo importa
+coin_data_manager (nada de PyQt6 ni Matplotlib), por lo que arranca al instante
+y puede usarse en tareas programadas.
+
+Ejemplos:
+    python cli.py buscar --criterio pais_emisor=españa --formato jsonl
+    python cli.py anadir '{"pais_emisor": "Alemania", "ano_acunacion": 1971}'
+    python cli.py actualizar ALE-1971-000001 '{"estado": "SC"}'
+    python cli.py eliminar ALE-1971-000001 ESP-1980-000003
+    python cli.py estadisticas
+    python cli.py exportar --formato csv --salida coleccion.csv
+    python cli.py versiones crear --descripcion "Antes de reorganizar"
+    python cli.py versiones restaurar 3
+    cat operaciones.jsonl | python cli.py lote
+    python cli.py imagenes --procesos 8 --json informe.json
+    python cli.py duplicados --umbral 0.9 --fusionar --si
+
+Formato de 'lote' (una operación JSON por línea, todas en una única transacción):
+    {"op": "anadir", "moneda": {...}}
+    {"op": "actualizar", "codigo": "ESP-1980-000001", "datos": {...}}
+    {"op": "eliminar", "codigo": "ESP-1980-000001"}
+"""
+import argparse
+import csv
+import json
+import sys
+
+import coin_data_manager
+import duplicados_monedas
+
+
+def _leer_json_argumento(texto):
+    """Lee un objeto JSON de un argumento, o de la entrada estándar si el argumento es '-'."""
+    if texto == '-':
+        texto = sys.stdin.read()
+    try:
+        datos = json.loads(texto)
+    except json.JSONDecodeError as e:
+        raise SystemExit(f"Error: JSON inválido: {e}")
+    if not isinstance(datos, dict):
+        raise SystemExit("Error: se esperaba un objeto JSON.")
+    return datos
+
+
+def _escribir_monedas(monedas, formato, salida):
+    if formato == 'json':
+        json.dump(list(monedas), salida, indent=4, ensure_ascii=False)
+        salida.write('\n')
+    elif formato == 'jsonl':
+        for moneda in monedas:
+            salida.write(json.dumps(moneda, ensure_ascii=False) + '\n')
+    elif formato == 'csv':
+        escritor = csv.DictWriter(salida, fieldnames=coin_data_manager.TODOS_LOS_CAMPOS_LLAVES, extrasaction='ignore')
+        escritor.writeheader()
+        for moneda in monedas:
+            escritor.writerow(moneda)
+    else:  # tabla
+        columnas = [coin_data_manager.CAMPO_CODIGO_UNICO, coin_data_manager.CAMPO_PAIS_EMISOR,
+                    coin_data_manager.CAMPO_ANO_ACUNACION, coin_data_manager.CAMPO_VALOR_NOMINAL,
+                    coin_data_manager.CAMPO_UNIDAD_MONETARIA, coin_data_manager.CAMPO_ESTADO,
+                    coin_data_manager.CAMPO_CANTIDAD]
+        for moneda in monedas:
+            salida.write("\t".join("" if moneda.get(c) is None else str(moneda.get(c)) for c in columnas) + '\n')
+
+
+def comando_buscar(args):
+    criterios = {}
+    for criterio in args.criterio or []:
+        campo, _, valor = criterio.partition('=')
+        if campo not in coin_data_manager.TODOS_LOS_CAMPOS_LLAVES:
+            raise SystemExit(f"Error: campo desconocido '{campo}'.")
+        criterios[campo] = valor
+    if args.aproximada:
+        resultados = coin_data_manager.buscar_monedas_difusa(args.aproximada)[:args.limite]
+        monedas = (moneda for moneda, _ in resultados)
+    else:
+        # Las monedas se escriben según se encuentran, sin construir la lista completa
+        monedas = coin_data_manager.iterar_monedas(criterios, limite=args.limite)
+    _escribir_monedas(monedas, args.formato, sys.stdout)
+    return 0
+
+
+def comando_anadir(args):
+    moneda = _leer_json_argumento(args.moneda)
+    coin_data_manager.anadir_moneda(moneda)
+    print(moneda[coin_data_manager.CAMPO_CODIGO_UNICO])
+    return 0
+
+
+def comando_actualizar(args):
+    datos = _leer_json_argumento(args.datos)
+    datos.pop(coin_data_manager.CAMPO_CODIGO_UNICO, None)
+    if not coin_data_manager.actualizar_moneda(args.codigo, datos):
+        print(f"Error: no existe la moneda '{args.codigo}'.", file=sys.stderr)
+        return 1
+    return 0
+
+
+def comando_eliminar(args):
+    no_encontradas = []
+    with coin_data_manager.transaccion():
+        for codigo in args.codigos:
+            if not coin_data_manager.eliminar_moneda(codigo):
+                no_encontradas.append(codigo)
+    for codigo in no_encontradas:
+        print(f"Error: no existe la moneda '{codigo}'.", file=sys.stderr)
+    return 1 if no_encontradas else 0
+
+
+def comando_estadisticas(args):
+    estadisticas = coin_data_manager.obtener_resumen_estadisticas()
+    json.dump(estadisticas, sys.stdout, indent=4, ensure_ascii=False)
+    sys.stdout.write('\n')
+    return 0
+
+
+def comando_exportar(args):
+    if args.salida and args.salida != '-':
+        with open(args.salida, 'w', encoding='utf-8', newline='') as salida:
+            _escribir_monedas(coin_data_manager.mi_coleccion, args.formato, salida)
+    else:
+        _escribir_monedas(coin_data_manager.mi_coleccion, args.formato, sys.stdout)
+    return 0
+
+
+def comando_versiones(args):
+    if args.accion == 'listar':
+        for entrada in coin_data_manager.listar_versiones_coleccion():
+            sys.stdout.write(f"{entrada['version']}\t{entrada['fecha']}\t{entrada['tipo']}\t"
+                             f"{entrada['monedas']}\t{entrada['bytes']}\t{entrada['descripcion']}\n")
+    elif args.accion == 'crear':
+        entrada = coin_data_manager.crear_version_coleccion(args.descripcion or "")
+        print(entrada['version'])
+    elif args.numero is None:
+        raise SystemExit(f"Error: '{args.accion}' necesita el número de versión.")
+    elif args.accion == 'exportar':
+        _escribir_monedas(coin_data_manager.obtener_version_coleccion(args.numero), 'json', sys.stdout)
+    else:  # restaurar
+        anadidas, modificadas, eliminadas = coin_data_manager.restaurar_version_coleccion(args.numero)
+        print(f"Versión {args.numero} restaurada: {anadidas} añadidas, {modificadas} modificadas, {eliminadas} eliminadas.")
+    return 0
+
+
+def _error_operacion(operacion):
+    """Retorna el resultado de error de una operación del lote mal formada, o None si es válida."""
+    if not isinstance(operacion, dict):
+        return {"ok": False, "error": "la operación debe ser un objeto JSON"}
+    tipo = operacion.get("op")
+    if tipo not in ("anadir", "actualizar", "eliminar"):
+        return {"ok": False, "error": f"operación desconocida: {tipo!r}"}
+    if tipo == "anadir" and not isinstance(operacion.get("moneda") or {}, dict):
+        return {"ok": False, "error": "'moneda' debe ser un objeto JSON"}
+    if tipo == "actualizar" and not isinstance(operacion.get("datos") or {}, dict):
+        return {"ok": False, "error": "'datos' debe ser un objeto JSON"}
+    if tipo != "anadir" and not isinstance(operacion.get("codigo"), str):
+        return {"ok": False, "error": "'codigo' debe ser un texto"}
+    return None
+
+
+def _datos_actualizacion(operacion):
+    datos = dict(operacion.get("datos") or {})
+    datos.pop(coin_data_manager.CAMPO_CODIGO_UNICO, None)
+    return datos
+
+
+def _ejecutar_grupo(tipo, operaciones):
+    """
+    Ejecuta operaciones válidas consecutivas del mismo tipo. Las de actualizar y eliminar
+    se aplican juntas, resolviendo los códigos con una sola pasada por la colección en
+    lugar de una por operación. Retorna los resultados en el mismo orden.
+    """
+    if tipo == "anadir":
+        resultados = []
+        for operacion in operaciones:
+            moneda = dict(operacion.get("moneda") or {})
+            coin_data_manager.anadir_moneda(moneda)
+            resultados.append({"ok": True, "codigo": moneda[coin_data_manager.CAMPO_CODIGO_UNICO]})
+        return resultados
+    codigos = [operacion["codigo"] for operacion in operaciones]
+    if tipo == "actualizar":
+        encontradas = coin_data_manager.actualizar_monedas_por_codigo(
+            [(codigo, _datos_actualizacion(operacion)) for codigo, operacion in zip(codigos, operaciones)])
+    else:
+        encontradas = coin_data_manager.eliminar_monedas_por_codigo(codigos)
+    return [{"ok": ok, "codigo": codigo} for codigo, ok in zip(codigos, encontradas)]
+
+
+def comando_lote(args):
+    """Procesa operaciones JSONL desde la entrada estándar en una sola transacción (un único guardado)."""
+    resultados = []
+    # Operaciones válidas seguidas del mismo tipo que aún no se han ejecutado: (línea, operación)
+    grupo = []
+
+    def anotar(numero_linea, resultado):
+        resultado["linea"] = numero_linea
+        if not resultado["ok"] and args.abortar_si_error:
+            raise ValueError(f"línea {numero_linea}: {resultado.get('error', 'la operación falló')}")
+        resultados.append(resultado)
+
+    def ejecutar_grupo():
+        if grupo:
+            operaciones = [operacion for _, operacion in grupo]
+            for (numero_linea, _), resultado in zip(grupo, _ejecutar_grupo(operaciones[0]["op"], operaciones)):
+                anotar(numero_linea, resultado)
+            grupo.clear()
+
+    try:
+        with coin_data_manager.transaccion():
+            for numero_linea, linea in enumerate(sys.stdin, start=1):
+                linea = linea.strip()
+                if not linea:
+                    continue
+                try:
+                    operacion = json.loads(linea)
+                except json.JSONDecodeError as e:
+                    error = {"ok": False, "error": f"JSON inválido: {e}"}
+                else:
+                    error = _error_operacion(operacion)
+                if error is not None or (grupo and grupo[0][1]["op"] != operacion["op"]):
+                    ejecutar_grupo()
+                if error is not None:
+                    anotar(numero_linea, error)
+                else:
+                    grupo.append((numero_linea, operacion))
+            ejecutar_grupo()
+    except ValueError as e:
+        print(f"Error: {e}. No se ha guardado ningún cambio.", file=sys.stderr)
+        return 1
+    for resultado in resultados:
+        sys.stdout.write(json.dumps(resultado, ensure_ascii=False) + '\n')
+    return 1 if any(not resultado["ok"] for resultado in resultados) else 0
+
+
+def comando_imagenes(args):
+    import mantenimiento_imagenes
+    referencias = mantenimiento_imagenes.recopilar_referencias(coin_data_manager.iterar_monedas(),
+                                                               coin_data_manager.CAMPOS_FOTO)
+    try:
+        informe = mantenimiento_imagenes.ejecutar_mantenimiento(
+            referencias, procesos=args.procesos, forzar=args.completo,
+            eliminar_miniaturas_huerfanas=args.limpiar_miniaturas)
+    except ImportError:
+        print("Error: se necesita Pillow o PyQt6 para decodificar las imágenes.", file=sys.stderr)
+        return 1
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(informe, f, indent=4, ensure_ascii=False)
+    print(f"Imágenes referenciadas: {informe['imagenes']} ({informe['correctas']} correctas, "
+          f"{informe['miniaturas_generadas']} miniaturas generadas, {informe['hashes_calculados']} hashes calculados) "
+          f"en {informe['segundos']} s con {informe['procesos']} procesos")
+    for clave, titulo in (('no_existen', "No existen"), ('corruptas', "No se pueden decodificar")):
+        if informe[clave]:
+            print(f"{titulo}: {len(informe[clave])}")
+            for entrada in informe[clave]:
+                codigos = ", ".join(f"{codigo} ({campo})" for codigo, campo in entrada["monedas"])
+                print(f"  {entrada['ruta']}: {codigos}")
+    if informe['huerfanas']:
+        print(f"Imágenes que no usa ninguna moneda: {len(informe['huerfanas'])}")
+        for ruta in informe['huerfanas']:
+            print(f"  {ruta}")
+    if informe['posibles_duplicados']:
+        print(f"Posibles fotos duplicadas: {len(informe['posibles_duplicados'])} grupos")
+        for grupo in informe['posibles_duplicados']:
+            monedas_por_imagen = coin_data_manager.obtener_monedas_por_imagen(grupo)
+            print("  " + " = ".join(
+                f"{clave} ({', '.join(codigo for codigo, _ in monedas_por_imagen.get(clave, []))})" for clave in grupo))
+    print(f"Miniaturas huérfanas: {informe['miniaturas_huerfanas']}"
+          + (f" ({informe['miniaturas_eliminadas']} eliminadas)" if args.limpiar_miniaturas else ""))
+    return 1 if informe['no_existen'] or informe['corruptas'] else 0
+
+
+def comando_duplicados(args):
+    grupos = coin_data_manager.buscar_monedas_duplicadas(args.umbral)
+    if args.json:
+        json.dump(grupos, sys.stdout, indent=4, ensure_ascii=False)
+        sys.stdout.write('\n')
+    else:
+        for grupo in grupos:
+            codigos = [moneda[coin_data_manager.CAMPO_CODIGO_UNICO] for moneda in grupo["monedas"]]
+            print(f"{grupo['puntuacion']:.2f}\t" + "\t".join(codigos))
+    if args.fusionar and grupos:
+        if not args.si:
+            # La pregunta va a stderr para no mezclarse con la salida (p. ej. con --json)
+            print(f"¿Fusionar los {len(grupos)} grupos? Se eliminarán las monedas repetidas [s/N]: ",
+                  end="", file=sys.stderr, flush=True)
+            try:
+                respuesta = input()
+            except EOFError:
+                respuesta = ""
+            if respuesta.strip().lower() not in ("s", "si", "sí"):
+                print("Fusión cancelada.", file=sys.stderr)
+                return 1
+        fusionadas = 0
+        # Una única transacción para todos los grupos: un guardado y un solo paso de deshacer
+        with coin_data_manager.transaccion(f"Fusionar {len(grupos)} grupos de duplicadas"):
+            for grupo in grupos:
+                codigos = [moneda[coin_data_manager.CAMPO_CODIGO_UNICO] for moneda in grupo["monedas"]]
+                # Se conserva la primera en el orden de la colección (normalmente la más antigua)
+                fusionadas += coin_data_manager.fusionar_monedas(codigos[0], codigos[1:])
+        print(f"{fusionadas} monedas fusionadas en {len(grupos)} grupos.", file=sys.stderr)
+    return 0
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Gestión de la colección de The Coin Vault desde la línea de comandos.")
+    parser.add_argument('--archivo', help=f"Archivo de la colección (por defecto {coin_data_manager.ARCHIVO_COLECCION}).")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    buscar = subparsers.add_parser('buscar', help="Busca monedas (sin criterios, lista todas).")
+    buscar.add_argument('--criterio', action='append', metavar='CAMPO=VALOR',
+                        help="Criterio de búsqueda con la clave interna del campo; puede repetirse.")
+    buscar.add_argument('--aproximada', metavar='TEXTO',
+                        help="Búsqueda aproximada (sin acentos, tolera erratas), ordenada por parecido.")
+    buscar.add_argument('--limite', type=int)
+    buscar.add_argument('--formato', choices=['tabla', 'json', 'jsonl', 'csv'], default='tabla')
+    buscar.set_defaults(funcion=comando_buscar)
+
+    anadir = subparsers.add_parser('anadir', help="Añade una moneda a partir de un objeto JSON ('-' para leerlo de stdin).")
+    anadir.add_argument('moneda')
+    anadir.set_defaults(funcion=comando_anadir)
+
+    actualizar = subparsers.add_parser('actualizar', help="Actualiza campos de una moneda.")
+    actualizar.add_argument('codigo')
+    actualizar.add_argument('datos', help="Objeto JSON con los campos a cambiar ('-' para leerlo de stdin).")
+    actualizar.set_defaults(funcion=comando_actualizar)
+
+    eliminar = subparsers.add_parser('eliminar', help="Elimina una o varias monedas.")
+    eliminar.add_argument('codigos', nargs='+')
+    eliminar.set_defaults(funcion=comando_eliminar)
+
+    estadisticas = subparsers.add_parser('estadisticas', help="Muestra los KPIs y distribuciones en JSON.")
+    estadisticas.set_defaults(funcion=comando_estadisticas)
+
+    exportar = subparsers.add_parser('exportar', help="Exporta la colección completa.")
+    exportar.add_argument('--formato', choices=['json', 'jsonl', 'csv'], default='json')
+    exportar.add_argument('--salida', help="Archivo de salida ('-' o sin indicar: salida estándar).")
+    exportar.set_defaults(funcion=comando_exportar)
+
+    versiones = subparsers.add_parser('versiones', help="Versiones guardadas de la colección.")
+    versiones.add_argument('accion', choices=['listar', 'crear', 'exportar', 'restaurar'])
+    versiones.add_argument('numero', type=int, nargs='?')
+    versiones.add_argument('--descripcion')
+    versiones.set_defaults(funcion=comando_versiones)
+
+    lote = subparsers.add_parser('lote', help="Procesa operaciones JSONL desde stdin en una única transacción.")
+    lote.add_argument('--abortar-si-error', action='store_true',
+                      help="Deshace todo el lote si alguna operación falla.")
+    lote.set_defaults(funcion=comando_lote)
+
+    imagenes = subparsers.add_parser('imagenes', help="Comprueba las imágenes, genera sus miniaturas y busca huérfanas.")
+    imagenes.add_argument('--procesos', type=int, help="Procesos de trabajo (por defecto, uno por núcleo).")
+    imagenes.add_argument('--completo', action='store_true',
+                          help="Vuelve a decodificar todas las imágenes aunque su miniatura esté al día.")
+    imagenes.add_argument('--limpiar-miniaturas', action='store_true',
+                          help="Elimina las miniaturas que ya no corresponden a ninguna imagen.")
+    imagenes.add_argument('--json', help="Guardar el informe completo en este archivo.")
+    imagenes.set_defaults(funcion=comando_imagenes)
+
+    duplicados = subparsers.add_parser('duplicados', help="Busca monedas repetidas (mismo país, año, valor nominal y ceca).")
+    duplicados.add_argument('--umbral', type=float, default=duplicados_monedas.UMBRAL_DUPLICADO,
+                            help="Puntuación mínima (0-1) para considerar dos monedas duplicadas.")
+    duplicados.add_argument('--fusionar', action='store_true',
+                            help="Fusiona cada grupo en su primera moneda sumando las cantidades.")
+    duplicados.add_argument('--si', action='store_true', help="Fusiona sin pedir confirmación.")
+    duplicados.add_argument('--json', action='store_true', help="Muestra los grupos completos en JSON.")
+    duplicados.set_defaults(funcion=comando_duplicados)
+    return parser
+
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+    if args.archivo:
+        coin_data_manager.ARCHIVO_COLECCION = args.archivo
+        coin_data_manager.ARCHIVO_SNAPSHOT = f"{args.archivo}.snapshot"
+    coin_data_manager.cargar_coleccion()
+    try:
+        return args.funcion(args)
+    except (coin_data_manager.ConflictoDeEdicion, TimeoutError, KeyError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
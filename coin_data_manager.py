@@ -1,13 +1,99 @@
+import contextlib
+import datetime
+import heapq
+import itertools
 import json
 import os
+import threading
 import uuid 
 
+import coin_snapshot
+import compresion
+from almacen_versiones import AlmacenVersiones
+from cache_consultas import CacheConsultas
+from indice_facetas import IndiceFacetas, iterar_posiciones, mapa_de_posiciones
+from busqueda_difusa import IndiceTrigramas, UMBRAL_SIMILITUD
+import duplicados_monedas
+import valoracion
+from historial_cambios import HistorialCambios
+from bloqueo_archivo import BloqueoArchivo
+
 # Nombre del archivo de la colección
 ARCHIVO_COLECCION = 'the_coin_vault_collection.json'
 
+# Instantánea binaria (mapeada en memoria) que acompaña al JSON para acelerar el arranque.
+# El JSON sigue siendo la fuente de verdad; la instantánea solo se usa si corresponde
+# exactamente a la versión actual del JSON.
+ARCHIVO_SNAPSHOT = 'the_coin_vault_collection.snapshot'
+USAR_SNAPSHOT_BINARIO = True
+
 # Lista global para almacenar las monedas cargadas en memoria
 mi_coleccion = []
 
+# =========================================================================
+# Control de concurrencia entre instancias que comparten el archivo
+# =========================================================================
+# Segundos que se espera a que otra instancia libere el bloqueo del archivo
+TIEMPO_ESPERA_BLOQUEO = 10.0
+
+# Firma (tamaño, mtime_ns) del archivo JSON tal como estaba al cargarlo o guardarlo
+# por última vez. Si al guardar la firma en disco es distinta, otra instancia lo ha modificado.
+_firma_cargada = None
+
+# Cambios locales aún no guardados, en orden: (tipo, codigo_unico, datos)
+#   ('anadir', codigo, moneda)
+#   ('actualizar', codigo, {campo: (valor_anterior, valor_nuevo)})
+#   ('eliminar', codigo, moneda)
+# Permiten fusionar los cambios propios con los de otra instancia en lugar de sobrescribirlos.
+_cambios_pendientes = []
+
+# Transacciones: mientras haya una abierta, guardar_coleccion() solo anota que hay
+# que guardar y el guardado real se hace una vez al cerrar la transacción.
+_profundidad_transaccion = 0
+_guardado_diferido = False
+
+# Versión de los datos en memoria: aumenta con cada cambio (local o incorporado desde
+# disco). Permite a otros componentes (API, cachés) saber si algo ha cambiado sin comparar datos.
+_version_datos = 0
+
+# Caché de resultados de buscar_monedas, válida para una versión de los datos
+_cache_consultas = CacheConsultas()
+
+# Índice de facetas (se construye al usarlo por primera vez) y último mapa de bits de
+# una búsqueda de texto, como (clave, version, mapa)
+_indice_facetas = None
+_mapa_busqueda_texto = None
+# Índice de trigramas para la búsqueda aproximada (también se construye al usarlo)
+_indice_trigramas = None
+# Totales de valoración de la colección (también se construyen al usarlos)
+_motor_valoracion = None
+# Las estructuras anteriores se construyen perezosamente durante las consultas, que la
+# API atiende desde varios hilos a la vez: su construcción se serializa con este cerrojo
+_cerrojo_derivados = threading.RLock()
+
+# Historial para deshacer/rehacer. Los cambios de una transacción se acumulan en
+# _comando_en_curso y se registran como un único comando al cerrarla.
+_historial = HistorialCambios()
+_comando_en_curso = []
+_registrar_en_historial = True
+
+class ConflictoDeEdicion(Exception):
+    """
+    Otra instancia modificó los mismos campos de las mismas monedas. Los cambios sin
+    conflicto ya se han guardado; en los campos en conflicto se conserva el valor
+    guardado por la otra instancia. 'conflictos' es una lista de
+    (codigo_unico, campo, valor_guardado, valor_descartado).
+    """
+    def __init__(self, conflictos):
+        self.conflictos = conflictos
+        detalle = ", ".join(f"{codigo} ({campo})" for codigo, campo, _, _ in conflictos[:10])
+        if len(conflictos) > 10:
+            detalle += f" y {len(conflictos) - 10} más"
+        super().__init__(
+            f"Otra instancia modificó las mismas monedas al mismo tiempo. "
+            f"Se conservaron sus valores en: {detalle}."
+        )
+
 # =========================================================================
 # Definición de las CLAVES INTERNAS de los campos según el Excel del usuario
 # Estas claves se usarán para almacenar y acceder a los datos de las monedas
@@ -67,6 +153,9 @@ TODOS_LOS_CAMPOS_LLAVES = [
     CAMPO_FOTO_ESCUDO,
 ]
 
+# Campos que guardan rutas de imágenes
+CAMPOS_FOTO = [CAMPO_FOTO_ANVERSO, CAMPO_FOTO_REVERSO, CAMPO_FOTO_BANDERA, CAMPO_FOTO_ESCUDO]
+
 # =========================================================================
 # Funciones para la gestión de la colección (cargar, guardar, añadir, etc.)
 # =========================================================================
@@ -92,8 +181,8 @@ def generar_codigo_unico(pais_emisor, ano_acunacion):
     # Esto asegura que el contador es correcto incluso para nuevas monedas.
     max_secuencial = 0
     # Iterar sobre una copia para evitar problemas si la colección se modifica
-    for moneda in list(mi_coleccion): 
-        current_id = str(moneda.get(CAMPO_CODIGO_UNICO, ""))
+    for current_id in list(_valores_campo(CAMPO_CODIGO_UNICO)): 
+        current_id = str(current_id or "")
         parts = current_id.split('-')
         if len(parts) == 3: # Asegurarse de que el ID tiene el formato esperado
             existing_pais_prefix = parts[0]
@@ -111,19 +200,553 @@ def generar_codigo_unico(pais_emisor, ano_acunacion):
     
     return f"{pais_prefix}-{ano_str}-{secuencial_str}"
 
-def cargar_coleccion():
-    """Carga la colección de monedas desde el archivo JSON."""
+def _firma_archivo(ruta):
+    """Retorna (tamaño, mtime_ns) de un archivo, o None si no existe."""
+    try:
+        estado = os.stat(ruta)
+    except OSError:
+        return None
+    return (estado.st_size, estado.st_mtime_ns)
+
+def _escribir_snapshot():
+    """Actualiza la instantánea binaria para que corresponda al JSON recién escrito o leído."""
+    if not USAR_SNAPSHOT_BINARIO:
+        return
+    try:
+        coin_snapshot.escribir_snapshot(mi_coleccion, ARCHIVO_SNAPSHOT, origen=_firma_archivo(ARCHIVO_COLECCION))
+    except (OSError, ValueError) as e:
+        # La instantánea es solo una caché: si no se puede escribir, se sigue usando el JSON
+        print(f"Advertencia: no se pudo escribir la instantánea binaria: {e}")
+
+def _cargar_desde_snapshot():
+    """Abre la instantánea binaria si es válida para el JSON actual. Retorna None si no lo es."""
+    if not USAR_SNAPSHOT_BINARIO:
+        return None
+    cabecera = coin_snapshot.leer_cabecera_snapshot(ARCHIVO_SNAPSHOT)
+    firma = _firma_archivo(ARCHIVO_COLECCION)
+    if cabecera is None or firma is None or cabecera.get("origen") != list(firma):
+        return None
+    try:
+        return coin_snapshot.ColeccionSnapshot(ARCHIVO_SNAPSHOT)
+    except (OSError, ValueError):
+        return None
+
+def _materializar_coleccion():
+    """
+    Convierte la colección respaldada por la instantánea en una lista normal. El mapeo
+    no se cierra aquí: puede haber generadores (iterar_monedas...) recorriéndolo todavía,
+    y se libera solo cuando desaparece la última referencia.
+    """
     global mi_coleccion
-    if os.path.exists(ARCHIVO_COLECCION):
-        with open(ARCHIVO_COLECCION, 'r', encoding='utf-8') as f:
-            mi_coleccion = json.load(f)
+    if isinstance(mi_coleccion, coin_snapshot.ColeccionSnapshot):
+        mi_coleccion = list(mi_coleccion)
+
+def _valores_campo(campo):
+    """
+    Itera los valores de un campo en toda la colección. Si la colección procede de la
+    instantánea binaria, se leen directamente de la columna sin decodificar las monedas.
+    """
+    if isinstance(mi_coleccion, coin_snapshot.ColeccionSnapshot):
+        return mi_coleccion.valores(campo)
+    return (moneda.get(campo) for moneda in mi_coleccion)
+
+def _ruta_bloqueo():
+    return f"{ARCHIVO_COLECCION}.lock"
+
+def _leer_json_coleccion():
+    """Lee el archivo JSON de la colección. Retorna una lista vacía si no existe."""
+    if not os.path.exists(ARCHIVO_COLECCION):
+        return []
+    # El archivo puede estar comprimido (gzip/zstd); se descomprime por bloques al leerlo
+    with compresion.abrir_lectura(ARCHIVO_COLECCION) as f:
+        return json.load(f)
+
+def _leer_coleccion_en_disco():
+    """Lee la colección actual en disco, preferentemente desde la instantánea binaria."""
+    snapshot = _cargar_desde_snapshot()
+    if snapshot is not None:
+        return snapshot, True
+    return _leer_json_coleccion(), False
+
+def _escribir_json_coleccion():
+    """Escribe el JSON en un archivo temporal y lo reemplaza de forma atómica."""
+    ruta_temporal = f"{ARCHIVO_COLECCION}.tmp"
+    formato = compresion.formato_escritura(ARCHIVO_COLECCION)
+    with compresion.abrir_escritura(ruta_temporal, formato) as f:
+        if formato:
+            # Comprimido no tiene sentido sangrar: se escribe compacto
+            json.dump(mi_coleccion, f, separators=(',', ':'), ensure_ascii=False)
+        else:
+            json.dump(mi_coleccion, f, indent=4, ensure_ascii=False)
+    os.replace(ruta_temporal, ARCHIVO_COLECCION)
+
+def _incrementar_version():
+    global _version_datos
+    _version_datos += 1
+
+def obtener_version_datos():
+    """Retorna la versión actual de los datos en memoria (cambia con cada modificación)."""
+    return _version_datos
+
+def _registrar_cambio(tipo, codigo_unico, datos, posicion=None):
+    """
+    Anota un cambio local para poder fusionarlo si otra instancia guarda antes.
+    'posicion' es la posición de la moneda actualizada, si ya se conoce.
+    """
+    _cambios_pendientes.append((tipo, codigo_unico, datos))
+    _actualizar_indices(tipo, codigo_unico, datos, posicion)
+    if tipo == 'actualizar':
+        _cache_consultas.aplicar_cambio(tipo, None, datos, _version_datos, _version_datos + 1, _coincide)
     else:
-        mi_coleccion = [] 
+        _cache_consultas.aplicar_cambio(tipo, datos, None, _version_datos, _version_datos + 1, _coincide)
+    _incrementar_version()
+    if _registrar_en_historial:
+        _comando_en_curso.append((tipo, codigo_unico, datos))
+        if _profundidad_transaccion == 0:
+            _cerrar_comando()
+
+def _registrar_eliminaciones(posiciones, eliminadas):
+    """
+    Anota la eliminación de varias monedas que ya se han quitado de la colección.
+    'posiciones' son las que ocupaban (en orden creciente): los índices, la valoración
+    y la caché se actualizan una sola vez para todas.
+    """
+    if not eliminadas:
+        return
+    _eliminar_de_indices(posiciones)
+    _cache_consultas.aplicar_eliminaciones(eliminadas, _version_datos, _version_datos + 1, _coincide)
+    for moneda in eliminadas:
+        cambio = ('eliminar', moneda.get(CAMPO_CODIGO_UNICO), moneda)
+        _cambios_pendientes.append(cambio)
+        if _registrar_en_historial:
+            _comando_en_curso.append(cambio)
+    _incrementar_version()
+    if _registrar_en_historial and _profundidad_transaccion == 0:
+        _cerrar_comando()
+
+def _eliminar_posiciones(posiciones):
+    """
+    Quita de la colección las monedas de 'posiciones' (en orden creciente) en una sola
+    pasada y registra su eliminación. Retorna las monedas eliminadas.
+    """
+    global mi_coleccion
+    _materializar_coleccion()
+    eliminadas = [mi_coleccion[posicion] for posicion in posiciones]
+    conservadas = []
+    anterior = 0
+    for posicion in posiciones:
+        conservadas.extend(mi_coleccion[anterior:posicion])
+        anterior = posicion + 1
+    conservadas.extend(mi_coleccion[anterior:])
+    mi_coleccion = conservadas
+    _registrar_eliminaciones(posiciones, eliminadas)
+    return eliminadas
+
+def calcular_diferencias(anterior, nueva):
+    """
+    Compara dos colecciones por código único.
+    Retorna (añadidos, modificados, eliminados) como listas de códigos.
+    """
+    anteriores = {moneda.get(CAMPO_CODIGO_UNICO): moneda for moneda in anterior}
+    anadidos = []
+    modificados = []
+    vistos = set()
+    for moneda in nueva:
+        codigo = moneda.get(CAMPO_CODIGO_UNICO)
+        vistos.add(codigo)
+        previa = anteriores.get(codigo)
+        if previa is None:
+            anadidos.append(codigo)
+        elif previa != moneda:
+            modificados.append(codigo)
+    eliminados = [codigo for codigo in anteriores if codigo not in vistos]
+    return anadidos, modificados, eliminados
+
+def _aplicar_cambios_pendientes():
+    """
+    Aplica los cambios locales pendientes sobre 'mi_coleccion', que en este momento
+    contiene la versión guardada por otra instancia. Retorna la lista de conflictos.
+    """
+    por_codigo = {moneda.get(CAMPO_CODIGO_UNICO): moneda for moneda in mi_coleccion}
+    # Códigos de monedas añadidas localmente que hubo que renombrar por coincidir con otra
+    renombrados = {}
+    conflictos = []
+    for tipo, codigo, datos in _cambios_pendientes:
+        codigo = renombrados.get(codigo, codigo)
+        if tipo == 'anadir':
+            moneda = dict(datos)
+            if codigo in por_codigo:
+                # Otra instancia añadió una moneda con el mismo código: generar uno nuevo
+                nuevo_codigo = generar_codigo_unico(moneda.get(CAMPO_PAIS_EMISOR), moneda.get(CAMPO_ANO_ACUNACION))
+                renombrados[codigo] = nuevo_codigo
+                codigo = nuevo_codigo
+                moneda[CAMPO_CODIGO_UNICO] = codigo
+            mi_coleccion.append(moneda)
+            por_codigo[codigo] = moneda
+        elif tipo == 'actualizar':
+            moneda = por_codigo.get(codigo)
+            if moneda is None:
+                # La otra instancia la eliminó: prevalece la eliminación
+                conflictos.extend((codigo, campo, None, nuevo) for campo, (_, nuevo) in datos.items())
+                continue
+            for campo, (anterior, nuevo) in datos.items():
+                actual = moneda.get(campo)
+                if actual == anterior or actual == nuevo:
+                    moneda[campo] = nuevo
+                else:
+                    conflictos.append((codigo, campo, actual, nuevo))
+        elif tipo == 'eliminar':
+            moneda = por_codigo.pop(codigo, None)
+            if moneda is not None:
+                mi_coleccion.remove(moneda)
+    return conflictos
+
+def cargar_coleccion():
+    """Carga la colección de monedas desde la instantánea binaria o, si no es válida, desde el archivo JSON."""
+    global mi_coleccion, _firma_cargada
+    # La instantánea anterior no se cierra: se libera cuando terminen quienes la recorren
+    # El archivo se reemplaza de forma atómica al guardarlo, así que se puede leer sin bloqueo
+    firma = _firma_archivo(ARCHIVO_COLECCION)
+    mi_coleccion, desde_snapshot = _leer_coleccion_en_disco()
+    if not desde_snapshot and firma is not None:
+        # Generar la instantánea para que el próximo arranque sea inmediato
+        _escribir_snapshot()
+    _firma_cargada = firma
+    _cambios_pendientes.clear()
+    _incrementar_version()
 
 def guardar_coleccion():
-    """Guarda la colección de monedas actual en el archivo JSON."""
-    with open(ARCHIVO_COLECCION, 'w', encoding='utf-8') as f:
-        json.dump(mi_coleccion, f, indent=4, ensure_ascii=False)
+    """
+    Guarda la colección de monedas actual en el archivo JSON.
+    Si otra instancia ha guardado desde la última carga, primero se fusionan sus
+    cambios con los locales; si modificaron los mismos campos se lanza ConflictoDeEdicion
+    después de guardar lo que no está en conflicto.
+    """
+    global mi_coleccion, _firma_cargada, _guardado_diferido
+    if _profundidad_transaccion > 0:
+        _guardado_diferido = True
+        return
+    conflictos = []
+    with BloqueoArchivo(_ruta_bloqueo(), tiempo_espera=TIEMPO_ESPERA_BLOQUEO):
+        _materializar_coleccion()
+        firma_en_disco = _firma_archivo(ARCHIVO_COLECCION)
+        if firma_en_disco is not None and firma_en_disco != _firma_cargada:
+            # Comprobación optimista fallida: partir de la versión en disco y reaplicar los cambios locales
+            mi_coleccion = list(_leer_json_coleccion())
+            conflictos = _aplicar_cambios_pendientes()
+            _incrementar_version()
+            if not _cambios_pendientes:
+                _firma_cargada = firma_en_disco
+                return
+        _escribir_json_coleccion()
+        _escribir_snapshot()
+        _firma_cargada = _firma_archivo(ARCHIVO_COLECCION)
+        _cambios_pendientes.clear()
+    if conflictos:
+        raise ConflictoDeEdicion(conflictos)
+
+def _deshacer_cambios(cambios):
+    """Revierte en memoria una lista de cambios registrados, del más reciente al más antiguo."""
+    global mi_coleccion
+    _materializar_coleccion()
+    for tipo, codigo, datos in reversed(cambios):
+        if tipo == 'anadir':
+            mi_coleccion = [m for m in mi_coleccion if m.get(CAMPO_CODIGO_UNICO) != codigo]
+        elif tipo == 'actualizar':
+            moneda = obtener_moneda_por_id(codigo)
+            if moneda is not None:
+                for campo, (anterior, _) in datos.items():
+                    moneda[campo] = anterior
+        elif tipo == 'eliminar':
+            mi_coleccion.append(datos)
+    _incrementar_version()
+
+@contextlib.contextmanager
+def transaccion(descripcion=None):
+    """
+    Agrupa varias operaciones en un único guardado:
+
+        with coin_data_manager.transaccion():
+            anadir_moneda(...)
+            actualizar_moneda(...)
+
+    Si ocurre una excepción dentro del bloque, los cambios hechos en él se revierten
+    en memoria y no se guarda nada. Las transacciones pueden anidarse. En el historial
+    todos los cambios cuentan como un solo paso de deshacer, con la descripción indicada.
+    """
+    global _profundidad_transaccion, _guardado_diferido
+    inicio_cambios = len(_cambios_pendientes)
+    inicio_comando = len(_comando_en_curso)
+    _profundidad_transaccion += 1
+    try:
+        yield
+    except BaseException:
+        _profundidad_transaccion -= 1
+        _deshacer_cambios(_cambios_pendientes[inicio_cambios:])
+        del _cambios_pendientes[inicio_cambios:]
+        del _comando_en_curso[inicio_comando:]
+        if _profundidad_transaccion == 0:
+            _guardado_diferido = False
+        raise
+    _profundidad_transaccion -= 1
+    if _profundidad_transaccion == 0:
+        _cerrar_comando(descripcion)
+        if _guardado_diferido:
+            _guardado_diferido = False
+            guardar_coleccion()
+
+# =========================================================================
+# Deshacer / rehacer
+# =========================================================================
+def _describir_cambios(cambios):
+    if len(cambios) == 1:
+        tipo, codigo, _ = cambios[0]
+        accion = {'anadir': "Añadir", 'actualizar': "Editar", 'eliminar': "Eliminar"}[tipo]
+        return f"{accion} {codigo}"
+    return f"{len(cambios)} cambios"
+
+def _cerrar_comando(descripcion=None):
+    """Registra en el historial los cambios acumulados como un solo comando."""
+    if _comando_en_curso:
+        _historial.registrar(descripcion or _describir_cambios(_comando_en_curso), list(_comando_en_curso))
+        _comando_en_curso.clear()
+
+def _invertir_cambio(tipo, codigo, datos):
+    if tipo == 'anadir':
+        return 'eliminar', codigo, datos
+    if tipo == 'eliminar':
+        return 'anadir', codigo, datos
+    return 'actualizar', codigo, {campo: (nuevo, anterior) for campo, (anterior, nuevo) in datos.items()}
+
+def _aplicar_cambios(cambios):
+    """
+    Aplica en orden una lista de cambios del historial a la colección en memoria. Los
+    campos que otra instancia haya modificado después (su valor ya no es el esperado)
+    no se tocan. Los códigos se resuelven con un único mapa código -> posición y las
+    eliminaciones se acumulan y se hacen todas juntas en una pasada (antes, si hay que
+    volver a añadir un código pendiente de eliminar).
+    Retorna el número de campos o monedas que no se pudieron aplicar.
+    """
+    posiciones = {codigo: i for i, codigo in enumerate(_valores_campo(CAMPO_CODIGO_UNICO))}
+    por_eliminar = {} # código -> posición
+    omitidos = 0
+    for tipo, codigo, datos in cambios:
+        if tipo == 'anadir':
+            if codigo in por_eliminar:
+                _eliminar_posiciones(sorted(por_eliminar.values()))
+                por_eliminar.clear()
+                posiciones = {codigo: i for i, codigo in enumerate(_valores_campo(CAMPO_CODIGO_UNICO))}
+            if codigo in posiciones:
+                omitidos += 1
+                continue
+            moneda = dict(datos)
+            mi_coleccion.append(moneda)
+            posiciones[codigo] = len(mi_coleccion) - 1
+            _registrar_cambio('anadir', codigo, moneda)
+        elif tipo == 'eliminar':
+            if codigo not in posiciones or codigo in por_eliminar:
+                omitidos += 1
+                continue
+            por_eliminar[codigo] = posiciones[codigo]
+        else:
+            posicion = posiciones.get(codigo)
+            if posicion is None or codigo in por_eliminar:
+                omitidos += len(datos)
+                continue
+            moneda = mi_coleccion[posicion]
+            diferencias = {campo: (anterior, nuevo) for campo, (anterior, nuevo) in datos.items()
+                           if moneda.get(campo) == anterior}
+            for campo, (_, nuevo) in diferencias.items():
+                moneda[campo] = nuevo
+            if diferencias:
+                _registrar_cambio('actualizar', codigo, diferencias, posicion=posicion)
+            omitidos += len(datos) - len(diferencias)
+    if por_eliminar:
+        _eliminar_posiciones(sorted(por_eliminar.values()))
+    return omitidos
+
+def _reproducir(cambios):
+    """Aplica y guarda una lista de cambios sin registrarlos en el historial. Retorna los que se omitieron."""
+    global _registrar_en_historial
+    _registrar_en_historial = False
+    try:
+        omitidos = _aplicar_cambios(cambios)
+    finally:
+        _registrar_en_historial = True
+    # Dentro de una transacción solo marca el guardado pendiente
+    guardar_coleccion()
+    return omitidos
+
+def deshacer():
+    """
+    Deshace el último comando y guarda la colección. Retorna (descripción, omitidos),
+    donde 'omitidos' cuenta los campos que ya había cambiado otra instancia, o None si
+    no hay nada que deshacer.
+    """
+    comando = _historial.comando_a_deshacer()
+    if comando is None:
+        return None
+    with transaccion():
+        omitidos = _reproducir([_invertir_cambio(*cambio) for cambio in reversed(comando.cambios)])
+        # Dentro de la transacción: si el guardado falla, la memoria ya refleja el cambio
+        _historial.marcar_deshecho()
+    return comando.descripcion, omitidos
+
+def rehacer():
+    """Vuelve a aplicar el último comando deshecho. Retorna (descripción, omitidos) o None."""
+    comando = _historial.comando_a_rehacer()
+    if comando is None:
+        return None
+    with transaccion():
+        omitidos = _reproducir(comando.cambios)
+        _historial.marcar_rehecho()
+    return comando.descripcion, omitidos
+
+def ir_a_version(version):
+    """
+    Deshace o rehace comandos hasta llegar a la versión indicada del historial,
+    con un único guardado. Retorna el número de cambios omitidos por conflictos.
+    """
+    version = max(_historial.version_minima, min(version, _historial.version_maxima))
+    omitidos = 0
+    with transaccion():
+        while _historial.version_actual > version:
+            comando = _historial.comando_a_deshacer()
+            omitidos += _reproducir([_invertir_cambio(*cambio) for cambio in reversed(comando.cambios)])
+            _historial.marcar_deshecho()
+        while _historial.version_actual < version:
+            comando = _historial.comando_a_rehacer()
+            omitidos += _reproducir(comando.cambios)
+            _historial.marcar_rehecho()
+    return omitidos
+
+# =========================================================================
+# Versiones guardadas de la colección (historial persistente)
+# =========================================================================
+# Un almacén por directorio, para que conserve entre llamadas la base que tiene en caché
+_almacenes_versiones = {}
+
+def _almacen_versiones():
+    """Las versiones se guardan junto al archivo de la colección, en '<nombre>_versiones'."""
+    directorio = f"{os.path.splitext(ARCHIVO_COLECCION)[0]}_versiones"
+    almacen = _almacenes_versiones.get(directorio)
+    if almacen is None:
+        almacen = _almacenes_versiones.setdefault(directorio, AlmacenVersiones(directorio, CAMPO_CODIGO_UNICO))
+    return almacen
+
+def crear_version_coleccion(descripcion=""):
+    """Guarda el estado actual como una versión (delta comprimido). Retorna su entrada del índice."""
+    return _almacen_versiones().guardar_version(mi_coleccion, descripcion)
+
+def crear_version_diaria():
+    """
+    Crea una versión de la colección guardada en disco si la última no es de hoy y el
+    archivo ha cambiado desde entonces (se compara su firma, sin calcular el delta).
+    Lee el archivo en lugar de usar la colección en memoria, así que se puede llamar
+    desde otro hilo. Retorna la entrada creada o None.
+    """
+    almacen = _almacen_versiones()
+    ultima = almacen.ultima_version()
+    hoy = datetime.date.today().isoformat()
+    if ultima is not None and ultima["fecha"].startswith(hoy):
+        return None
+    firma = _firma_archivo(ARCHIVO_COLECCION)
+    if firma is None or (ultima is not None and ultima.get("firma") == list(firma)):
+        return None
+    coleccion, desde_snapshot = _leer_coleccion_en_disco()
+    try:
+        entrada = almacen.guardar_version(coleccion, "Versión diaria", firma=list(firma))
+    finally:
+        if desde_snapshot:
+            # Esta instantánea es solo de este hilo: nadie más la recorre
+            coleccion.cerrar()
+    return entrada if ultima is None or entrada["version"] != ultima["version"] else None
+
+def listar_versiones_coleccion():
+    return _almacen_versiones().listar_versiones()
+
+def obtener_version_coleccion(numero):
+    """Retorna la colección tal como estaba en una versión guardada (sin modificar la actual)."""
+    return _almacen_versiones().obtener_version(numero)
+
+def restaurar_version_coleccion(numero):
+    """
+    Lleva la colección al estado de una versión guardada aplicando solo las diferencias,
+    en una transacción: se guarda una vez y se puede deshacer como un único paso.
+    Retorna (añadidas, modificadas, eliminadas) como números de monedas.
+    """
+    objetivo = obtener_version_coleccion(numero)
+    actuales = {moneda.get(CAMPO_CODIGO_UNICO): moneda for moneda in mi_coleccion}
+    codigos_objetivo = set()
+    cambios = []
+    anadidas = modificadas = eliminadas = 0
+    for moneda in objetivo:
+        codigo = moneda.get(CAMPO_CODIGO_UNICO)
+        codigos_objetivo.add(codigo)
+        actual = actuales.get(codigo)
+        if actual is None:
+            cambios.append(('anadir', codigo, moneda))
+            anadidas += 1
+            continue
+        campos = set(actual) | set(moneda)
+        diferencias = {campo: (actual.get(campo), moneda.get(campo))
+                       for campo in campos if actual.get(campo) != moneda.get(campo)}
+        if diferencias:
+            cambios.append(('actualizar', codigo, diferencias))
+            modificadas += 1
+    for codigo, actual in actuales.items():
+        if codigo not in codigos_objetivo:
+            cambios.append(('eliminar', codigo, actual))
+            eliminadas += 1
+    with transaccion(f"Restaurar versión {numero}"):
+        # Como al deshacer: un único mapa de posiciones y las eliminaciones en una pasada
+        _aplicar_cambios(cambios)
+        guardar_coleccion()
+    return anadidas, modificadas, eliminadas
+
+def puede_deshacer():
+    return _historial.comando_a_deshacer() is not None
+
+def puede_rehacer():
+    return _historial.comando_a_rehacer() is not None
+
+def obtener_historial():
+    """Retorna (version_actual, [(version, descripcion, marca_tiempo, aplicado)])."""
+    return _historial.version_actual, _historial.listar()
+
+def resincronizar():
+    """
+    Incorpora los cambios que otras instancias hayan guardado en disco.
+    Las monedas que no han cambiado conservan el mismo objeto en memoria.
+    Retorna (añadidos, modificados, eliminados) como listas de códigos, vacías si no hubo cambios.
+    """
+    global mi_coleccion, _firma_cargada
+    firma = _firma_archivo(ARCHIVO_COLECCION)
+    if firma == _firma_cargada:
+        return [], [], []
+    if _cambios_pendientes:
+        # Hay cambios locales sin guardar: guardar_coleccion ya hace la fusión
+        anterior = list(mi_coleccion)
+        guardar_coleccion()
+        return calcular_diferencias(anterior, mi_coleccion)
+
+    _materializar_coleccion()
+    anterior = mi_coleccion
+    nueva, desde_snapshot = _leer_coleccion_en_disco()
+    anadidos, modificados, eliminados = calcular_diferencias(anterior, nueva)
+    cambiados = set(anadidos) | set(modificados)
+    anteriores = {moneda.get(CAMPO_CODIGO_UNICO): moneda for moneda in anterior}
+    # Solo se sustituyen las monedas que han cambiado; el resto mantiene su identidad
+    mi_coleccion = [
+        dict(moneda) if moneda.get(CAMPO_CODIGO_UNICO) in cambiados else anteriores[moneda.get(CAMPO_CODIGO_UNICO)]
+        for moneda in nueva
+    ]
+    if desde_snapshot:
+        nueva.cerrar()
+    _firma_cargada = firma
+    if anadidos or modificados or eliminados:
+        _incrementar_version()
+    return anadidos, modificados, eliminados
 
 def anadir_moneda(moneda):
     """Añade una nueva moneda a la colección."""
@@ -141,38 +764,293 @@ def anadir_moneda(moneda):
     # Crear una nueva moneda con todas las llaves definidas, asegurando que existan
     nueva_moneda = {key: moneda.get(key) for key in TODOS_LOS_CAMPOS_LLAVES}
     mi_coleccion.append(nueva_moneda)
+    _registrar_cambio('anadir', nueva_moneda[CAMPO_CODIGO_UNICO], nueva_moneda)
     guardar_coleccion()
 
 def obtener_moneda_por_id(codigo_unico):
     """Busca y retorna una moneda por su código único."""
-    for moneda in mi_coleccion:
-        if moneda.get(CAMPO_CODIGO_UNICO) == codigo_unico:
-            return moneda
+    # Se recorre solo la columna del código para no decodificar monedas innecesariamente
+    for i, codigo in enumerate(_valores_campo(CAMPO_CODIGO_UNICO)):
+        if codigo == codigo_unico:
+            return mi_coleccion[i]
     return None
 
+def obtener_moneda_en_posicion(posicion):
+    """
+    Retorna la moneda en la posición indicada, en el orden de la colección. Si la
+    colección procede de la instantánea binaria, solo se decodifica esa moneda.
+    """
+    return mi_coleccion[posicion]
+
+def obtener_monedas_por_imagen(rutas):
+    """
+    Retorna {ruta: [(codigo_unico, campo), ...]} con las monedas que usan cada una de
+    las rutas de imagen indicadas en algún campo de foto. Solo recorre las columnas necesarias.
+    """
+    buscadas = {os.path.normpath(ruta): ruta for ruta in rutas}
+    resultado = {}
+    codigos = list(_valores_campo(CAMPO_CODIGO_UNICO))
+    for campo in CAMPOS_FOTO:
+        for codigo, ruta in zip(codigos, _valores_campo(campo)):
+            if ruta and os.path.normpath(ruta) in buscadas:
+                resultado.setdefault(buscadas[os.path.normpath(ruta)], []).append((codigo, campo))
+    return resultado
+
+def _normalizar_criterios(criterios):
+    """Descarta los criterios vacíos y pasa los valores a minúsculas una sola vez."""
+    return [(key, str(value).lower()) for key, value in (criterios or {}).items() if value is not None and value != ""]
+
+def _coincide(moneda, criterios_normalizados):
+    for key, value_str in criterios_normalizados:
+        moneda_value = moneda.get(key)
+        moneda_value_str = str(moneda_value).lower() if moneda_value is not None else ""
+        if value_str not in moneda_value_str:
+            return False
+    return True
+
+def iterar_monedas(criterios=None, desplazamiento=0, limite=None):
+    """
+    Generador con las monedas que cumplen los criterios, en el orden de la colección.
+    Permite mostrar o enviar los primeros resultados sin recorrer toda la colección:
+    se detiene en cuanto ha producido 'limite' monedas (tras saltar 'desplazamiento').
+    """
+    criterios_normalizados = _normalizar_criterios(criterios)
+    if limite is not None and limite <= 0:
+        return
+    if criterios_normalizados:
+        cacheados = _cache_consultas.obtener(CacheConsultas.crear_clave(criterios_normalizados), _version_datos)
+        if cacheados is not None:
+            fin = None if limite is None else desplazamiento + limite
+            yield from itertools.islice(cacheados, desplazamiento, fin)
+            return
+    saltadas = 0
+    producidas = 0
+    for moneda in mi_coleccion:
+        if criterios_normalizados and not _coincide(moneda, criterios_normalizados):
+            continue
+        if saltadas < desplazamiento:
+            saltadas += 1
+            continue
+        yield moneda
+        producidas += 1
+        if limite is not None and producidas >= limite:
+            return
+
+def buscar_monedas_pagina(criterios=None, limite=100, despues_de=None):
+    """
+    Paginación por clave (keyset) ordenada por código único: retorna (monedas, siguiente),
+    donde 'siguiente' es el código a pasar como 'despues_de' para pedir la página
+    siguiente, o None si no hay más. A diferencia del desplazamiento, las páginas no se
+    descuadran si se añaden o eliminan monedas entre una petición y otra.
+    Con 'limite' 0 o negativo retorna una página vacía que sigue en el mismo punto.
+    """
+    if limite <= 0:
+        return [], despues_de
+    criterios_normalizados = _normalizar_criterios(criterios)
+    candidatas = (
+        moneda for moneda in mi_coleccion
+        if (despues_de is None or (moneda.get(CAMPO_CODIGO_UNICO) or "") > despues_de)
+        and (not criterios_normalizados or _coincide(moneda, criterios_normalizados))
+    )
+    # Se pide una moneda más de las necesarias para saber si hay otra página
+    pagina = heapq.nsmallest(limite + 1, candidatas, key=lambda moneda: moneda.get(CAMPO_CODIGO_UNICO) or "")
+    if len(pagina) > limite:
+        pagina = pagina[:limite]
+        return pagina, pagina[-1].get(CAMPO_CODIGO_UNICO) or ""
+    return pagina, None
+
 def buscar_monedas(criterios):
     """
     Busca monedas en la colección basándose en los criterios proporcionados.
     Los criterios deben usar las claves internas (ej. 'pais_emisor').
+    Los resultados se guardan en una caché LRU ligada a la versión de los datos.
     """
-    resultados = []
-    for moneda in mi_coleccion:
-        coincide = True
-        for key, value in criterios.items():
-            moneda_value = moneda.get(key)
-            if value is None or value == "": 
-                continue
+    criterios_normalizados = _normalizar_criterios(criterios)
+    if not criterios_normalizados:
+        return list(mi_coleccion)
+    clave = CacheConsultas.crear_clave(criterios_normalizados)
+    resultados = _cache_consultas.obtener(clave, _version_datos)
+    if resultados is None:
+        resultados = [moneda for moneda in mi_coleccion if _coincide(moneda, criterios_normalizados)]
+        _cache_consultas.guardar(clave, _version_datos, resultados)
+    # Se retorna una copia para que quien llama pueda modificar la lista sin alterar la caché
+    return list(resultados)
 
-            moneda_value_str = str(moneda_value).lower() if moneda_value is not None else ""
-            value_str = str(value).lower() if value is not None else ""
+# =========================================================================
+# Búsqueda por facetas
+# =========================================================================
+# Los valores se agrupan como en obtener_distribucion_*: se usa el valor tal cual y
+# se omiten los vacíos, salvo 'desmonetizada', que siempre cuenta como "Sí" o "No".
 
-            if value_str not in moneda_value_str:
-                coincide = False
-                break
-            
-        if coincide:
-            resultados.append(moneda)
-    return resultados
+def _valor_faceta(valor):
+    return valor if valor else None
+
+def _valor_faceta_desmonetizada(valor):
+    return "Sí" if valor else "No"
+
+def _valor_faceta_decada(valor):
+    if isinstance(valor, str) and valor.strip().isdigit():
+        valor = int(valor)
+    if isinstance(valor, int) and not isinstance(valor, bool):
+        return f"{valor // 10 * 10}s"
+    return None
+
+# nombre de la faceta -> (campo, función que obtiene el valor de la faceta)
+FACETAS_BUSQUEDA = {
+    'pais': (CAMPO_PAIS_EMISOR, _valor_faceta),
+    'ceca': (CAMPO_CECA, _valor_faceta),
+    'estado': (CAMPO_ESTADO, _valor_faceta),
+    'tipo': (CAMPO_TIPO, _valor_faceta),
+    'composicion': (CAMPO_COMPOSICION, _valor_faceta),
+    'desmonetizada': (CAMPO_DESMONETIZADA, _valor_faceta_desmonetizada),
+    'decada': (CAMPO_ANO_ACUNACION, _valor_faceta_decada),
+}
+
+def _obtener_indice_facetas():
+    """Retorna el índice de facetas, reconstruyéndolo si los datos han cambiado en bloque."""
+    global _indice_facetas
+    with _cerrojo_derivados:
+        if _indice_facetas is None or _indice_facetas.version != _version_datos:
+            _indice_facetas = IndiceFacetas(FACETAS_BUSQUEDA)
+            _indice_facetas.construir(len(mi_coleccion), _valores_campo)
+            _indice_facetas.version = _version_datos
+        return _indice_facetas
+
+def _posicion_de_codigo(codigo_unico):
+    return next((i for i, codigo in enumerate(_valores_campo(CAMPO_CODIGO_UNICO)) if codigo == codigo_unico), None)
+
+def _trasladar_cambio(indice, campos, tipo, codigo_unico, datos, posicion=None):
+    """
+    Aplica un cambio individual a un índice (de facetas o de trigramas) que esté al día.
+    Retorna False si no se puede aplicar y el índice debe reconstruirse.
+    """
+    if tipo == 'anadir':
+        if indice.n != len(mi_coleccion) - 1:
+            return False
+        indice.anadir(datos)
+    elif tipo == 'actualizar':
+        if any(campo in datos for campo in campos):
+            if posicion is None:
+                posicion = _posicion_de_codigo(codigo_unico)
+            if posicion is None:
+                return False
+            indice.actualizar(posicion, datos)
+    else:
+        # Las eliminaciones se trasladan en bloque (ver _eliminar_de_indices)
+        return False
+    indice.version = _version_datos + 1
+    return True
+
+def _eliminar_de_indices(posiciones):
+    """
+    Quita de los índices y de la valoración que estén al día las monedas de 'posiciones'
+    (numeradas como antes de eliminarlas); las siguientes se renumeran. Se llama con la
+    colección ya compactada y antes de aumentar la versión.
+    """
+    for indice in (_indice_facetas, _indice_trigramas, _motor_valoracion):
+        if indice is not None and indice.version == _version_datos and indice.n == len(mi_coleccion) + len(posiciones):
+            indice.eliminar(posiciones)
+            indice.version = _version_datos + 1
+
+def _actualizar_indices(tipo, codigo_unico, datos, posicion=None):
+    """Traslada un cambio individual a los índices y a la valoración. Se llama antes de aumentar la versión."""
+    global _indice_facetas, _indice_trigramas, _motor_valoracion
+    if _indice_facetas is not None and _indice_facetas.version == _version_datos:
+        campos = [campo for campo, _ in FACETAS_BUSQUEDA.values()]
+        if not _trasladar_cambio(_indice_facetas, campos, tipo, codigo_unico, datos, posicion):
+            _indice_facetas = None
+    if _indice_trigramas is not None and _indice_trigramas.version == _version_datos:
+        if not _trasladar_cambio(_indice_trigramas, _indice_trigramas.campos, tipo, codigo_unico, datos, posicion):
+            _indice_trigramas = None
+    if _motor_valoracion is not None and _motor_valoracion.version == _version_datos:
+        if not _trasladar_cambio(_motor_valoracion, _motor_valoracion.campos, tipo, codigo_unico, datos, posicion):
+            _motor_valoracion = None
+
+def _mapa_criterios(criterios, texto_difuso=None):
+    """
+    Mapa de bits de las monedas que cumplen los criterios de texto o, si se indica
+    'texto_difuso', que coinciden con él en la búsqueda aproximada. None si no hay ninguno.
+    """
+    global _mapa_busqueda_texto
+    with _cerrojo_derivados:
+        if texto_difuso:
+            clave = ('~', texto_difuso)
+            if _mapa_busqueda_texto is not None and _mapa_busqueda_texto[:2] == (clave, _version_datos):
+                return _mapa_busqueda_texto[2]
+            posiciones = _obtener_indice_trigramas().buscar(texto_difuso)
+            mapa = mapa_de_posiciones(posiciones, len(mi_coleccion))
+            _mapa_busqueda_texto = (clave, _version_datos, mapa)
+            return mapa
+        criterios_normalizados = _normalizar_criterios(criterios)
+        if not criterios_normalizados:
+            return None
+        clave = CacheConsultas.crear_clave(criterios_normalizados)
+        if _mapa_busqueda_texto is not None and _mapa_busqueda_texto[:2] == (clave, _version_datos):
+            return _mapa_busqueda_texto[2]
+        posiciones = (i for i, moneda in enumerate(mi_coleccion) if _coincide(moneda, criterios_normalizados))
+        mapa = mapa_de_posiciones(posiciones, len(mi_coleccion))
+        _mapa_busqueda_texto = (clave, _version_datos, mapa)
+        return mapa
+
+def obtener_conteos_facetas(criterios=None, filtros=None, texto_difuso=None):
+    """
+    Retorna (total, conteos) del conjunto de resultados de una búsqueda de texto
+    ('criterios', como en buscar_monedas, o 'texto_difuso' para la búsqueda
+    aproximada) combinada con filtros de facetas {faceta: [valores]}.
+    'conteos' es {faceta: {valor: número de monedas}}.
+    """
+    indice = _obtener_indice_facetas()
+    base = _mapa_criterios(criterios, texto_difuso)
+    if base is None:
+        base = indice.todos()
+    total = (base & indice.mapa_filtros(filtros)).bit_count()
+    return total, indice.contar(base, filtros)
+
+def iterar_monedas_facetadas(criterios=None, filtros=None, limite=None):
+    """Generador con las monedas que cumplen los criterios de texto y los filtros de facetas."""
+    indice = _obtener_indice_facetas()
+    mapa = indice.mapa_filtros(filtros)
+    base = _mapa_criterios(criterios)
+    if base is not None:
+        mapa &= base
+    coleccion = mi_coleccion
+    return (coleccion[posicion] for posicion in itertools.islice(iterar_posiciones(mapa), limite))
+
+# =========================================================================
+# Búsqueda aproximada (tolerante a erratas y acentos)
+# =========================================================================
+CAMPOS_BUSQUEDA_DIFUSA = [
+    CAMPO_PAIS_EMISOR, CAMPO_CECA, CAMPO_TIPO, CAMPO_UNIDAD_MONETARIA, CAMPO_COMPOSICION, CAMPO_ESTADO,
+]
+
+def _obtener_indice_trigramas():
+    """Retorna el índice de trigramas, reconstruyéndolo si los datos han cambiado en bloque."""
+    global _indice_trigramas
+    with _cerrojo_derivados:
+        if _indice_trigramas is None or _indice_trigramas.version != _version_datos:
+            _indice_trigramas = IndiceTrigramas(CAMPOS_BUSQUEDA_DIFUSA)
+            _indice_trigramas.construir(len(mi_coleccion), _valores_campo)
+            _indice_trigramas.version = _version_datos
+        return _indice_trigramas
+
+def buscar_monedas_difusa(texto, umbral=UMBRAL_SIMILITUD, campos=None, filtros=None):
+    """
+    Busca el texto de forma aproximada (sin distinguir acentos y tolerando erratas) en
+    los campos de CAMPOS_BUSQUEDA_DIFUSA. Retorna una lista de (moneda, puntuación)
+    ordenada de mayor a menor parecido; a igual puntuación, en el orden de la colección.
+    'filtros' son filtros de facetas como en iterar_monedas_facetadas.
+    """
+    puntuaciones = _obtener_indice_trigramas().buscar(texto, umbral, campos)
+    if filtros:
+        mapa = _obtener_indice_facetas().mapa_filtros(filtros)
+        bits = mapa.to_bytes((len(mi_coleccion) + 7) // 8, 'little')
+        puntuaciones = {p: v for p, v in puntuaciones.items() if bits[p >> 3] & (1 << (p & 7))}
+    ordenadas = sorted(puntuaciones.items(), key=lambda item: (-item[1], item[0]))
+    return [(mi_coleccion[posicion], puntuacion) for posicion, puntuacion in ordenadas]
+
+def obtener_metricas_cache_consultas():
+    """Retorna las métricas de la caché de búsquedas (aciertos, fallos, invalidaciones...)."""
+    return _cache_consultas.obtener_metricas()
 
 
 def actualizar_moneda(codigo_unico, nuevos_datos):
@@ -180,23 +1058,191 @@ def actualizar_moneda(codigo_unico, nuevos_datos):
     Actualiza los datos de una moneda existente por su código único.
     nuevos_datos debe ser un diccionario con las claves internas actualizadas.
     """
-    for i, moneda in enumerate(mi_coleccion):
-        if moneda.get(CAMPO_CODIGO_UNICO) == codigo_unico:
+    for i, codigo in enumerate(_valores_campo(CAMPO_CODIGO_UNICO)):
+        if codigo == codigo_unico:
+            moneda = mi_coleccion[i]
+            diferencias = {key: (moneda.get(key), value) for key, value in nuevos_datos.items() if moneda.get(key) != value}
             for key, value in nuevos_datos.items():
-                mi_coleccion[i][key] = value
+                moneda[key] = value
+            if diferencias:
+                _registrar_cambio('actualizar', codigo_unico, diferencias, posicion=i)
             guardar_coleccion()
             return True
     return False
 
 def eliminar_moneda(codigo_unico):
     """Elimina una moneda de la colección por su código único."""
-    global mi_coleccion
-    initial_len = len(mi_coleccion)
-    mi_coleccion = [moneda for moneda in mi_coleccion if moneda.get(CAMPO_CODIGO_UNICO) != codigo_unico]
-    if len(mi_coleccion) < initial_len:
+    posiciones = [i for i, codigo in enumerate(_valores_campo(CAMPO_CODIGO_UNICO)) if codigo == codigo_unico]
+    if not posiciones:
+        return False
+    _eliminar_posiciones(posiciones)
+    guardar_coleccion()
+    return True
+
+# =========================================================================
+# Operaciones por lotes
+# =========================================================================
+# Aplican el mismo cambio a varias monedas recorriendo la columna del código una
+# sola vez, en una transacción: se guarda una vez y cuentan como un único paso de
+# deshacer. Si algo falla, no se aplica ningún cambio del lote.
+
+def actualizar_monedas(codigos_unicos, nuevos_datos):
+    """
+    Asigna 'nuevos_datos' ({campo: valor}) a todas las monedas de 'codigos_unicos'.
+    Retorna el número de monedas encontradas.
+    """
+    codigos = set(codigos_unicos)
+    posiciones = [i for i, codigo in enumerate(_valores_campo(CAMPO_CODIGO_UNICO)) if codigo in codigos]
+    if not posiciones:
+        return 0
+    with transaccion(f"Editar {len(posiciones)} monedas"):
+        for i in posiciones:
+            moneda = mi_coleccion[i]
+            diferencias = {key: (moneda.get(key), value) for key, value in nuevos_datos.items() if moneda.get(key) != value}
+            for key, value in nuevos_datos.items():
+                moneda[key] = value
+            if diferencias:
+                _registrar_cambio('actualizar', moneda.get(CAMPO_CODIGO_UNICO), diferencias, posicion=i)
         guardar_coleccion()
-        return True
-    return False
+    return len(posiciones)
+
+def _posiciones_de_codigos(codigos_unicos):
+    """Retorna {codigo_unico: posición} de los códigos indicados que existen, en una pasada por la columna."""
+    codigos = set(codigos_unicos)
+    posiciones = {}
+    for i, codigo in enumerate(_valores_campo(CAMPO_CODIGO_UNICO)):
+        if codigo in codigos:
+            posiciones.setdefault(codigo, i)
+    return posiciones
+
+def actualizar_monedas_por_codigo(actualizaciones):
+    """
+    Aplica a cada moneda sus propios datos: 'actualizaciones' es una lista de
+    (codigo_unico, nuevos_datos). Retorna una lista con True o False (si se encontró
+    la moneda) para cada actualización, en el mismo orden.
+    """
+    posiciones = _posiciones_de_codigos(codigo for codigo, _ in actualizaciones)
+    if not posiciones:
+        return [False] * len(actualizaciones)
+    encontradas = []
+    with transaccion(f"Editar {len(posiciones)} monedas"):
+        for codigo_unico, nuevos_datos in actualizaciones:
+            posicion = posiciones.get(codigo_unico)
+            encontradas.append(posicion is not None)
+            if posicion is None:
+                continue
+            moneda = mi_coleccion[posicion]
+            diferencias = {key: (moneda.get(key), value) for key, value in nuevos_datos.items() if moneda.get(key) != value}
+            for key, value in nuevos_datos.items():
+                moneda[key] = value
+            if diferencias:
+                _registrar_cambio('actualizar', codigo_unico, diferencias, posicion=posicion)
+        guardar_coleccion()
+    return encontradas
+
+def eliminar_monedas_por_codigo(codigos_unicos):
+    """
+    Como eliminar_monedas, pero retorna una lista con True o False (si la moneda existía)
+    para cada código, en el mismo orden; un código repetido solo cuenta la primera vez.
+    """
+    posiciones = _posiciones_de_codigos(codigos_unicos)
+    encontradas = []
+    vistos = set()
+    for codigo in codigos_unicos:
+        encontradas.append(codigo in posiciones and codigo not in vistos)
+        vistos.add(codigo)
+    if posiciones:
+        with transaccion(f"Eliminar {len(posiciones)} monedas"):
+            _eliminar_posiciones(sorted(posiciones.values()))
+            guardar_coleccion()
+    return encontradas
+
+def eliminar_monedas(codigos_unicos):
+    """Elimina todas las monedas de 'codigos_unicos'. Retorna el número de monedas eliminadas."""
+    codigos = set(codigos_unicos)
+    posiciones = [i for i, codigo in enumerate(_valores_campo(CAMPO_CODIGO_UNICO)) if codigo in codigos]
+    if not posiciones:
+        return 0
+    with transaccion(f"Eliminar {len(posiciones)} monedas"):
+        _eliminar_posiciones(posiciones)
+        guardar_coleccion()
+    return len(posiciones)
+
+# =========================================================================
+# Monedas duplicadas
+# =========================================================================
+# Se agrupan por país, año, valor nominal y ceca (ver duplicados_monedas) y se
+# puntúan con el resto de campos descriptivos; el estado de conservación pesa más
+# porque dos ejemplares en distinto estado suelen registrarse a propósito por separado.
+
+CAMPOS_BLOQUE_DUPLICADOS = [CAMPO_PAIS_EMISOR, CAMPO_ANO_ACUNACION, CAMPO_VALOR_NOMINAL, CAMPO_CECA]
+# Muchas monedas no llevan marca de ceca, así que solo esta puede estar vacía
+CAMPOS_OBLIGATORIOS_DUPLICADOS = [CAMPO_PAIS_EMISOR, CAMPO_ANO_ACUNACION, CAMPO_VALOR_NOMINAL]
+PESOS_DUPLICADOS = {
+    CAMPO_UNIDAD_MONETARIA: 2.0,
+    CAMPO_TIPO: 1.0,
+    CAMPO_COMPOSICION: 1.0,
+    CAMPO_PESO: 1.0,
+    CAMPO_DIAMETRO: 1.0,
+    CAMPO_GROSOR: 0.5,
+    CAMPO_CANTO: 0.5,
+    CAMPO_ORIENTACION: 0.5,
+    CAMPO_DESMONETIZADA: 0.5,
+    CAMPO_ESTADO: 3.0,
+}
+
+def _cantidad_moneda(moneda):
+    """Cantidad de ejemplares de una moneda (1 si no es un número, como en obtener_conteo_monedas_total)."""
+    try:
+        return int(moneda.get(CAMPO_CANTIDAD))
+    except (ValueError, TypeError):
+        return 1
+
+def buscar_monedas_duplicadas(umbral=duplicados_monedas.UMBRAL_DUPLICADO):
+    """
+    Retorna los grupos de posibles monedas duplicadas como una lista de
+    {"monedas": [monedas], "puntuacion": float}, de mayor a menor puntuación.
+    """
+    grupos = duplicados_monedas.buscar_duplicados(len(mi_coleccion), _valores_campo, obtener_moneda_en_posicion,
+                                                  CAMPOS_BLOQUE_DUPLICADOS, PESOS_DUPLICADOS, umbral,
+                                                  CAMPOS_OBLIGATORIOS_DUPLICADOS)
+    return [{"monedas": [mi_coleccion[posicion] for posicion in grupo["posiciones"]],
+             "puntuacion": grupo["puntuacion"]} for grupo in grupos]
+
+def fusionar_monedas(codigo_conservar, codigos_duplicados):
+    """
+    Fusiona en la moneda 'codigo_conservar' las de 'codigos_duplicados': suma sus
+    cantidades, completa los campos vacíos con los de las duplicadas y elimina estas.
+    Todo en una transacción (un guardado y un único paso de deshacer).
+    Retorna el número de monedas fusionadas, o 0 si la moneda a conservar no existe.
+    """
+    duplicados = set(codigos_duplicados) - {codigo_conservar}
+    posicion = None
+    posiciones = []
+    for i, codigo in enumerate(_valores_campo(CAMPO_CODIGO_UNICO)):
+        if codigo == codigo_conservar:
+            posicion = i
+        elif codigo in duplicados:
+            posiciones.append(i)
+    if posicion is None or not posiciones:
+        return 0
+    moneda = mi_coleccion[posicion]
+    eliminadas = [mi_coleccion[i] for i in posiciones]
+    nuevos_datos = {CAMPO_CANTIDAD: _cantidad_moneda(moneda) + sum(_cantidad_moneda(m) for m in eliminadas)}
+    for campo in TODOS_LOS_CAMPOS_LLAVES:
+        if campo != CAMPO_CODIGO_UNICO and moneda.get(campo) in (None, ''):
+            valor = next((m.get(campo) for m in eliminadas if m.get(campo) not in (None, '')), None)
+            if valor is not None:
+                nuevos_datos[campo] = valor
+    with transaccion(f"Fusionar {len(eliminadas) + 1} monedas en {codigo_conservar}"):
+        diferencias = {key: (moneda.get(key), value) for key, value in nuevos_datos.items() if moneda.get(key) != value}
+        for key, value in nuevos_datos.items():
+            moneda[key] = value
+        if diferencias:
+            _registrar_cambio('actualizar', codigo_conservar, diferencias, posicion=posicion)
+        _eliminar_posiciones(posiciones)
+        guardar_coleccion()
+    return len(eliminadas)
 
 # =========================================================================
 # Funciones para el cálculo de estadísticas
@@ -209,8 +1255,7 @@ def obtener_conteo_monedas_unicas():
 def obtener_conteo_monedas_total():
     """Retorna el total de monedas considerando la cantidad de cada una."""
     total = 0
-    for moneda in mi_coleccion:
-        cantidad = moneda.get(CAMPO_CANTIDAD, 1) 
+    for cantidad in _valores_campo(CAMPO_CANTIDAD):
         try:
             total += int(cantidad)
         except (ValueError, TypeError):
@@ -220,16 +1265,15 @@ def obtener_conteo_monedas_total():
 def obtener_conteo_paises_unicos():
     """Retorna el número de países emisores únicos en la colección."""
     paises = set()
-    for moneda in mi_coleccion:
-        if moneda.get(CAMPO_PAIS_EMISOR): 
-            paises.add(moneda[CAMPO_PAIS_EMISOR].lower())
+    for pais in _valores_campo(CAMPO_PAIS_EMISOR):
+        if pais: 
+            paises.add(pais.lower())
     return len(paises)
 
 def obtener_distribucion_por_pais():
     """Retorna un diccionario con la distribución de monedas por país emisor."""
     distribucion = {}
-    for moneda in mi_coleccion:
-        pais = moneda.get(CAMPO_PAIS_EMISOR) 
+    for pais in _valores_campo(CAMPO_PAIS_EMISOR):
         if pais:
             distribucion[pais] = distribucion.get(pais, 0) + 1
     return distribucion
@@ -237,8 +1281,7 @@ def obtener_distribucion_por_pais():
 def obtener_distribucion_por_ceca():
     """Retorna un diccionario con la distribución de monedas por ceca."""
     distribucion = {}
-    for moneda in mi_coleccion:
-        ceca = moneda.get(CAMPO_CECA) 
+    for ceca in _valores_campo(CAMPO_CECA):
         if ceca:
             distribucion[ceca] = distribucion.get(ceca, 0) + 1
     return distribucion
@@ -246,8 +1289,7 @@ def obtener_distribucion_por_ceca():
 def obtener_distribucion_por_estado_conservacion():
     """Retorna un diccionario con la distribución de monedas por estado de conservación."""
     distribucion = {}
-    for moneda in mi_coleccion:
-        estado = moneda.get(CAMPO_ESTADO) 
+    for estado in _valores_campo(CAMPO_ESTADO):
         if estado:
             distribucion[estado] = distribucion.get(estado, 0) + 1
     return distribucion
@@ -255,8 +1297,7 @@ def obtener_distribucion_por_estado_conservacion():
 def obtener_distribucion_desmonetizacion():
     """Retorna un diccionario con la distribución de monedas por estado de desmonetización."""
     distribucion = {"Sí": 0, "No": 0}
-    for moneda in mi_coleccion:
-        desmonetizada = moneda.get(CAMPO_DESMONETIZADA, False) 
+    for desmonetizada in _valores_campo(CAMPO_DESMONETIZADA):
         if desmonetizada:
             distribucion["Sí"] += 1
         else:
@@ -266,8 +1307,7 @@ def obtener_distribucion_desmonetizacion():
 def obtener_distribucion_por_tipo():
     """Retorna un diccionario con la distribución de monedas por tipo."""
     distribucion = {}
-    for moneda in mi_coleccion:
-        tipo = moneda.get(CAMPO_TIPO) 
+    for tipo in _valores_campo(CAMPO_TIPO):
         if tipo:
             distribucion[tipo] = distribucion.get(tipo, 0) + 1
     return distribucion
@@ -275,8 +1315,46 @@ def obtener_distribucion_por_tipo():
 def obtener_distribucion_por_orientacion():
     """Retorna un diccionario con la distribución de monedas por orientación."""
     distribucion = {}
-    for moneda in mi_coleccion:
-        orientacion = moneda.get(CAMPO_ORIENTACION) 
+    for orientacion in _valores_campo(CAMPO_ORIENTACION):
         if orientacion:
             distribucion[orientacion] = distribucion.get(orientacion, 0) + 1
     return distribucion
+
+# =========================================================================
+# Valoración de la colección
+# =========================================================================
+
+def _obtener_motor_valoracion():
+    """Retorna el motor de valoración, reconstruyéndolo si los datos han cambiado en bloque o los tipos de cambio."""
+    global _motor_valoracion
+    with _cerrojo_derivados:
+        tabla = valoracion.tabla_tipos_cambio()
+        if _motor_valoracion is None or _motor_valoracion.version != _version_datos or _motor_valoracion.tabla is not tabla:
+            _motor_valoracion = valoracion.MotorValoracion(tabla, CAMPO_PAIS_EMISOR, CAMPO_UNIDAD_MONETARIA,
+                                                           CAMPO_VALOR, CAMPO_CANTIDAD)
+            _motor_valoracion.construir(len(mi_coleccion), _valores_campo)
+            _motor_valoracion.version = _version_datos
+        return _motor_valoracion
+
+def obtener_valoracion():
+    """
+    Retorna el valor de la colección (valor × cantidad de cada moneda): total y por país
+    en la moneda base de la tabla de tipos de cambio, y por unidad monetaria.
+    Ver valoracion.MotorValoracion.resumen para el formato.
+    """
+    return _obtener_motor_valoracion().resumen()
+
+def obtener_resumen_estadisticas():
+    """Retorna en un diccionario los KPIs y todas las distribuciones (para la CLI y la API)."""
+    return {
+        "monedas_unicas": obtener_conteo_monedas_unicas(),
+        "monedas_total": obtener_conteo_monedas_total(),
+        "paises_unicos": obtener_conteo_paises_unicos(),
+        "por_pais": obtener_distribucion_por_pais(),
+        "por_ceca": obtener_distribucion_por_ceca(),
+        "por_estado": obtener_distribucion_por_estado_conservacion(),
+        "desmonetizacion": obtener_distribucion_desmonetizacion(),
+        "por_tipo": obtener_distribucion_por_tipo(),
+        "por_orientacion": obtener_distribucion_por_orientacion(),
+        "valoracion": obtener_valoracion(),
+    }
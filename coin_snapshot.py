@@ -0,0 +1,350 @@
+import json
+import mmap
+import os
+import struct
+from array import array
+from collections.abc import MutableSequence
+
+# =========================================================================
+# Formato binario de instantánea (snapshot) de la colección
+# =========================================================================
+# El archivo tiene la siguiente estructura:
+#
+#   [MAGIA 4 bytes][longitud de cabecera u32][cabecera JSON][relleno]
+#   [columna 1: máscara + datos][columna 2: máscara + datos]...[montón de cadenas]
+#
+# Cada campo se guarda como una columna de ancho fijo. Los campos numéricos
+# (enteros, decimales y booleanos) se guardan directamente en la columna; los
+# campos de texto guardan pares (desplazamiento, longitud) que apuntan al
+# montón de cadenas. La máscara de cada columna indica si el valor existe,
+# es None o la clave no estaba presente en la moneda.
+#
+# El archivo se abre con mmap y las columnas se leen sin copiar mediante
+# memoryview; una moneda solo se decodifica a diccionario cuando se accede a ella.
+# =========================================================================
+
+MAGIA_SNAPSHOT = b'TCVS'
+VERSION_FORMATO = 1
+
+# Tipos de columna
+TIPO_ENTERO = 'i'     # int64
+TIPO_DECIMAL = 'f'    # float64
+TIPO_BOOLEANO = 'b'   # uint8
+TIPO_TEXTO = 's'      # (u32 desplazamiento, u32 longitud) en el montón
+TIPO_JSON = 'j'       # igual que texto, pero el valor está codificado en JSON
+
+# Valores de la máscara de cada columna
+MASCARA_VALOR = 0
+MASCARA_NULO = 1
+MASCARA_AUSENTE = 2
+
+_AUSENTE = object()
+_LIMITE_INT64 = 2 ** 63
+_LIMITE_U32 = 2 ** 32
+
+
+def _alinear(desplazamiento, alineacion=8):
+    return (desplazamiento + alineacion - 1) // alineacion * alineacion
+
+
+def _inferir_tipo_columna(valores):
+    """Determina el tipo de columna más compacto capaz de representar todos los valores."""
+    tipo = None
+    for valor in valores:
+        if valor is None or valor is _AUSENTE:
+            continue
+        if isinstance(valor, bool):
+            actual = TIPO_BOOLEANO
+        elif isinstance(valor, int):
+            actual = TIPO_ENTERO if -_LIMITE_INT64 <= valor < _LIMITE_INT64 else TIPO_JSON
+        elif isinstance(valor, float):
+            actual = TIPO_DECIMAL
+        elif isinstance(valor, str):
+            actual = TIPO_TEXTO
+        else:
+            actual = TIPO_JSON
+
+        if tipo is None:
+            tipo = actual
+        elif tipo != actual:
+            # Tipos mezclados (incluso enteros y decimales) se guardan en JSON
+            # para que cada valor conserve exactamente su tipo original.
+            tipo = TIPO_JSON
+        if tipo == TIPO_JSON:
+            break
+    return tipo or TIPO_TEXTO
+
+
+def escribir_snapshot(coleccion, ruta, origen=None):
+    """
+    Escribe la colección en formato binario columnar.
+    'origen' es una firma opcional (tamaño, mtime_ns) del archivo JSON del que procede,
+    usada para saber si la instantánea sigue siendo válida.
+    """
+    coleccion = list(coleccion)
+    n = len(coleccion)
+
+    # Campos en el orden en que aparecen por primera vez
+    campos = []
+    vistos = set()
+    for moneda in coleccion:
+        for campo in moneda:
+            if campo not in vistos:
+                vistos.add(campo)
+                campos.append(campo)
+
+    monton = bytearray()
+    columnas = []
+    for campo in campos:
+        valores = [moneda.get(campo, _AUSENTE) for moneda in coleccion]
+        tipo = _inferir_tipo_columna(valores)
+        mascara = bytearray(n)
+        if tipo == TIPO_ENTERO:
+            datos = array('q', bytes(8 * n))
+        elif tipo == TIPO_DECIMAL:
+            datos = array('d', bytes(8 * n))
+        elif tipo == TIPO_BOOLEANO:
+            datos = array('B', bytes(n))
+        else:
+            datos = array('I', bytes(8 * n))
+
+        for i, valor in enumerate(valores):
+            if valor is _AUSENTE:
+                mascara[i] = MASCARA_AUSENTE
+                continue
+            if valor is None:
+                mascara[i] = MASCARA_NULO
+                continue
+            if tipo in (TIPO_ENTERO, TIPO_DECIMAL, TIPO_BOOLEANO):
+                datos[i] = valor
+            else:
+                texto = valor if tipo == TIPO_TEXTO else json.dumps(valor, ensure_ascii=False)
+                codificado = texto.encode('utf-8')
+                if len(monton) + len(codificado) >= _LIMITE_U32:
+                    raise ValueError("La colección es demasiado grande para el formato de instantánea.")
+                datos[2 * i] = len(monton)
+                datos[2 * i + 1] = len(codificado)
+                monton += codificado
+        columnas.append((campo, tipo, mascara, datos))
+
+    # Calcular la disposición de las columnas dentro del archivo
+    descriptores = []
+    cuerpo = []
+    posicion = 0
+    for campo, tipo, mascara, datos in columnas:
+        pos_mascara = posicion
+        posicion = _alinear(posicion + len(mascara))
+        pos_datos = posicion
+        datos_bytes = datos.tobytes()
+        posicion = _alinear(posicion + len(datos_bytes))
+        descriptores.append({"campo": campo, "tipo": tipo, "mascara": pos_mascara, "datos": pos_datos})
+        cuerpo.append((pos_mascara, bytes(mascara)))
+        cuerpo.append((pos_datos, datos_bytes))
+    pos_monton = posicion
+
+    cabecera = json.dumps({
+        "version": VERSION_FORMATO,
+        "registros": n,
+        "columnas": descriptores,
+        "monton": pos_monton,
+        "longitud_monton": len(monton),
+        "origen": list(origen) if origen else None,
+    }, ensure_ascii=False).encode('utf-8')
+    inicio_cuerpo = _alinear(len(MAGIA_SNAPSHOT) + 4 + len(cabecera))
+
+    ruta_temporal = f"{ruta}.tmp"
+    with open(ruta_temporal, 'wb') as f:
+        f.write(MAGIA_SNAPSHOT)
+        f.write(struct.pack('<I', len(cabecera)))
+        f.write(cabecera)
+        for desplazamiento, bloque in cuerpo:
+            f.seek(inicio_cuerpo + desplazamiento)
+            f.write(bloque)
+        f.seek(inicio_cuerpo + pos_monton)
+        f.write(monton)
+    # Reemplazo atómico para que ningún lector vea un archivo a medio escribir
+    os.replace(ruta_temporal, ruta)
+
+
+def leer_cabecera_snapshot(ruta):
+    """Lee solo la cabecera de una instantánea. Retorna None si el archivo no es válido."""
+    try:
+        with open(ruta, 'rb') as f:
+            if f.read(len(MAGIA_SNAPSHOT)) != MAGIA_SNAPSHOT:
+                return None
+            (longitud,) = struct.unpack('<I', f.read(4))
+            cabecera = json.loads(f.read(longitud).decode('utf-8'))
+    except (OSError, ValueError, struct.error):
+        return None
+    if cabecera.get("version") != VERSION_FORMATO:
+        return None
+    return cabecera
+
+
+class _Columna:
+    """Vista sin copia sobre una columna del archivo mapeado en memoria."""
+    def __init__(self, buffer, base, n, descriptor):
+        self.campo = descriptor["campo"]
+        self.tipo = descriptor["tipo"]
+        self.mascara = buffer[base + descriptor["mascara"]: base + descriptor["mascara"] + n]
+        inicio = base + descriptor["datos"]
+        if self.tipo == TIPO_ENTERO:
+            self.datos = buffer[inicio: inicio + 8 * n].cast('q')
+        elif self.tipo == TIPO_DECIMAL:
+            self.datos = buffer[inicio: inicio + 8 * n].cast('d')
+        elif self.tipo == TIPO_BOOLEANO:
+            self.datos = buffer[inicio: inicio + n]
+        else:
+            self.datos = buffer[inicio: inicio + 8 * n].cast('I')
+
+    def liberar(self):
+        self.mascara.release()
+        self.datos.release()
+
+
+class ColeccionSnapshot(MutableSequence):
+    """
+    Secuencia de monedas respaldada por una instantánea binaria mapeada en memoria.
+    Se comporta como la lista 'mi_coleccion': las monedas se decodifican a diccionario
+    la primera vez que se accede a ellas y a partir de ahí se reutiliza el mismo
+    diccionario, de modo que las modificaciones en sitio se conservan.
+    """
+    def __init__(self, ruta):
+        self.ruta = ruta
+        # El mapeo conserva su propio descriptor, así que el archivo se cierra enseguida
+        with open(ruta, 'rb') as archivo:
+            # mmap no admite archivos vacíos (lanza ValueError)
+            self._mmap = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = memoryview(self._mmap)
+        if bytes(self._buffer[:len(MAGIA_SNAPSHOT)]) != MAGIA_SNAPSHOT:
+            self.cerrar()
+            raise ValueError(f"'{ruta}' no es una instantánea de colección válida.")
+        (longitud,) = struct.unpack_from('<I', self._buffer, len(MAGIA_SNAPSHOT))
+        inicio_cabecera = len(MAGIA_SNAPSHOT) + 4
+        self.cabecera = json.loads(bytes(self._buffer[inicio_cabecera: inicio_cabecera + longitud]).decode('utf-8'))
+        base = _alinear(inicio_cabecera + longitud)
+
+        self._n = self.cabecera["registros"]
+        self._columnas = [_Columna(self._buffer, base, self._n, d) for d in self.cabecera["columnas"]]
+        self._columnas_por_campo = {c.campo: c for c in self._columnas}
+        inicio_monton = base + self.cabecera["monton"]
+        self._monton = self._buffer[inicio_monton: inicio_monton + self.cabecera["longitud_monton"]]
+
+        # Filas decodificadas (índice de registro -> diccionario)
+        self._decodificados = {}
+        # Mientras no haya inserciones ni borrados, la posición coincide con el registro.
+        # Tras el primer cambio estructural se convierte en una lista de índices/diccionarios.
+        self._filas = None
+
+    # ------------------------------------------------------------------
+    # Decodificación
+    # ------------------------------------------------------------------
+    def _valor(self, columna, registro):
+        estado = columna.mascara[registro]
+        if estado == MASCARA_AUSENTE:
+            return _AUSENTE
+        if estado == MASCARA_NULO:
+            return None
+        if columna.tipo == TIPO_BOOLEANO:
+            return bool(columna.datos[registro])
+        if columna.tipo in (TIPO_ENTERO, TIPO_DECIMAL):
+            return columna.datos[registro]
+        desplazamiento = columna.datos[2 * registro]
+        longitud = columna.datos[2 * registro + 1]
+        texto = str(self._monton[desplazamiento: desplazamiento + longitud], 'utf-8')
+        return texto if columna.tipo == TIPO_TEXTO else json.loads(texto)
+
+    def _decodificar(self, registro):
+        moneda = self._decodificados.get(registro)
+        if moneda is None:
+            moneda = {}
+            for columna in self._columnas:
+                valor = self._valor(columna, registro)
+                if valor is not _AUSENTE:
+                    moneda[columna.campo] = valor
+            # setdefault es atómico: si otro hilo decodificó el mismo registro a la vez,
+            # ambos se quedan con el mismo diccionario
+            moneda = self._decodificados.setdefault(registro, moneda)
+        return moneda
+
+    def _resolver(self, fila):
+        return fila if isinstance(fila, dict) else self._decodificar(fila)
+
+    def _materializar_filas(self):
+        if self._filas is None:
+            self._filas = list(range(self._n))
+
+    # ------------------------------------------------------------------
+    # Interfaz de secuencia
+    # ------------------------------------------------------------------
+    def __len__(self):
+        return self._n if self._filas is None else len(self._filas)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self[i] for i in range(*indice.indices(len(self)))]
+        if self._filas is None:
+            if indice < 0:
+                indice += self._n
+            if not 0 <= indice < self._n:
+                raise IndexError("índice de moneda fuera de rango")
+            return self._decodificar(indice)
+        return self._resolver(self._filas[indice])
+
+    def __setitem__(self, indice, moneda):
+        self._materializar_filas()
+        if isinstance(indice, slice):
+            self._filas[indice] = list(moneda)
+        else:
+            self._filas[indice] = moneda
+
+    def __delitem__(self, indice):
+        self._materializar_filas()
+        del self._filas[indice]
+
+    def insert(self, indice, moneda):
+        self._materializar_filas()
+        self._filas.insert(indice, moneda)
+
+    def __iter__(self):
+        if self._filas is None:
+            for registro in range(self._n):
+                yield self._decodificar(registro)
+        else:
+            for fila in self._filas:
+                yield self._resolver(fila)
+
+    def valores(self, campo):
+        """
+        Itera los valores de un único campo leyendo directamente la columna,
+        sin decodificar las monedas completas. Las monedas ya decodificadas
+        (y posiblemente modificadas) se leen desde su diccionario.
+        """
+        columna = self._columnas_por_campo.get(campo)
+        filas = range(self._n) if self._filas is None else self._filas
+        for fila in filas:
+            if isinstance(fila, dict):
+                yield fila.get(campo)
+                continue
+            moneda = self._decodificados.get(fila)
+            if moneda is not None:
+                yield moneda.get(campo)
+            elif columna is None:
+                yield None
+            else:
+                valor = self._valor(columna, fila)
+                yield None if valor is _AUSENTE else valor
+
+    def cerrar(self):
+        """
+        Libera las vistas y cierra el archivo mapeado en memoria. Solo debe llamarse
+        cuando nadie más use la instantánea: si no, basta con soltar la referencia y el
+        mapeo se libera cuando termine el último generador que la recorre.
+        """
+        for columna in getattr(self, '_columnas', []):
+            columna.liberar()
+        if getattr(self, '_monton', None) is not None:
+            self._monton.release()
+        if getattr(self, '_buffer', None) is not None:
+            self._buffer.release()
+        self._mmap.close()
@@ -0,0 +1,285 @@
+import os
+
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QLabel, QListView, QStyledItemDelegate, QStyle, QAbstractItemView
+)
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QRect, QSize, QPoint, QTimer
+from PyQt6.QtGui import QColor, QPen, QFont, QPainter
+
+import coin_data_manager
+import thumbnail_loader
+
+# Tamaño de cada tarjeta de la cuadrícula y de sus dos fotos
+CARD_SIZE = QSize(280, 200)
+CARD_THUMBNAIL_SIZE = 120
+# Tarjetas que se cargan por adelantado después de la última visible (en la dirección del desplazamiento)
+PREFETCH_CARDS = 40
+# Si el desplazamiento salta más de esta cantidad de tarjetas, se descartan las cargas pendientes
+CANCEL_JUMP_CARDS = 200
+
+# Roles propios del modelo
+ObverseRole = Qt.ItemDataRole.UserRole + 1
+ReverseRole = Qt.ItemDataRole.UserRole + 2
+CoinRole = Qt.ItemDataRole.UserRole + 3
+
+# Estado de una foto mientras no hay miniatura
+PHOTO_NONE = "none"
+PHOTO_LOADING = "loading"
+PHOTO_ERROR = "error"
+
+
+class CoinGridModel(QAbstractListModel):
+    """
+    Modelo de la cuadrícula. No copia la colección: cada tarjeta pide su moneda a
+    coin_data_manager cuando se pinta, y sus fotos al cargador de miniaturas. Como la
+    vista solo pinta las tarjetas visibles, solo se decodifican las monedas y las
+    imágenes que se ven.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._count = 0
+        self._loader = thumbnail_loader.shared_loader()
+        self._loader.thumbnail_ready.connect(self._on_thumbnail_ready)
+        # Ruta de imagen -> filas que la esperan (solo filas que se han pintado)
+        self._waiting_rows = {}
+        # Rutas cuya miniatura no se pudo cargar
+        self._failed_paths = set()
+
+    def reload(self):
+        self.beginResetModel()
+        self._count = coin_data_manager.obtener_conteo_monedas_unicas()
+        self._waiting_rows.clear()
+        self._failed_paths.clear()
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._count
+
+    def coin_at(self, row):
+        """Moneda de una fila, o None si la colección ha cambiado y aún no se ha recargado el modelo."""
+        try:
+            return coin_data_manager.obtener_moneda_en_posicion(row)
+        except IndexError:
+            return None
+
+    def photo_paths(self, row):
+        coin = self.coin_at(row) or {}
+        return coin.get(coin_data_manager.CAMPO_FOTO_ANVERSO), coin.get(coin_data_manager.CAMPO_FOTO_REVERSO)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < self._count:
+            return None
+        coin = self.coin_at(index.row())
+        if coin is None:
+            return None
+        if role == CoinRole:
+            return coin
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return coin.get(coin_data_manager.CAMPO_CODIGO_UNICO)
+        if role in (ObverseRole, ReverseRole):
+            field = coin_data_manager.CAMPO_FOTO_ANVERSO if role == ObverseRole else coin_data_manager.CAMPO_FOTO_REVERSO
+            return self._photo(index.row(), coin.get(field))
+        return None
+
+    def _photo(self, row, path):
+        """QPixmap de la miniatura o uno de los estados PHOTO_*; si no está en memoria, la pide."""
+        if not path:
+            return PHOTO_NONE
+        if path in self._failed_paths:
+            return PHOTO_ERROR
+        # Las tarjetas visibles tienen prioridad sobre las que se cargan por adelantado
+        pixmap = self._loader.request(path, priority=2)
+        if pixmap is not None:
+            return pixmap
+        self._waiting_rows.setdefault(path, set()).add(row)
+        return PHOTO_LOADING
+
+    def prefetch(self, rows):
+        """Pide por adelantado, con menor prioridad, las fotos de las filas indicadas."""
+        for row in rows:
+            if 0 <= row < self._count:
+                for path in self.photo_paths(row):
+                    if path and path not in self._failed_paths:
+                        self._loader.request(path, priority=0)
+
+    def _on_thumbnail_ready(self, path, pixmap):
+        rows = self._waiting_rows.pop(path, None)
+        if pixmap.isNull():
+            self._failed_paths.add(path)
+        for row in rows or ():
+            if row < self._count:
+                index = self.index(row)
+                self.dataChanged.emit(index, index, [ObverseRole, ReverseRole])
+
+    def forget_images(self, paths):
+        """Vuelve a pedir las fotos que han cambiado en disco, incluidas las que antes fallaron."""
+        changed = {os.path.normpath(path) for path in paths}
+        self._failed_paths = {path for path in self._failed_paths if os.path.normpath(path) not in changed}
+        if self._count:
+            self.dataChanged.emit(self.index(0), self.index(self._count - 1), [ObverseRole, ReverseRole])
+
+    def forget_waiting(self):
+        """Olvida las filas que esperan miniaturas cuyas cargas se han descartado."""
+        self._waiting_rows.clear()
+
+
+class CoinCardDelegate(QStyledItemDelegate):
+    """Pinta cada moneda como una tarjeta con las fotos de anverso y reverso y sus datos principales."""
+    def sizeHint(self, option, index):
+        return CARD_SIZE
+
+    def paint(self, painter, option, index):
+        coin = index.data(CoinRole)
+        if coin is None:
+            return
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        card = option.rect.adjusted(6, 6, -6, -6)
+        selected = option.state & QStyle.StateFlag.State_Selected
+        painter.setPen(QPen(QColor("#5DADE2") if selected else QColor("#D3D3D3"), 2 if selected else 1))
+        painter.setBrush(QColor("#D6EAF8") if selected else QColor("#FFFFFF"))
+        painter.drawRoundedRect(card, 8, 8)
+
+        photo_top = card.top() + 10
+        gap = (card.width() - 2 * CARD_THUMBNAIL_SIZE) // 3
+        for i, role in enumerate((ObverseRole, ReverseRole)):
+            target = QRect(card.left() + gap + i * (CARD_THUMBNAIL_SIZE + gap), photo_top,
+                           CARD_THUMBNAIL_SIZE, CARD_THUMBNAIL_SIZE)
+            self._paint_photo(painter, target, index.data(role))
+
+        text_rect = QRect(card.left() + 10, photo_top + CARD_THUMBNAIL_SIZE + 6, card.width() - 20,
+                          card.bottom() - photo_top - CARD_THUMBNAIL_SIZE - 8)
+        title = " · ".join(str(value) for value in (coin.get(coin_data_manager.CAMPO_PAIS_EMISOR),
+                                                   coin.get(coin_data_manager.CAMPO_ANO_ACUNACION)) if value)
+        nominal = " ".join(str(value) for value in (coin.get(coin_data_manager.CAMPO_VALOR_NOMINAL),
+                                                   coin.get(coin_data_manager.CAMPO_UNIDAD_MONETARIA)) if value)
+        font = QFont(option.font)
+        font.setBold(True)
+        painter.setFont(font)
+        painter.setPen(QColor("#2C3E50"))
+        metrics = painter.fontMetrics()
+        painter.drawText(text_rect, Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignTop,
+                         metrics.elidedText(title or "Sin datos", Qt.TextElideMode.ElideRight, text_rect.width()))
+        painter.setFont(option.font)
+        painter.setPen(QColor("#555555"))
+        painter.drawText(text_rect.adjusted(0, metrics.height() + 2, 0, 0),
+                         Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignTop,
+                         painter.fontMetrics().elidedText(nominal, Qt.TextElideMode.ElideRight, text_rect.width()))
+        painter.restore()
+
+    def _paint_photo(self, painter, target, photo):
+        if isinstance(photo, str):
+            painter.setPen(QPen(QColor("#E74C3C") if photo == PHOTO_ERROR else QColor("#D3D3D3"), 1, Qt.PenStyle.DashLine))
+            painter.setBrush(QColor("#FAE0E0") if photo == PHOTO_ERROR else QColor("#FAFAFA"))
+            painter.drawRoundedRect(target, 6, 6)
+            text = {PHOTO_NONE: "Sin foto", PHOTO_LOADING: "Cargando...", PHOTO_ERROR: "Error"}[photo]
+            painter.setPen(QColor("#888888"))
+            painter.drawText(target, Qt.AlignmentFlag.AlignCenter, text)
+            return
+        scaled = photo.size().scaled(target.size(), Qt.AspectRatioMode.KeepAspectRatio)
+        destination = QRect(QPoint(0, 0), scaled)
+        destination.moveCenter(target.center())
+        painter.drawPixmap(destination, photo)
+
+
+class CollectionViewTab(QWidget):
+    """
+    Vista "Mi Colección": cuadrícula virtualizada de tarjetas con las fotos de cada moneda.
+    Solo se decodifican las imágenes de las tarjetas visibles y unas pocas por delante
+    en la dirección del desplazamiento; las miniaturas en memoria están acotadas por la
+    caché del cargador compartido.
+    """
+    def __init__(self):
+        super().__init__()
+        self._last_first_row = 0
+        self.init_ui()
+
+    def init_ui(self):
+        main_layout = QVBoxLayout()
+        self.setLayout(main_layout)
+        main_layout.setContentsMargins(50, 50, 50, 50)
+
+        title_label = QLabel("Mi Colección")
+        title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        title_label.setStyleSheet("font-size: 24px; font-weight: bold; margin-bottom: 10px; color: #2C3E50;")
+        main_layout.addWidget(title_label)
+
+        self.count_label = QLabel("")
+        self.count_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.count_label.setStyleSheet("font-size: 14px; color: #555; margin-bottom: 10px;")
+        main_layout.addWidget(self.count_label)
+
+        self.model = CoinGridModel(self)
+        self.grid_view = QListView()
+        self.grid_view.setViewMode(QListView.ViewMode.IconMode)
+        self.grid_view.setResizeMode(QListView.ResizeMode.Adjust)
+        self.grid_view.setMovement(QListView.Movement.Static)
+        # Todas las tarjetas miden lo mismo: la vista no tiene que medir cada una para colocarlas
+        self.grid_view.setUniformItemSizes(True)
+        self.grid_view.setGridSize(CARD_SIZE)
+        self.grid_view.setLayoutMode(QListView.LayoutMode.Batched)
+        self.grid_view.setBatchSize(500)
+        self.grid_view.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.grid_view.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.grid_view.setStyleSheet("QListView { border: 1px solid #D3D3D3; border-radius: 8px; background-color: #F4F6F7; }")
+        self.grid_view.setItemDelegate(CoinCardDelegate(self.grid_view))
+        self.grid_view.setModel(self.model)
+        main_layout.addWidget(self.grid_view)
+
+        # Agrupar los eventos de desplazamiento antes de calcular lo que hay que precargar
+        self._prefetch_timer = QTimer(self)
+        self._prefetch_timer.setSingleShot(True)
+        self._prefetch_timer.setInterval(50)
+        self._prefetch_timer.timeout.connect(self.prefetch_around_viewport)
+        self.grid_view.verticalScrollBar().valueChanged.connect(lambda _: self._prefetch_timer.start())
+
+    def load_coins_to_table(self):
+        """Vuelve a leer la colección y muestra todas las monedas en la cuadrícula."""
+        self.model.reload()
+        self._last_first_row = 0
+        count = self.model.rowCount()
+        self.count_label.setText(f"{count} monedas" if count != 1 else "1 moneda")
+        self._prefetch_timer.start()
+
+    def apply_coin_changes(self, added_ids, modified_ids, deleted_ids):
+        """Aplica los cambios hechos desde fuera sin perder la posición de desplazamiento."""
+        scroll_value = self.grid_view.verticalScrollBar().value()
+        if added_ids or deleted_ids:
+            # Las posiciones de las monedas han cambiado
+            self.load_coins_to_table()
+            self.grid_view.verticalScrollBar().setValue(scroll_value)
+        elif modified_ids and self.model.rowCount():
+            self.model.dataChanged.emit(self.model.index(0), self.model.index(self.model.rowCount() - 1))
+
+    def apply_image_changes(self, paths):
+        """Muestra de nuevo las fotos añadidas, modificadas o eliminadas en disco."""
+        self.model.forget_images(paths)
+        self._prefetch_timer.start()
+
+    def _visible_rows(self):
+        """(primera, última) fila visible, o None si no hay ninguna."""
+        viewport = self.grid_view.viewport().rect()
+        first = self.grid_view.indexAt(viewport.topLeft() + QPoint(CARD_SIZE.width() // 2, CARD_SIZE.height() // 2))
+        last = self.grid_view.indexAt(viewport.bottomRight() - QPoint(CARD_SIZE.width() // 2, CARD_SIZE.height() // 2))
+        if not first.isValid():
+            return None
+        return first.row(), last.row() if last.isValid() else self.model.rowCount() - 1
+
+    def prefetch_around_viewport(self):
+        """Precarga las miniaturas de las tarjetas que vienen a continuación en la dirección del desplazamiento."""
+        visible = self._visible_rows()
+        if visible is None:
+            return
+        first, last = visible
+        if abs(first - self._last_first_row) > CANCEL_JUMP_CARDS:
+            # Salto largo: lo que estaba pendiente ya no se va a ver
+            thumbnail_loader.shared_loader().cancel_pending()
+            self.model.forget_waiting()
+            self.grid_view.viewport().update()
+        if first >= self._last_first_row:
+            rows = range(last + 1, last + 1 + PREFETCH_CARDS)
+        else:
+            rows = range(first - 1, first - 1 - PREFETCH_CARDS, -1)
+        self._last_first_row = first
+        self.model.prefetch(rows)
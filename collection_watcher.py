@@ -0,0 +1,117 @@
+from PyQt6.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+import os
+
+import coin_data_manager
+
+# Retardo para agrupar varias notificaciones seguidas del sistema de archivos en una sola recarga
+RETARDO_AGRUPACION_MS = 250
+# Intervalo de sondeo cuando no se puede vigilar con notificaciones (p. ej. carpetas de red)
+INTERVALO_SONDEO_MS = 2000
+# Forzar el sondeo aunque haya notificaciones disponibles (útil en NAS/NFS, donde inotify no ve
+# los cambios hechos desde otras máquinas)
+FORZAR_SONDEO = os.environ.get('COINVAULT_VIGILANCIA_SONDEO', '') not in ('', '0')
+
+DIRECTORIO_IMAGENES = os.path.join('assets', 'imagenes_monedas')
+
+
+class CollectionWatcher(QObject):
+    """
+    Vigila el archivo de la colección y el directorio de imágenes.
+
+    Usa QFileSystemWatcher (inotify en Linux) y, si no puede vigilar las rutas o se
+    fuerza con COINVAULT_VIGILANCIA_SONDEO=1, un sondeo periódico de la firma del archivo.
+    Cuando otra instancia o un script modifica la colección, se incorporan solo los
+    cambios con coin_data_manager.resincronizar() y se emiten los códigos afectados.
+    Los guardados propios no generan señales porque la firma ya coincide.
+    """
+    # (añadidos, modificados, eliminados) como listas de códigos únicos
+    coins_changed = pyqtSignal(list, list, list)
+    # (nuevas, modificadas, eliminadas) como listas de rutas relativas de imágenes
+    images_changed = pyqtSignal(list, list, list)
+
+    def __init__(self, parent=None, image_dir=DIRECTORIO_IMAGENES):
+        super().__init__(parent)
+        self.image_dir = image_dir
+        self._imagenes = self._listar_imagenes()
+
+        self._timer_coleccion = QTimer(self)
+        self._timer_coleccion.setSingleShot(True)
+        self._timer_coleccion.timeout.connect(self.check_collection)
+        self._timer_imagenes = QTimer(self)
+        self._timer_imagenes.setSingleShot(True)
+        self._timer_imagenes.timeout.connect(self.check_images)
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.fileChanged.connect(self._on_path_changed)
+        self._watcher.directoryChanged.connect(self._on_path_changed)
+        self._vigilar_rutas()
+
+        self._timer_sondeo = QTimer(self)
+        self._timer_sondeo.timeout.connect(self._poll)
+        if FORZAR_SONDEO or not self._watcher.files() and not self._watcher.directories():
+            self._timer_sondeo.start(INTERVALO_SONDEO_MS)
+
+    def _directorio_coleccion(self):
+        return os.path.dirname(os.path.abspath(coin_data_manager.ARCHIVO_COLECCION))
+
+    def _vigilar_rutas(self):
+        """(Re)añade las rutas vigiladas. Se vigila también el directorio porque el archivo
+        se reemplaza de forma atómica al guardar y la vigilancia del archivo antiguo se pierde."""
+        rutas = [self._directorio_coleccion(), os.path.abspath(coin_data_manager.ARCHIVO_COLECCION),
+                 os.path.abspath(self.image_dir)]
+        vigiladas = set(self._watcher.files()) | set(self._watcher.directories())
+        pendientes = [ruta for ruta in rutas if ruta not in vigiladas and os.path.exists(ruta)]
+        if pendientes:
+            self._watcher.addPaths(pendientes)
+
+    def _on_path_changed(self, path):
+        if os.path.abspath(path) == os.path.abspath(self.image_dir):
+            self._timer_imagenes.start(RETARDO_AGRUPACION_MS)
+        else:
+            self._timer_coleccion.start(RETARDO_AGRUPACION_MS)
+
+    def _poll(self):
+        self.check_collection()
+        self.check_images()
+
+    def check_collection(self):
+        """Incorpora los cambios externos de la colección y emite los códigos afectados."""
+        self._vigilar_rutas()
+        try:
+            anadidos, modificados, eliminados = coin_data_manager.resincronizar()
+        except (OSError, ValueError, TimeoutError) as e:
+            # El archivo puede estar a medio copiar por una herramienta externa: reintentar más tarde
+            print(f"Advertencia: no se pudo recargar la colección modificada externamente: {e}")
+            self._timer_coleccion.start(INTERVALO_SONDEO_MS)
+            return
+        except coin_data_manager.ConflictoDeEdicion as e:
+            print(f"Advertencia: {e}")
+            anadidos, modificados, eliminados = [], [], []
+        if anadidos or modificados or eliminados:
+            self.coins_changed.emit(anadidos, modificados, eliminados)
+
+    def _listar_imagenes(self):
+        """{ruta relativa: fecha de modificación} de las imágenes del directorio."""
+        imagenes = {}
+        try:
+            nombres = os.listdir(self.image_dir)
+        except OSError:
+            return imagenes
+        for nombre in nombres:
+            ruta = os.path.join(self.image_dir, nombre)
+            try:
+                imagenes[ruta] = os.path.getmtime(ruta)
+            except OSError:
+                pass
+        return imagenes
+
+    def check_images(self):
+        """Compara el contenido del directorio de imágenes con el último conocido."""
+        actuales = self._listar_imagenes()
+        nuevas = sorted(actuales.keys() - self._imagenes.keys())
+        eliminadas = sorted(self._imagenes.keys() - actuales.keys())
+        modificadas = sorted(ruta for ruta in actuales.keys() & self._imagenes.keys()
+                             if actuales[ruta] != self._imagenes[ruta])
+        self._imagenes = actuales
+        if nuevas or modificadas or eliminadas:
+            self.images_changed.emit(nuevas, modificadas, eliminadas)
@@ -0,0 +1,170 @@
+import contextlib
+import gzip
+import io
+import os
+import shutil
+import threading
+
+# =========================================================================
+# Compresión opcional del archivo de la colección y recodificación de imágenes
+# =========================================================================
+# COINVAULT_COMPRESION=gzip|zstd hace que el JSON de la colección se guarde
+# comprimido, y COINVAULT_COMPRESION=ninguna lo vuelve a guardar sin comprimir.
+# Al leer, el formato se detecta por la cabecera del archivo, y si la variable no
+# está definida se conserva el formato que ya tenía el archivo en disco.
+# zstd necesita el paquete 'zstandard' (o Python 3.14+); si no está disponible se
+# usa gzip.
+#
+# COINVAULT_RECODIFICAR_IMAGENES=png|webp recodifica sin pérdidas las imágenes que
+# se importan (PNG optimizado o WebP sin pérdidas). Necesita Pillow; sin Pillow, o
+# si el resultado no es más pequeño, se copia el archivo original.
+# =========================================================================
+
+FORMATO_COLECCION = os.environ.get('COINVAULT_COMPRESION', '').lower()
+RECODIFICAR_IMAGENES = os.environ.get('COINVAULT_RECODIFICAR_IMAGENES', '').lower()
+
+NIVEL_GZIP = 6
+NIVEL_ZSTD = 10
+
+_CABECERA_GZIP = b'\x1f\x8b'
+_CABECERA_ZSTD = b'\x28\xb5\x2f\xfd'
+
+try:
+    from compression import zstd as _zstd_estandar  # Python 3.14+
+except ImportError:
+    _zstd_estandar = None
+try:
+    import zstandard as _zstandard
+except ImportError:
+    _zstandard = None
+
+ZSTD_DISPONIBLE = _zstd_estandar is not None or _zstandard is not None
+# La advertencia de que falta zstd solo se muestra la primera vez que se guarda
+_aviso_zstd_mostrado = False
+
+
+# Tamaño del búfer entre json.dump y el compresor: sin él, cada fragmento pequeño
+# que escribe json.dump pasa por separado por el compresor
+TAMANO_BUFER = 1024 * 1024
+
+
+def formato_escritura(ruta_actual=None):
+    """
+    Formato con el que se guarda la colección: '', 'gzip' o 'zstd'. Si no se ha
+    elegido ninguno, se mantiene el del archivo 'ruta_actual'.
+    """
+    global _aviso_zstd_mostrado
+    formato = FORMATO_COLECCION
+    if not formato and ruta_actual:
+        formato = detectar_formato(ruta_actual)
+    if formato == 'zstd' and not ZSTD_DISPONIBLE:
+        if not _aviso_zstd_mostrado:
+            _aviso_zstd_mostrado = True
+            print("Advertencia: zstd no está disponible (pip install zstandard); se usará gzip.")
+        return 'gzip'
+    return formato if formato in ('gzip', 'zstd') else ''
+
+
+def detectar_formato(ruta):
+    """Formato de compresión de un archivo según su cabecera ('' si no está comprimido o no existe)."""
+    try:
+        with open(ruta, 'rb') as f:
+            cabecera = f.read(4)
+    except FileNotFoundError:
+        return ''
+    if cabecera.startswith(_CABECERA_GZIP):
+        return 'gzip'
+    if cabecera == _CABECERA_ZSTD:
+        return 'zstd'
+    return ''
+
+
+@contextlib.contextmanager
+def abrir_lectura(ruta):
+    """Abre un archivo de texto UTF-8, descomprimiéndolo por bloques si está comprimido."""
+    formato = detectar_formato(ruta)
+    if formato == 'gzip':
+        with gzip.open(ruta, 'rt', encoding='utf-8') as f:
+            yield f
+    elif formato == 'zstd':
+        if _zstd_estandar is not None:
+            with _zstd_estandar.open(ruta, 'rt', encoding='utf-8') as f:
+                yield f
+        elif _zstandard is not None:
+            with open(ruta, 'rb') as crudo:
+                lector = _zstandard.ZstdDecompressor().stream_reader(crudo)
+                with io.TextIOWrapper(lector, encoding='utf-8') as f:
+                    yield f
+        else:
+            raise ValueError(f"'{ruta}' está comprimido con zstd y el paquete 'zstandard' no está instalado.")
+    else:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            yield f
+
+
+@contextlib.contextmanager
+def abrir_escritura(ruta, formato):
+    """Abre un archivo de texto UTF-8 para escribir, comprimiendo por bloques según 'formato'."""
+    if formato == 'gzip':
+        with gzip.GzipFile(ruta, 'wb', compresslevel=NIVEL_GZIP) as comprimido:
+            with io.TextIOWrapper(io.BufferedWriter(comprimido, TAMANO_BUFER), encoding='utf-8') as f:
+                yield f
+    elif formato == 'zstd' and _zstd_estandar is not None:
+        with _zstd_estandar.ZstdFile(ruta, 'wb', level=NIVEL_ZSTD) as comprimido:
+            with io.TextIOWrapper(io.BufferedWriter(comprimido, TAMANO_BUFER), encoding='utf-8') as f:
+                yield f
+    elif formato == 'zstd':
+        with open(ruta, 'wb') as crudo:
+            escritor = _zstandard.ZstdCompressor(level=NIVEL_ZSTD).stream_writer(crudo)
+            with io.TextIOWrapper(io.BufferedWriter(escritor, TAMANO_BUFER), encoding='utf-8') as f:
+                yield f
+    else:
+        with open(ruta, 'w', encoding='utf-8') as f:
+            yield f
+
+
+# =========================================================================
+# Imágenes
+# =========================================================================
+def recodificar_imagen(origen, destino_sin_extension, modo=None):
+    """
+    Guarda en 'destino_sin_extension' + extensión una copia de la imagen 'origen',
+    recodificada sin pérdidas según 'modo' ('png', 'webp' o '' para copiar tal cual).
+    Las fotos JPEG se copian sin cambios: pasarlas a un formato sin pérdidas las agrandaría.
+    Retorna la ruta final.
+    """
+    modo = RECODIFICAR_IMAGENES if modo is None else modo
+    extension_original = os.path.splitext(origen)[1].lower()
+    copia = destino_sin_extension + extension_original
+    if modo not in ('png', 'webp') or extension_original in ('.jpg', '.jpeg'):
+        shutil.copyfile(origen, copia)
+        return copia
+    try:
+        from PIL import Image
+    except ImportError:
+        shutil.copyfile(origen, copia)
+        return copia
+
+    destino = destino_sin_extension + ('.png' if modo == 'png' else '.webp')
+    # Como en miniaturas.py: se escribe en un temporal para no dejar un archivo a medias si falla
+    ruta_temporal = f"{destino}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with Image.open(origen) as imagen:
+            if getattr(imagen, 'is_animated', False):
+                # Los GIF animados se conservan tal cual
+                shutil.copyfile(origen, copia)
+                return copia
+            if modo == 'png':
+                imagen.save(ruta_temporal, 'PNG', optimize=True)
+            else:
+                imagen.save(ruta_temporal, 'WEBP', lossless=True, method=6)
+        recodificada_menor = os.path.getsize(ruta_temporal) < os.path.getsize(origen)
+    except (OSError, ValueError):
+        recodificada_menor = False
+    if not recodificada_menor:
+        if os.path.exists(ruta_temporal):
+            os.remove(ruta_temporal)
+        shutil.copyfile(origen, copia)
+        return copia
+    os.replace(ruta_temporal, destino)
+    return destino
@@ -0,0 +1,114 @@
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableWidget,
+    QTableWidgetItem, QHeaderView, QAbstractItemView, QFileDialog, QMessageBox
+)
+from PyQt6.QtCore import Qt, QTimer
+
+import coin_data_manager
+import instrumentacion
+
+class DiagnosticsPanel(QDialog):
+    """Panel de diagnóstico que muestra los tiempos y contadores de la instrumentación."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Diagnóstico de Rendimiento")
+        self.setGeometry(150, 150, 900, 500)
+        self.init_ui()
+
+        # Refrescar la tabla periódicamente mientras el panel está abierto
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def init_ui(self):
+        main_layout = QVBoxLayout(self)
+
+        title_label = QLabel("Tiempos de las Operaciones")
+        title_label.setStyleSheet("font-size: 18px; font-weight: bold; color: #2C3E50;")
+        main_layout.addWidget(title_label)
+
+        self.timings_table = QTableWidget()
+        self.timings_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        headers = ["Operación", "Categoría", "Llamadas", "Total (ms)", "Media (ms)", "Máximo (ms)", "Última (ms)"]
+        self.timings_table.setColumnCount(len(headers))
+        self.timings_table.setHorizontalHeaderLabels(headers)
+        self.timings_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        main_layout.addWidget(self.timings_table)
+
+        self.counters_label = QLabel()
+        self.counters_label.setStyleSheet("color: #555;")
+        self.counters_label.setWordWrap(True)
+        main_layout.addWidget(self.counters_label)
+
+        self.query_cache_label = QLabel()
+        self.query_cache_label.setStyleSheet("color: #555;")
+        main_layout.addWidget(self.query_cache_label)
+
+        buttons_layout = QHBoxLayout()
+        export_button = QPushButton("Exportar Traza (Chrome)")
+        export_button.clicked.connect(self.export_trace)
+        reset_button = QPushButton("Reiniciar")
+        reset_button.clicked.connect(self.reset)
+        close_button = QPushButton("Cerrar")
+        close_button.clicked.connect(self.accept)
+        buttons_layout.addWidget(export_button)
+        buttons_layout.addWidget(reset_button)
+        buttons_layout.addStretch()
+        buttons_layout.addWidget(close_button)
+        main_layout.addLayout(buttons_layout)
+
+    def refresh(self):
+        """Vuelve a leer las estadísticas de la instrumentación."""
+        resumen = instrumentacion.obtener_resumen()
+        self.timings_table.setRowCount(len(resumen))
+        for row_idx, fila in enumerate(resumen):
+            valores = [
+                fila["nombre"], fila["categoria"], str(fila["llamadas"]),
+                f"{fila['total_ms']:.2f}", f"{fila['media_ms']:.2f}",
+                f"{fila['max_ms']:.2f}", f"{fila['ultimo_ms']:.2f}",
+            ]
+            for col_idx, valor in enumerate(valores):
+                item = QTableWidgetItem(valor)
+                if col_idx >= 2:
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.timings_table.setItem(row_idx, col_idx, item)
+
+        contadores = instrumentacion.obtener_contadores()
+        if contadores:
+            self.counters_label.setText("Contadores: " + ", ".join(f"{k} = {v}" for k, v in sorted(contadores.items())))
+        else:
+            self.counters_label.setText("Contadores: (ninguno)")
+
+        # La caché de búsquedas lleva sus propias métricas aunque la instrumentación esté desactivada
+        metricas = coin_data_manager.obtener_metricas_cache_consultas()
+        self.query_cache_label.setText(
+            f"Caché de búsquedas: {metricas['entradas']} entradas, {metricas['aciertos']} aciertos, "
+            f"{metricas['fallos']} fallos ({metricas['tasa_aciertos']:.0%}), "
+            f"{metricas['actualizaciones']} actualizaciones, {metricas['invalidaciones']} invalidaciones"
+        )
+
+    def export_trace(self):
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Exportar Traza", "coinvault_traza.json", "Traza JSON (*.json)"
+        )
+        if not file_path:
+            return
+        try:
+            num_eventos = instrumentacion.exportar_traza_chrome(file_path)
+            QMessageBox.information(self, "Traza Exportada",
+                                    f"Se exportaron {num_eventos} eventos. Ábrala en chrome://tracing o ui.perfetto.dev.")
+        except OSError as e:
+            QMessageBox.critical(self, "Error al Exportar", f"No se pudo guardar la traza: {e}")
+
+    def reset(self):
+        instrumentacion.reiniciar()
+        self.refresh()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.refresh_timer.start(1000)
+
+    def done(self, result):
+        # Se llama tanto al cerrar con el botón como con la X de la ventana
+        self.refresh_timer.stop()
+        super().done(result)
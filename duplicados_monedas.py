@@ -0,0 +1,140 @@
+from busqueda_difusa import normalizar_texto
+
+# =========================================================================
+# Detección de monedas duplicadas
+# =========================================================================
+# Al registrar muchas monedas seguidas es fácil dar de alta dos veces la misma
+# moneda en lugar de aumentar su cantidad. Comparar todas las parejas sería O(n²),
+# así que las monedas se agrupan primero por una clave de bloque (país, año, valor
+# nominal y ceca normalizados) y solo se comparan las de un mismo bloque. Las monedas
+# a las que les falta algún campo obligatorio de la clave no se agrupan: con un país o
+# un valor nominal vacío, coincidir en la clave no dice nada.
+#
+# Dentro de un bloque, las monedas con la misma firma (los campos de comparación
+# normalizados) son idénticas a efectos de la puntuación y se comparan una sola vez;
+# solo las firmas distintas se puntúan por parejas. La puntuación (0-1) es la
+# proporción ponderada de campos de comparación que coinciden entre los que ambas
+# monedas tienen rellenos; los campos vacíos no cuentan ni a favor ni en contra. Si
+# los campos comparables no suman PESO_MINIMO no hay pruebas y la puntuación es 0.
+# Las parejas que superan el umbral se unen en grupos (unión-búsqueda).
+# =========================================================================
+
+# Puntuación mínima (0-1) para proponer dos monedas como duplicadas
+UMBRAL_DUPLICADO = 0.75
+# Peso mínimo de los campos comparables para poder puntuar una pareja
+PESO_MINIMO = 2.0
+# Diferencia relativa máxima para considerar iguales dos medidas (peso, diámetro...)
+TOLERANCIA_MEDIDAS = 0.02
+
+
+def normalizar_valor(valor):
+    """Valor comparable: los números como float y los textos sin mayúsculas, acentos ni signos."""
+    if valor is None or valor == "":
+        return None
+    if isinstance(valor, bool):
+        return valor
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    texto = str(valor).strip().replace(',', '.')
+    try:
+        return float(texto)
+    except ValueError:
+        return normalizar_texto(valor) or None
+
+
+def _iguales(a, b):
+    if isinstance(a, float) and isinstance(b, float):
+        return abs(a - b) <= TOLERANCIA_MEDIDAS * max(abs(a), abs(b))
+    return a == b
+
+
+def puntuar(firma_a, firma_b, pesos, peso_minimo=PESO_MINIMO):
+    """
+    Puntuación (0-1) de dos firmas (tuplas de valores normalizados en el orden de 'pesos').
+    Es 0 si los campos que ambas tienen rellenos no suman 'peso_minimo'.
+    """
+    total = 0.0
+    coincidencias = 0.0
+    for a, b, peso in zip(firma_a, firma_b, pesos):
+        if a is None or b is None:
+            continue
+        total += peso
+        if _iguales(a, b):
+            coincidencias += peso
+    # Sin campos suficientes que comparar no hay pruebas de que sean la misma moneda
+    if not total or total < peso_minimo:
+        return 0.0
+    return coincidencias / total
+
+
+class _UnionBusqueda:
+    def __init__(self, n):
+        self.padre = list(range(n))
+
+    def raiz(self, i):
+        while self.padre[i] != i:
+            self.padre[i] = self.padre[self.padre[i]]
+            i = self.padre[i]
+        return i
+
+    def unir(self, i, j):
+        self.padre[self.raiz(i)] = self.raiz(j)
+
+
+def agrupar_en_bloques(n, valores_campo, campos_bloque, campos_obligatorios=None):
+    """
+    Retorna {clave de bloque: [posiciones]} de los bloques con más de una moneda.
+    Solo lee las columnas de 'campos_bloque' (valores_campo(campo) itera una columna).
+    Las monedas con vacío alguno de 'campos_obligatorios' (por defecto, todos los
+    campos de bloque) no se agrupan.
+    """
+    campos_obligatorios = campos_bloque if campos_obligatorios is None else campos_obligatorios
+    indices_obligatorios = [campos_bloque.index(campo) for campo in campos_obligatorios]
+    columnas = [valores_campo(campo) for campo in campos_bloque]
+    bloques = {}
+    for posicion, valores in zip(range(n), zip(*columnas)):
+        clave = tuple(normalizar_valor(valor) for valor in valores)
+        if all(clave[i] is not None for i in indices_obligatorios):
+            bloques.setdefault(clave, []).append(posicion)
+    return {clave: posiciones for clave, posiciones in bloques.items() if len(posiciones) > 1}
+
+
+def buscar_duplicados(n, valores_campo, obtener_moneda, campos_bloque, pesos_comparacion,
+                      umbral=UMBRAL_DUPLICADO, campos_obligatorios=None):
+    """
+    Busca grupos de posibles duplicados entre las 'n' monedas de la colección.
+    'obtener_moneda(posicion)' retorna una moneda; solo se piden las de bloques con
+    más de una moneda. 'pesos_comparacion' es {campo: peso}. 'campos_obligatorios'
+    son los campos de bloque que no pueden estar vacíos (ver agrupar_en_bloques).
+    Retorna [{"posiciones": [...], "puntuacion": float}] ordenada de mayor a menor
+    puntuación; la puntuación de un grupo es la menor de las parejas que lo unieron.
+    """
+    campos = list(pesos_comparacion)
+    pesos = [pesos_comparacion[campo] for campo in campos]
+    grupos = []
+    for posiciones in agrupar_en_bloques(n, valores_campo, campos_bloque, campos_obligatorios).values():
+        por_firma = {}
+        for posicion in posiciones:
+            moneda = obtener_moneda(posicion)
+            firma = tuple(normalizar_valor(moneda.get(campo)) for campo in campos)
+            por_firma.setdefault(firma, []).append(posicion)
+        # Una firma sin campos suficientes para puntuar no puede coincidir con nada
+        # (ni siquiera con monedas de su misma firma)
+        firmas = [firma for firma in por_firma if puntuar(firma, firma, pesos) >= umbral]
+        uniones = _UnionBusqueda(len(firmas))
+        puntuaciones = [1.0] * len(firmas)
+        for i in range(len(firmas)):
+            for j in range(i + 1, len(firmas)):
+                puntuacion = puntuar(firmas[i], firmas[j], pesos)
+                if puntuacion >= umbral:
+                    minima = min(puntuacion, puntuaciones[uniones.raiz(i)], puntuaciones[uniones.raiz(j)])
+                    uniones.unir(i, j)
+                    puntuaciones[uniones.raiz(j)] = minima
+        componentes = {}
+        for i, firma in enumerate(firmas):
+            componentes.setdefault(uniones.raiz(i), []).extend(por_firma[firma])
+        for raiz, miembros in componentes.items():
+            if len(miembros) > 1:
+                grupos.append({"posiciones": sorted(miembros), "puntuacion": round(puntuaciones[raiz], 3)})
+    grupos.sort(key=lambda grupo: (-grupo["puntuacion"], grupo["posiciones"][0]))
+    return grupos
@@ -0,0 +1,248 @@
+import json
+import math
+import os
+
+from bloqueo_archivo import BloqueoArchivo
+
+# =========================================================================
+# Hash perceptual de imágenes para detectar fotos duplicadas
+# =========================================================================
+# Cada imagen se reduce a 32x32 en escala de grises, se calcula la DCT y se toman
+# los 8x8 coeficientes de frecuencia más baja: cada bit del hash (pHash, 64 bits)
+# indica si el coeficiente está por encima de la mediana. Dos fotos de la misma
+# moneda guardadas con otro nombre, otro formato, otro tamaño o recomprimidas
+# tienen hashes a muy poca distancia de Hamming; fotos distintas, no.
+#
+# Los hashes se guardan en ARCHIVO_HASHES, indexados por la ruta de la imagen
+# relativa al directorio de la aplicación (como en los campos foto_*), junto con
+# la fecha de modificación de la imagen para recalcularlos si cambia.
+# La búsqueda de parecidos usa un árbol BK: solo visita las ramas cuya distancia
+# puede estar dentro del radio, en lugar de comparar con todas las imágenes.
+# =========================================================================
+
+DIRECTORIO_BASE = os.path.dirname(os.path.abspath(__file__))
+ARCHIVO_HASHES = os.path.join(DIRECTORIO_BASE, 'assets', 'hashes_imagenes.json')
+# Distancia de Hamming máxima (de 64 bits) para considerar dos fotos posibles duplicados
+UMBRAL_DUPLICADO = 8
+
+_LADO_REDUCIDO = 32
+_LADO_HASH = 8
+# Cosenos de la DCT-II: _COSENOS[u][x] = cos((2x + 1) u π / 64)
+_COSENOS = [[math.cos((2 * x + 1) * u * math.pi / (2 * _LADO_REDUCIDO)) for x in range(_LADO_REDUCIDO)]
+            for u in range(_LADO_HASH)]
+
+
+def _pixeles_grises(ruta_imagen):
+    """Retorna los 32x32 píxeles en escala de grises de la imagen, por filas."""
+    try:
+        from PIL import Image
+    except ImportError:
+        Image = None
+    if Image is not None:
+        with Image.open(ruta_imagen) as imagen:
+            reducida = imagen.convert('L').resize((_LADO_REDUCIDO, _LADO_REDUCIDO), Image.Resampling.LANCZOS)
+            return list(reducida.getdata())
+    from PyQt6.QtCore import Qt
+    from PyQt6.QtGui import QImage
+    imagen = QImage(ruta_imagen)
+    if imagen.isNull():
+        raise ValueError(f"No se pudo decodificar la imagen '{ruta_imagen}'.")
+    reducida = imagen.convertToFormat(QImage.Format.Format_Grayscale8).scaled(
+        _LADO_REDUCIDO, _LADO_REDUCIDO, Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation)
+    return [reducida.pixelColor(x, y).red() for y in range(_LADO_REDUCIDO) for x in range(_LADO_REDUCIDO)]
+
+
+def calcular_phash(ruta_imagen):
+    """pHash de 64 bits de una imagen. Lanza OSError/ValueError si no se puede decodificar."""
+    pixeles = _pixeles_grises(ruta_imagen)
+    filas = [pixeles[y * _LADO_REDUCIDO:(y + 1) * _LADO_REDUCIDO] for y in range(_LADO_REDUCIDO)]
+    # DCT separable: primero por filas (solo las 8 frecuencias bajas) y luego por columnas
+    por_filas = [[sum(c * p for c, p in zip(_COSENOS[u], fila)) for u in range(_LADO_HASH)] for fila in filas]
+    coeficientes = [sum(_COSENOS[v][y] * por_filas[y][u] for y in range(_LADO_REDUCIDO))
+                    for v in range(_LADO_HASH) for u in range(_LADO_HASH)]
+    # El coeficiente de continua (brillo medio) no se usa para la mediana
+    mediana = sorted(coeficientes[1:])[len(coeficientes[1:]) // 2]
+    valor = 0
+    for coeficiente in coeficientes:
+        valor = (valor << 1) | (coeficiente > mediana)
+    return valor
+
+
+def distancia(hash_a, hash_b):
+    """Distancia de Hamming entre dos hashes."""
+    return (hash_a ^ hash_b).bit_count()
+
+
+class ArbolBK:
+    """Árbol BK sobre la distancia de Hamming para buscar hashes parecidos."""
+    def __init__(self):
+        # Cada nodo: [hash, [valores con ese hash], {distancia: nodo hijo}]
+        self._raiz = None
+        self._tamano = 0
+
+    def __len__(self):
+        return self._tamano
+
+    def anadir(self, hash_imagen, valor):
+        self._tamano += 1
+        if self._raiz is None:
+            self._raiz = [hash_imagen, [valor], {}]
+            return
+        nodo = self._raiz
+        while True:
+            d = distancia(hash_imagen, nodo[0])
+            if d == 0:
+                nodo[1].append(valor)
+                return
+            hijo = nodo[2].get(d)
+            if hijo is None:
+                nodo[2][d] = [hash_imagen, [valor], {}]
+                return
+            nodo = hijo
+
+    def buscar(self, hash_imagen, radio):
+        """Retorna [(distancia, valor)] de los hashes a distancia <= radio, de menor a mayor distancia."""
+        resultados = []
+        pendientes = [self._raiz] if self._raiz is not None else []
+        while pendientes:
+            nodo = pendientes.pop()
+            d = distancia(hash_imagen, nodo[0])
+            if d <= radio:
+                resultados.extend((d, valor) for valor in nodo[1])
+            # Desigualdad triangular: solo los hijos a distancia en [d - radio, d + radio] pueden servir
+            for distancia_hijo, hijo in nodo[2].items():
+                if d - radio <= distancia_hijo <= d + radio:
+                    pendientes.append(hijo)
+        resultados.sort(key=lambda resultado: resultado[0])
+        return resultados
+
+
+def clave_imagen(ruta_imagen):
+    """Clave de una imagen en el almacén: su ruta relativa al directorio de la aplicación."""
+    ruta = os.path.abspath(ruta_imagen if os.path.isabs(ruta_imagen) else os.path.join(DIRECTORIO_BASE, ruta_imagen))
+    return os.path.relpath(ruta, DIRECTORIO_BASE)
+
+
+class AlmacenHashes:
+    """Hashes perceptuales de las imágenes guardados en un archivo JSON, con su árbol BK en memoria."""
+    def __init__(self, archivo=ARCHIVO_HASHES):
+        self.archivo = archivo
+        self._hashes = None # clave -> {"phash": "hex", "mtime": float}
+        self._firma = None
+        self._arbol = None
+
+    def _bloqueo(self):
+        return BloqueoArchivo(f"{self.archivo}.lock")
+
+    def _firma_archivo(self):
+        try:
+            estado = os.stat(self.archivo)
+            return estado.st_mtime_ns, estado.st_size
+        except FileNotFoundError:
+            return None
+
+    def _cargar(self):
+        """Lee el archivo si ha cambiado desde la última lectura (p. ej. por otra instancia)."""
+        firma = self._firma_archivo()
+        if self._hashes is not None and firma == self._firma:
+            return
+        try:
+            with open(self.archivo, 'r', encoding='utf-8') as f:
+                self._hashes = json.load(f)
+        except FileNotFoundError:
+            self._hashes = {}
+        self._firma = firma
+        self._arbol = None
+
+    def _obtener_arbol(self):
+        self._cargar()
+        if self._arbol is None:
+            self._arbol = ArbolBK()
+            for clave, entrada in self._hashes.items():
+                self._arbol.anadir(int(entrada["phash"], 16), clave)
+        return self._arbol
+
+    def obtener(self, ruta_imagen):
+        """Hash guardado de una imagen, o None si no lo hay o la imagen ha cambiado desde que se calculó."""
+        self._cargar()
+        entrada = self._hashes.get(clave_imagen(ruta_imagen))
+        if entrada is None:
+            return None
+        try:
+            if os.path.getmtime(os.path.join(DIRECTORIO_BASE, clave_imagen(ruta_imagen))) != entrada["mtime"]:
+                return None
+        except OSError:
+            return None
+        return int(entrada["phash"], 16)
+
+    def guardar(self, hashes):
+        """Guarda varios hashes {ruta_imagen: hash} con una sola escritura."""
+        if not hashes:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.archivo)), exist_ok=True)
+        with self._bloqueo():
+            self._hashes = None
+            self._cargar()
+            for ruta_imagen, valor in hashes.items():
+                clave = clave_imagen(ruta_imagen)
+                self._hashes[clave] = {"phash": f"{valor:016x}",
+                                       "mtime": os.path.getmtime(os.path.join(DIRECTORIO_BASE, clave))}
+            ruta_temporal = f"{self.archivo}.tmp"
+            with open(ruta_temporal, 'w', encoding='utf-8') as f:
+                json.dump(self._hashes, f, ensure_ascii=False)
+            os.replace(ruta_temporal, self.archivo)
+            self._firma = self._firma_archivo()
+            self._arbol = None
+
+    def buscar_parecidas(self, valor, radio=UMBRAL_DUPLICADO, excluir=None):
+        """Retorna [(distancia, clave de la imagen)] de las imágenes con un hash parecido."""
+        excluir = clave_imagen(excluir) if excluir else None
+        return [(d, clave) for d, clave in self._obtener_arbol().buscar(valor, radio) if clave != excluir]
+
+    def buscar_grupos_duplicados(self, claves=None, radio=UMBRAL_DUPLICADO):
+        """
+        Agrupa las imágenes (todas, o solo las de 'claves') que son posibles duplicados
+        entre sí. Retorna una lista de grupos (listas de claves) con más de una imagen.
+        """
+        self._cargar()
+        arbol = self._obtener_arbol()
+        candidatas = set(self._hashes if claves is None else (clave_imagen(c) for c in claves)) & set(self._hashes)
+        grupos = []
+        vistas = set()
+        for clave in sorted(candidatas):
+            if clave in vistas:
+                continue
+            grupo = [clave]
+            vistas.add(clave)
+            pendientes = [clave]
+            while pendientes:
+                actual = pendientes.pop()
+                for _, parecida in arbol.buscar(int(self._hashes[actual]["phash"], 16), radio):
+                    if parecida in candidatas and parecida not in vistas:
+                        vistas.add(parecida)
+                        grupo.append(parecida)
+                        pendientes.append(parecida)
+            if len(grupo) > 1:
+                grupos.append(sorted(grupo))
+        return grupos
+
+
+_almacen = None
+
+def almacen():
+    """Almacén de hashes compartido por la aplicación."""
+    global _almacen
+    if _almacen is None:
+        _almacen = AlmacenHashes()
+    return _almacen
+
+
+def registrar_imagen(ruta_imagen):
+    """
+    Calcula y guarda el hash de una imagen recién importada y retorna las imágenes
+    ya existentes que parecen la misma foto: [(distancia, clave de la imagen)].
+    """
+    valor = calcular_phash(ruta_imagen)
+    parecidas = almacen().buscar_parecidas(valor, excluir=ruta_imagen)
+    almacen().guardar({ruta_imagen: valor})
+    return parecidas
@@ -0,0 +1,113 @@
+import sys
+import time
+
+# =========================================================================
+# Historial de cambios para deshacer/rehacer
+# =========================================================================
+# Cada comando guarda solo los cambios que hizo, con el mismo formato que los
+# cambios pendientes de coin_data_manager:
+#   ('anadir', codigo, moneda)
+#   ('actualizar', codigo, {campo: (valor_anterior, valor_nuevo)})
+#   ('eliminar', codigo, moneda)
+# Las monedas se guardan por referencia (no se copian), así que una edición de un
+# campo ocupa lo que ocupan sus dos valores y no una copia de la colección.
+#
+# Las versiones se numeran de forma absoluta: la versión N es el estado tras aplicar
+# los N primeros comandos registrados, aunque los más antiguos ya se hayan descartado.
+# =========================================================================
+
+# Límite de comandos y de memoria estimada del historial; al superarlos se descartan los más antiguos
+MAX_COMANDOS = 1000
+MAX_MEMORIA_BYTES = 32 * 1024 * 1024
+
+
+def _estimar_tamano(cambios):
+    """Estimación aproximada de la memoria retenida por una lista de cambios."""
+    tamano = 0
+    for tipo, codigo, datos in cambios:
+        tamano += 100 + sys.getsizeof(codigo)
+        if tipo == 'actualizar':
+            for anterior, nuevo in datos.values():
+                tamano += sys.getsizeof(anterior) + sys.getsizeof(nuevo)
+        else:
+            tamano += sys.getsizeof(datos) + sum(sys.getsizeof(valor) for valor in datos.values())
+    return tamano
+
+
+class Comando:
+    __slots__ = ("descripcion", "cambios", "marca_tiempo", "tamano")
+
+    def __init__(self, descripcion, cambios):
+        self.descripcion = descripcion
+        self.cambios = cambios
+        self.marca_tiempo = time.time()
+        self.tamano = _estimar_tamano(cambios)
+
+
+class HistorialCambios:
+    """Pila de comandos aplicados (para deshacer) y deshechos (para rehacer)."""
+    def __init__(self, max_comandos=MAX_COMANDOS, max_memoria=MAX_MEMORIA_BYTES):
+        self.max_comandos = max_comandos
+        self.max_memoria = max_memoria
+        self._comandos = []
+        # Número de comandos de _comandos que están aplicados
+        self._posicion = 0
+        # Número de comandos antiguos descartados (para mantener la numeración de versiones)
+        self._descartados = 0
+        self._memoria = 0
+
+    @property
+    def version_actual(self):
+        return self._descartados + self._posicion
+
+    @property
+    def version_minima(self):
+        return self._descartados
+
+    @property
+    def version_maxima(self):
+        return self._descartados + len(self._comandos)
+
+    def registrar(self, descripcion, cambios):
+        """Añade un comando ya aplicado. Descarta lo que se pudiera rehacer."""
+        for comando in self._comandos[self._posicion:]:
+            self._memoria -= comando.tamano
+        del self._comandos[self._posicion:]
+        comando = Comando(descripcion, cambios)
+        self._comandos.append(comando)
+        self._memoria += comando.tamano
+        self._posicion += 1
+        while len(self._comandos) > 1 and (len(self._comandos) > self.max_comandos or self._memoria > self.max_memoria):
+            antiguo = self._comandos.pop(0)
+            self._memoria -= antiguo.tamano
+            self._posicion -= 1
+            self._descartados += 1
+
+    def comando_a_deshacer(self):
+        return self._comandos[self._posicion - 1] if self._posicion > 0 else None
+
+    def comando_a_rehacer(self):
+        return self._comandos[self._posicion] if self._posicion < len(self._comandos) else None
+
+    def marcar_deshecho(self):
+        self._posicion -= 1
+
+    def marcar_rehecho(self):
+        self._posicion += 1
+
+    def vaciar(self):
+        self._descartados += len(self._comandos)
+        self._comandos.clear()
+        self._posicion = 0
+        self._memoria = 0
+
+    def listar(self):
+        """Retorna [(version, descripcion, marca_tiempo, aplicado)]; 'version' es la resultante de aplicar el comando."""
+        return [
+            (self._descartados + i + 1, comando.descripcion, comando.marca_tiempo, i < self._posicion)
+            for i, comando in enumerate(self._comandos)
+        ]
+
+    def obtener_metricas(self):
+        return {"comandos": len(self._comandos), "memoria_bytes": self._memoria,
+                "version_actual": self.version_actual}
@@ -0,0 +1,85 @@
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QListWidget, QListWidgetItem, QMessageBox
+)
+from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtGui import QFont
+import time
+
+import coin_data_manager
+
+class HistoryDialog(QDialog):
+    """Lista los cambios del historial y permite volver a cualquier versión anterior (o posterior)."""
+    # Se emite después de cambiar de versión para que la ventana principal refresque las pestañas
+    version_changed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Historial de Cambios")
+        self.setGeometry(200, 200, 600, 450)
+        self.init_ui()
+
+    def init_ui(self):
+        main_layout = QVBoxLayout(self)
+
+        title_label = QLabel("Historial de Cambios")
+        title_label.setStyleSheet("font-size: 18px; font-weight: bold; color: #2C3E50;")
+        main_layout.addWidget(title_label)
+
+        self.history_list = QListWidget()
+        self.history_list.itemDoubleClicked.connect(self.go_to_selected_version)
+        main_layout.addWidget(self.history_list)
+
+        buttons_layout = QHBoxLayout()
+        go_button = QPushButton("Ir a esta Versión")
+        go_button.clicked.connect(self.go_to_selected_version)
+        close_button = QPushButton("Cerrar")
+        close_button.clicked.connect(self.accept)
+        buttons_layout.addWidget(go_button)
+        buttons_layout.addStretch()
+        buttons_layout.addWidget(close_button)
+        main_layout.addLayout(buttons_layout)
+
+    def refresh(self):
+        """Vuelve a leer el historial. Los cambios deshechos se muestran en gris."""
+        version_actual, comandos = coin_data_manager.obtener_historial()
+        self.history_list.clear()
+        version_inicial = comandos[0][0] - 1 if comandos else version_actual
+        item = QListWidgetItem(f"Versión {version_inicial} — (estado inicial)")
+        item.setData(Qt.ItemDataRole.UserRole, version_inicial)
+        self.history_list.addItem(item)
+        for version, descripcion, marca_tiempo, aplicado in comandos:
+            hora = time.strftime("%H:%M:%S", time.localtime(marca_tiempo))
+            item = QListWidgetItem(f"Versión {version} — {descripcion} ({hora})")
+            item.setData(Qt.ItemDataRole.UserRole, version)
+            if not aplicado:
+                item.setForeground(Qt.GlobalColor.gray)
+            self.history_list.addItem(item)
+        for row in range(self.history_list.count()):
+            item = self.history_list.item(row)
+            if item.data(Qt.ItemDataRole.UserRole) == version_actual:
+                font = QFont(item.font())
+                font.setBold(True)
+                item.setFont(font)
+                self.history_list.setCurrentItem(item)
+
+    def go_to_selected_version(self):
+        item = self.history_list.currentItem()
+        if item is None:
+            return
+        try:
+            omitidos = coin_data_manager.ir_a_version(item.data(Qt.ItemDataRole.UserRole))
+        except coin_data_manager.ConflictoDeEdicion as e:
+            QMessageBox.warning(self, "Conflicto de Edición", str(e))
+            omitidos = 0
+        except (OSError, TimeoutError) as e:
+            QMessageBox.critical(self, "Error", f"No se pudo guardar la colección: {e}")
+            return
+        if omitidos:
+            QMessageBox.information(self, "Cambios Omitidos",
+                                    f"Se omitieron {omitidos} cambios porque otra instancia ya los había modificado.")
+        self.refresh()
+        self.version_changed.emit()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
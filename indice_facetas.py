@@ -0,0 +1,161 @@
+import bisect
+
+# =========================================================================
+# Índice de facetas con mapas de bits
+# =========================================================================
+# Para cada faceta (país, ceca, estado...) y cada uno de sus valores se guarda un
+# mapa de bits con las posiciones de las monedas que lo tienen. Los mapas de bits
+# son enteros de Python: la intersección (&) y el recuento (bit_count) se hacen en
+# C sobre palabras de 64 bits, así que contar las facetas de un conjunto de
+# resultados no requiere volver a recorrer las monedas.
+# =========================================================================
+
+_BITS = tuple(1 << i for i in range(8))
+
+
+def mapa_de_posiciones(posiciones, n):
+    """Construye el mapa de bits (entero) de un iterable de posiciones en [0, n)."""
+    bits = bytearray((n + 7) // 8)
+    for posicion in posiciones:
+        bits[posicion >> 3] |= _BITS[posicion & 7]
+    return int.from_bytes(bits, 'little')
+
+
+def quitar_posiciones(mapa, posiciones):
+    """
+    Quita de un mapa de bits las posiciones indicadas (lista ordenada de menor a mayor)
+    y desplaza hacia abajo los bits siguientes, como al eliminar esas monedas de la
+    colección. Se parte el mapa por la posición central de las que se quitan, así que
+    cada nivel de la recursión recorre el mapa una vez: O(n/64 · log k) palabras.
+    """
+    return _quitar_posiciones(mapa, posiciones, 0, len(posiciones), 0)
+
+
+def _quitar_posiciones(mapa, posiciones, desde, hasta, base):
+    # 'mapa' tiene sus bits numerados desde 'base'; se quitan posiciones[desde:hasta]
+    # Las posiciones por encima del último bit activo no desplazan nada
+    hasta = bisect.bisect_left(posiciones, base + mapa.bit_length(), desde, hasta)
+    if desde >= hasta:
+        return mapa
+    medio = (desde + hasta) // 2
+    corte = posiciones[medio] - base
+    bajo = _quitar_posiciones(mapa & ((1 << corte) - 1), posiciones, desde, medio, base)
+    alto = _quitar_posiciones(mapa >> (corte + 1), posiciones, medio + 1, hasta, base + corte + 1)
+    return bajo | (alto << (corte - (medio - desde)))
+
+
+def iterar_posiciones(mapa):
+    """Genera las posiciones de los bits activos de un mapa, en orden creciente."""
+    datos = mapa.to_bytes((mapa.bit_length() + 7) // 8, 'little')
+    for indice_byte, byte in enumerate(datos):
+        if byte:
+            base = indice_byte << 3
+            for bit in range(8):
+                if byte & _BITS[bit]:
+                    yield base + bit
+
+
+class IndiceFacetas:
+    """
+    Mapas de bits por faceta y valor. 'facetas' es un diccionario
+    {nombre_faceta: (campo, funcion_valor)}, donde funcion_valor convierte el valor
+    del campo en el valor de la faceta, o en None si la moneda no se cuenta en ella.
+    """
+    def __init__(self, facetas):
+        self.facetas = facetas
+        self.n = 0
+        self.mapas = {nombre: {} for nombre in facetas}
+        # Versión de los datos con la que se corresponde el índice
+        self.version = None
+
+    def construir(self, n, valores_campo):
+        """Construye el índice en una pasada por campo. valores_campo(campo) itera la columna."""
+        self.n = n
+        tamano = (n + 7) // 8
+        for nombre, (campo, funcion_valor) in self.facetas.items():
+            bits_por_valor = {}
+            for posicion, valor in enumerate(valores_campo(campo)):
+                valor_faceta = funcion_valor(valor)
+                if valor_faceta is None:
+                    continue
+                bits = bits_por_valor.get(valor_faceta)
+                if bits is None:
+                    bits = bits_por_valor[valor_faceta] = bytearray(tamano)
+                bits[posicion >> 3] |= _BITS[posicion & 7]
+            self.mapas[nombre] = {valor: int.from_bytes(bits, 'little') for valor, bits in bits_por_valor.items()}
+
+    def todos(self):
+        return (1 << self.n) - 1
+
+    def _poner(self, nombre, valor_faceta, posicion):
+        if valor_faceta is not None:
+            mapas = self.mapas[nombre]
+            mapas[valor_faceta] = mapas.get(valor_faceta, 0) | (1 << posicion)
+
+    def _quitar(self, nombre, valor_faceta, posicion):
+        mapas = self.mapas[nombre]
+        if valor_faceta in mapas:
+            mapa = mapas[valor_faceta] & ~(1 << posicion)
+            if mapa:
+                mapas[valor_faceta] = mapa
+            else:
+                del mapas[valor_faceta]
+
+    def anadir(self, moneda):
+        """Añade una moneda al final (posición n)."""
+        for nombre, (campo, funcion_valor) in self.facetas.items():
+            self._poner(nombre, funcion_valor(moneda.get(campo)), self.n)
+        self.n += 1
+
+    def actualizar(self, posicion, diferencias):
+        """Aplica {campo: (valor_anterior, valor_nuevo)} a la moneda de la posición indicada."""
+        for nombre, (campo, funcion_valor) in self.facetas.items():
+            if campo in diferencias:
+                anterior, nuevo = diferencias[campo]
+                self._quitar(nombre, funcion_valor(anterior), posicion)
+                self._poner(nombre, funcion_valor(nuevo), posicion)
+
+    def eliminar(self, posiciones):
+        """Quita las monedas de 'posiciones' (ordenadas) y renumera las siguientes."""
+        for nombre, mapas in self.mapas.items():
+            compactados = {}
+            for valor, mapa in mapas.items():
+                mapa = quitar_posiciones(mapa, posiciones)
+                if mapa:
+                    compactados[valor] = mapa
+            self.mapas[nombre] = compactados
+        self.n -= len(posiciones)
+
+    def mapa_filtros(self, filtros, excluir=None):
+        """
+        Mapa de bits de las monedas que cumplen los filtros {faceta: [valores]}:
+        OR entre los valores de una faceta y AND entre facetas. 'excluir' omite una
+        faceta (para contar sus valores sin que su propia selección los oculte).
+        """
+        resultado = self.todos()
+        for nombre, valores in (filtros or {}).items():
+            if nombre == excluir or not valores:
+                continue
+            mapas = self.mapas.get(nombre, {})
+            union = 0
+            for valor in valores:
+                union |= mapas.get(valor, 0)
+            resultado &= union
+        return resultado
+
+    def contar(self, base, filtros=None):
+        """
+        Recuentos {faceta: {valor: n}} dentro del conjunto 'base' (mapa de bits) y los
+        filtros. Cada faceta se cuenta sin aplicar su propio filtro, de modo que se
+        siguen viendo los demás valores que se pueden añadir a la selección.
+        """
+        conteos = {}
+        for nombre, mapas in self.mapas.items():
+            conjunto = base & self.mapa_filtros(filtros, excluir=nombre)
+            conteos_faceta = {}
+            for valor, mapa in mapas.items():
+                cantidad = (mapa & conjunto).bit_count()
+                if cantidad:
+                    conteos_faceta[valor] = cantidad
+            conteos[nombre] = conteos_faceta
+        return conteos
@@ -0,0 +1,180 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# =========================================================================
+# Instrumentación opcional de las rutas críticas de la aplicación
+# =========================================================================
+# Se activa con la variable de entorno COINVAULT_INSTRUMENTACION=1 (o llamando a
+# activar()). Mientras está desactivada, medir() retorna un contexto vacío y las
+# funciones instrumentadas solo pagan una comprobación de un booleano.
+#
+# Los tiempos se acumulan por nombre (llamadas, total, máximo, último) y cada
+# medición se guarda también como evento para exportarla en formato Chrome Trace
+# (chrome://tracing o https://ui.perfetto.dev).
+# =========================================================================
+
+ACTIVADA = os.environ.get('COINVAULT_INSTRUMENTACION', '') not in ('', '0')
+
+# Número máximo de eventos que se conservan para la traza (los más antiguos se descartan)
+MAX_EVENTOS_TRAZA = 200000
+
+_bloqueo = threading.Lock()
+_eventos = deque(maxlen=MAX_EVENTOS_TRAZA)
+_estadisticas = {}
+_contadores = {}
+_origen = time.perf_counter()
+
+
+def activar():
+    global ACTIVADA
+    ACTIVADA = True
+
+
+def desactivar():
+    global ACTIVADA
+    ACTIVADA = False
+
+
+def reiniciar():
+    """Borra todas las mediciones, contadores y eventos registrados."""
+    with _bloqueo:
+        _eventos.clear()
+        _estadisticas.clear()
+        _contadores.clear()
+
+
+def _registrar(nombre, categoria, inicio, duracion):
+    with _bloqueo:
+        estadistica = _estadisticas.get(nombre)
+        if estadistica is None:
+            estadistica = {"categoria": categoria, "llamadas": 0, "total_ms": 0.0, "max_ms": 0.0, "ultimo_ms": 0.0}
+            _estadisticas[nombre] = estadistica
+        duracion_ms = duracion * 1000
+        estadistica["llamadas"] += 1
+        estadistica["total_ms"] += duracion_ms
+        estadistica["ultimo_ms"] = duracion_ms
+        if duracion_ms > estadistica["max_ms"]:
+            estadistica["max_ms"] = duracion_ms
+        _eventos.append(("X", nombre, categoria, inicio - _origen, duracion, threading.get_ident()))
+
+
+class _Medicion:
+    __slots__ = ("nombre", "categoria", "inicio")
+
+    def __init__(self, nombre, categoria):
+        self.nombre = nombre
+        self.categoria = categoria
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _registrar(self.nombre, self.categoria, self.inicio, time.perf_counter() - self.inicio)
+        return False
+
+
+class _MedicionVacia:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_MEDICION_VACIA = _MedicionVacia()
+
+
+def medir(nombre, categoria="general"):
+    """Contexto que mide el tiempo del bloque: 'with instrumentacion.medir("cargar_imagen", "imagenes"): ...'."""
+    if not ACTIVADA:
+        return _MEDICION_VACIA
+    return _Medicion(nombre, categoria)
+
+
+def contar(nombre, incremento=1):
+    """Incrementa un contador con nombre (solo si la instrumentación está activada)."""
+    if not ACTIVADA:
+        return
+    with _bloqueo:
+        _contadores[nombre] = _contadores.get(nombre, 0) + incremento
+        _eventos.append(("C", nombre, "contadores", time.perf_counter() - _origen, _contadores[nombre],
+                         threading.get_ident()))
+
+
+def instrumentar(funcion, nombre=None, categoria="general"):
+    """Envuelve una función para medir cada llamada. Las funciones ya instrumentadas no se vuelven a envolver."""
+    if getattr(funcion, '_instrumentada', False):
+        return funcion
+    nombre = nombre or getattr(funcion, '__qualname__', repr(funcion))
+
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        if not ACTIVADA:
+            return funcion(*args, **kwargs)
+        inicio = time.perf_counter()
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            _registrar(nombre, categoria, inicio, time.perf_counter() - inicio)
+
+    envoltura._instrumentada = True
+    return envoltura
+
+
+def instrumentar_modulo(modulo, nombres, categoria):
+    """
+    Reemplaza las funciones indicadas del módulo por versiones instrumentadas.
+    Como las llamadas internas del módulo buscan la función en sus globales,
+    también quedan medidas (por ejemplo, anadir_moneda -> guardar_coleccion).
+    """
+    for nombre in nombres:
+        funcion = getattr(modulo, nombre, None)
+        if callable(funcion):
+            setattr(modulo, nombre, instrumentar(funcion, f"{modulo.__name__}.{nombre}", categoria))
+
+
+def instrumentar_clase(clase, nombres, categoria):
+    """Instrumenta métodos de una clase. Debe llamarse antes de crear instancias que conecten señales a ellos."""
+    for nombre in nombres:
+        metodo = clase.__dict__.get(nombre)
+        if callable(metodo):
+            setattr(clase, nombre, instrumentar(metodo, f"{clase.__name__}.{nombre}", categoria))
+
+
+def obtener_resumen():
+    """Retorna una lista de estadísticas por nombre, ordenada por tiempo total descendente."""
+    with _bloqueo:
+        filas = [dict(nombre=nombre, **datos) for nombre, datos in _estadisticas.items()]
+    for fila in filas:
+        fila["media_ms"] = fila["total_ms"] / fila["llamadas"] if fila["llamadas"] else 0.0
+    return sorted(filas, key=lambda fila: fila["total_ms"], reverse=True)
+
+
+def obtener_contadores():
+    with _bloqueo:
+        return dict(_contadores)
+
+
+def exportar_traza_chrome(ruta):
+    """Guarda los eventos registrados en formato Chrome Trace (JSON) para analizarlos fuera de la aplicación."""
+    pid = os.getpid()
+    with _bloqueo:
+        eventos = list(_eventos)
+    traza = []
+    for tipo, nombre, categoria, inicio, valor, tid in eventos:
+        evento = {"name": nombre, "cat": categoria, "ph": tipo, "ts": inicio * 1e6, "pid": pid, "tid": tid}
+        if tipo == "X":
+            evento["dur"] = valor * 1e6
+        else:
+            evento["args"] = {"valor": valor}
+        traza.append(evento)
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump({"traceEvents": traza, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+    return len(traza)
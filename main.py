@@ -1,16 +1,41 @@
 from PyQt6.QtWidgets import QApplication, QMainWindow, QTabWidget, QVBoxLayout, QWidget, QMessageBox
 from PyQt6.QtCore import Qt, QTimer
-from PyQt6.QtGui import QIcon
+from PyQt6.QtGui import QIcon, QKeySequence, QShortcut
 import os
 import sys
+import threading
 import uuid # Necesario para generar nombres de archivo únicos para imágenes
 
-# Importar los módulos de las pestañas
-from add_coin_tab import AddCoinTab
-from collection_view_tab import CollectionViewTab
-from search_coin_tab import SearchCoinTab
-from statistics_tab import StatisticsTab
+# Los módulos de las pestañas se importan dentro de los métodos _crear_tab_*,
+# la primera vez que se abre cada pestaña, para no retrasar la aparición de la ventana.
 import coin_data_manager # Importar el módulo de gestión de datos de monedas
+import instrumentacion
+
+# Operaciones que se miden cuando la instrumentación está activada (COINVAULT_INSTRUMENTACION=1)
+FUNCIONES_DATOS_INSTRUMENTADAS = [
+    'cargar_coleccion', 'guardar_coleccion', 'anadir_moneda', 'actualizar_moneda', 'eliminar_moneda',
+    'buscar_monedas', 'buscar_monedas_pagina', 'obtener_moneda_por_id', 'generar_codigo_unico',
+    'obtener_conteo_monedas_unicas', 'obtener_conteo_monedas_total', 'obtener_conteo_paises_unicos',
+    'obtener_distribucion_por_pais', 'obtener_distribucion_por_ceca', 'obtener_distribucion_por_estado_conservacion',
+    'obtener_distribucion_desmonetizacion', 'obtener_distribucion_por_tipo', 'obtener_distribucion_por_orientacion',
+    'deshacer', 'rehacer', 'ir_a_version', 'actualizar_monedas', 'eliminar_monedas',
+    'buscar_monedas_duplicadas', 'fusionar_monedas', 'obtener_valoracion',
+]
+METODOS_PESTANAS_INSTRUMENTADOS = {
+    'CollectionViewTab': ['load_coins_to_table'],
+    'AddCoinTab': ['save_coin', 'load_and_copy_image'],
+    'SearchCoinTab': ['load_initial_data', 'display_results', '_load_next_page', 'perform_search', 'edit_selected_coin',
+                      'build_edit_dialog', 'bind_edit_dialog', 'save_edited_coin', 'delete_selected_coin',
+                      'save_batch_edit', 'delete_selected_coins_batch', 'show_duplicates_dialog',
+                      'merge_selected_duplicates'],
+    'StatisticsTab': ['update_statistics', '_render_visible_charts'],
+}
+
+def _instrumentar_pestana(clase):
+    """Instrumenta los métodos de refresco de una pestaña antes de crearla."""
+    if instrumentacion.ACTIVADA:
+        instrumentacion.instrumentar_clase(clase, METODOS_PESTANAS_INSTRUMENTADOS.get(clase.__name__, []), "pestanas")
+    return clase
 
 class TheCoinVaultApp(QMainWindow):
     def __init__(self):
@@ -20,6 +45,18 @@ class TheCoinVaultApp(QMainWindow):
         # Establecer el ícono de la aplicación. Asegúrate de que 'icono_app.png' exista en la carpeta 'assets'.
         self.setWindowIcon(QIcon(os.path.join('assets', 'icono_app.png'))) 
         
+        # Instrumentación opcional de las operaciones de datos y panel de diagnóstico (Ctrl+Shift+D)
+        self.diagnostics_panel = None
+        if instrumentacion.ACTIVADA:
+            instrumentacion.instrumentar_modulo(coin_data_manager, FUNCIONES_DATOS_INSTRUMENTADAS, "datos")
+            QShortcut(QKeySequence("Ctrl+Shift+D"), self).activated.connect(self.show_diagnostics_panel)
+
+        # Deshacer/rehacer cambios de la colección e historial de versiones (Ctrl+H)
+        self.history_dialog = None
+        QShortcut(QKeySequence.StandardKey.Undo, self).activated.connect(self.undo_last_change)
+        QShortcut(QKeySequence.StandardKey.Redo, self).activated.connect(self.redo_last_change)
+        QShortcut(QKeySequence("Ctrl+H"), self).activated.connect(self.show_history_dialog)
+
         # Cargar la colección de monedas al iniciar la aplicación
         # Al reiniciar el proyecto, no habrá un archivo the_coin_vault_collection.json,
         # así que la colección se inicializará vacía.
@@ -27,47 +64,194 @@ class TheCoinVaultApp(QMainWindow):
         
         self.init_ui()
 
+        # Vigilar el archivo de la colección y las imágenes para incorporar los cambios
+        # hechos por otras instancias o scripts sin recargar todo.
+        from collection_watcher import CollectionWatcher
+        self.collection_watcher = CollectionWatcher(self)
+        self.collection_watcher.coins_changed.connect(self.apply_external_changes)
+        self.collection_watcher.images_changed.connect(self.apply_image_changes)
+
+        # Versión diaria de la colección, cuando la ventana ya se ha mostrado. Se hace en
+        # un hilo aparte: lee el archivo de la colección, no los datos en memoria.
+        QTimer.singleShot(2000, lambda: threading.Thread(target=self.create_daily_version,
+                                                         name="version-diaria", daemon=True).start())
+
+    def create_daily_version(self):
+        """Guarda una versión de la colección si aún no hay ninguna de hoy. Se ejecuta fuera del hilo de la interfaz."""
+        try:
+            coin_data_manager.crear_version_diaria()
+        except (OSError, ValueError, TimeoutError) as e:
+            print(f"Advertencia: no se pudo guardar la versión diaria de la colección: {e}")
+
     def init_ui(self):
         """Inicializa la interfaz de usuario, incluyendo las pestañas y sus conexiones."""
         self.tab_widget = QTabWidget()
         self.setCentralWidget(self.tab_widget)
 
+        # Las pestañas se construyen de forma diferida: al inicio solo se añade un
+        # contenedor vacío por pestaña y su contenido real se crea la primera vez
+        # que el usuario la abre. Así el arranque no paga por pestañas que no se ven.
+        self.tab_mi_coleccion = None
+        self.tab_anadir_moneda = None
+        self.tab_buscar_moneda = None
+        self.tab_estadisticas = None
+
         # Establecer el orden correcto de las pestañas según lo solicitado
-        self.tab_mi_coleccion = CollectionViewTab()
-        self.tab_widget.addTab(self.tab_mi_coleccion, "Mi Colección")
+        # (título, método que construye la pestaña, método que refresca sus datos)
+        self._definiciones_pestanas = [
+            ("Mi Colección", self._crear_tab_mi_coleccion, 'load_coins_to_table'),
+            ("Añadir Moneda", self._crear_tab_anadir_moneda, None),
+            # Eliminado modify_delete_tab.py del constructor de TheCoinVaultApp
+            # y de las pestañas porque ahora se manejará desde search_coin_tab.py
+            ("Buscar Moneda", self._crear_tab_buscar_moneda, 'load_initial_data'),
+            ("Estadísticas", self._crear_tab_estadisticas, 'update_statistics'),
+        ]
+        self._contenedores_pestanas = []
+        self._pestanas_construidas = {}
+        # Índices de las pestañas cuyos datos han cambiado desde su último refresco
+        self._pestanas_pendientes = set()
 
-        self.tab_anadir_moneda = AddCoinTab()
-        self.tab_widget.addTab(self.tab_anadir_moneda, "Añadir Moneda")
+        for titulo, _, _ in self._definiciones_pestanas:
+            contenedor = QWidget()
+            contenedor_layout = QVBoxLayout(contenedor)
+            contenedor_layout.setContentsMargins(0, 0, 0, 0)
+            self._contenedores_pestanas.append(contenedor)
+            self.tab_widget.addTab(contenedor, titulo)
 
-        # Eliminado modify_delete_tab.py del constructor de TheCoinVaultApp
-        # y de las pestañas porque ahora se manejará desde search_coin_tab.py
-        
-        self.tab_buscar_moneda = SearchCoinTab()
-        self.tab_widget.addTab(self.tab_buscar_moneda, "Buscar Moneda")
+        self.tab_widget.currentChanged.connect(self._activar_pestana)
+        # Construir y cargar solo la pestaña visible al inicio
+        self._activar_pestana(self.tab_widget.currentIndex())
 
-        self.tab_estadisticas = StatisticsTab()
-        self.tab_widget.addTab(self.tab_estadisticas, "Estadísticas")
+    def _crear_tab_mi_coleccion(self):
+        from collection_view_tab import CollectionViewTab
+        self.tab_mi_coleccion = _instrumentar_pestana(CollectionViewTab)()
+        return self.tab_mi_coleccion
 
-        # Conectar señales para actualizar las tablas en otras pestañas
-        # cuando se añaden, modifican o eliminan monedas.
+    def _crear_tab_anadir_moneda(self):
+        from add_coin_tab import AddCoinTab
+        self.tab_anadir_moneda = _instrumentar_pestana(AddCoinTab)()
+        # Conectar señales para actualizar las demás pestañas cuando se añaden monedas
         self.tab_anadir_moneda.coin_added.connect(self.update_all_tabs_data)
-        # La señal de data_changed ahora viene de SearchCoinTab
-        self.tab_buscar_moneda.data_changed.connect(self.update_all_tabs_data)
+        return self.tab_anadir_moneda
+
+    def _crear_tab_buscar_moneda(self):
+        from search_coin_tab import SearchCoinTab
+        self.tab_buscar_moneda = _instrumentar_pestana(SearchCoinTab)()
+        # La señal de data_changed viene de SearchCoinTab cuando se modifica o elimina una moneda.
+        # La propia pestaña ya se ha recargado, por eso se excluye del refresco.
+        self.tab_buscar_moneda.data_changed.connect(
+            lambda: self.update_all_tabs_data(excluir=self.tab_buscar_moneda)
+        )
+        return self.tab_buscar_moneda
+
+    def _crear_tab_estadisticas(self):
+        from statistics_tab import StatisticsTab
+        self.tab_estadisticas = _instrumentar_pestana(StatisticsTab)()
+        return self.tab_estadisticas
+
+    def show_diagnostics_panel(self):
+        """Muestra el panel con los tiempos medidos por la instrumentación."""
+        from diagnostics_panel import DiagnosticsPanel
+        if self.diagnostics_panel is None:
+            self.diagnostics_panel = DiagnosticsPanel(self)
+        self.diagnostics_panel.show()
+        self.diagnostics_panel.raise_()
 
-        # Cargar los datos iniciales en todas las pestañas después de que se hayan configurado.
-        # Se usa QTimer.singleShot para diferir la ejecución ligeramente,
-        # asegurando que la UI tenga tiempo de renderizarse completamente.
+    def _run_history_step(self, step, verb):
+        """Ejecuta deshacer() o rehacer() y refresca las pestañas."""
+        try:
+            resultado = step()
+        except coin_data_manager.ConflictoDeEdicion as e:
+            QMessageBox.warning(self, "Conflicto de Edición", str(e))
+            self.update_all_tabs_data()
+            return
+        except (OSError, TimeoutError) as e:
+            QMessageBox.critical(self, "Error", f"No se pudo guardar la colección: {e}")
+            return
+        if resultado is None:
+            self.statusBar().showMessage(f"No hay nada que {verb}.", 3000)
+            return
+        descripcion, omitidos = resultado
+        mensaje = f"{verb.capitalize()}: {descripcion}"
+        if omitidos:
+            mensaje += f" ({omitidos} cambios omitidos porque otra instancia los había modificado)"
+        self.statusBar().showMessage(mensaje, 5000)
         self.update_all_tabs_data()
 
-    def update_all_tabs_data(self):
+    def undo_last_change(self):
+        self._run_history_step(coin_data_manager.deshacer, "deshacer")
+
+    def redo_last_change(self):
+        self._run_history_step(coin_data_manager.rehacer, "rehacer")
+
+    def show_history_dialog(self):
+        """Muestra el historial de cambios para volver a una versión anterior."""
+        from history_dialog import HistoryDialog
+        if self.history_dialog is None:
+            self.history_dialog = HistoryDialog(self)
+            self.history_dialog.version_changed.connect(self.update_all_tabs_data)
+        self.history_dialog.show()
+        self.history_dialog.raise_()
+
+    def _activar_pestana(self, index):
+        """Construye la pestaña la primera vez que se muestra y la refresca si tiene cambios pendientes."""
+        if index < 0:
+            return
+        _, crear_pestana, metodo_refresco = self._definiciones_pestanas[index]
+        pestana = self._pestanas_construidas.get(index)
+        if pestana is None:
+            pestana = crear_pestana()
+            self._contenedores_pestanas[index].layout().addWidget(pestana)
+            self._pestanas_construidas[index] = pestana
+            self._pestanas_pendientes.add(index)
+
+        if index in self._pestanas_pendientes:
+            self._pestanas_pendientes.discard(index)
+            if metodo_refresco:
+                # Diferir ligeramente para que la pestaña se pinte antes de cargar los datos
+                QTimer.singleShot(0, getattr(pestana, metodo_refresco))
+
+    def apply_external_changes(self, added_ids, modified_ids, deleted_ids):
+        """
+        Lleva a las pestañas los cambios detectados en disco. Las pestañas que saben aplicar
+        cambios parciales (apply_coin_changes) reciben solo los códigos afectados; el resto
+        se marca para refrescarse cuando se muestre.
         """
-        Actualiza los datos en todas las pestañas que muestran la colección.
-        Se usa QTimer.singleShot para evitar problemas de actualización durante
-        la construcción inicial de la UI y para asegurar que los datos estén cargados.
+        for index, (_, _, metodo_refresco) in enumerate(self._definiciones_pestanas):
+            pestana = self._pestanas_construidas.get(index)
+            if pestana is None or not metodo_refresco:
+                continue
+            if hasattr(pestana, 'apply_coin_changes'):
+                pestana.apply_coin_changes(added_ids, modified_ids, deleted_ids)
+            else:
+                self._pestanas_pendientes.add(index)
+        self._activar_pestana(self.tab_widget.currentIndex())
+
+    def apply_image_changes(self, new_paths, modified_paths, deleted_paths):
+        """
+        Descarta las miniaturas en memoria de las imágenes que han cambiado en disco
+        (las del disco se regeneran solas porque están desactualizadas) y avisa a las
+        pestañas que muestran fotos.
+        """
+        import thumbnail_loader
+        paths = new_paths + modified_paths + deleted_paths
+        loader = thumbnail_loader.shared_loader()
+        for path in paths:
+            loader.invalidate(path)
+        for pestana in self._pestanas_construidas.values():
+            if hasattr(pestana, 'apply_image_changes'):
+                pestana.apply_image_changes(paths)
+
+    def update_all_tabs_data(self, excluir=None):
+        """
+        Marca como pendientes de actualizar todas las pestañas que muestran la colección
+        y refresca inmediatamente solo la pestaña visible. Las demás se refrescan
+        cuando el usuario las abre.
         """
-        QTimer.singleShot(100, self.tab_mi_coleccion.load_coins_to_table)
-        QTimer.singleShot(100, self.tab_buscar_moneda.load_initial_data) 
-        QTimer.singleShot(100, self.tab_estadisticas.update_statistics)
+        for index, (_, _, metodo_refresco) in enumerate(self._definiciones_pestanas):
+            if metodo_refresco and self._pestanas_construidas.get(index) is not excluir:
+                self._pestanas_pendientes.add(index)
+        self._activar_pestana(self.tab_widget.currentIndex())
 
 
 if __name__ == '__main__':
@@ -115,4 +299,10 @@ if __name__ == '__main__':
     app = QApplication(sys.argv)
     ventana = TheCoinVaultApp()
     ventana.show()
-    sys.exit(app.exec())
+    codigo_salida = app.exec()
+
+    # Si se indicó COINVAULT_TRAZA, guardar la traza de la instrumentación al salir
+    ruta_traza = os.environ.get('COINVAULT_TRAZA')
+    if instrumentacion.ACTIVADA and ruta_traza:
+        instrumentacion.exportar_traza_chrome(ruta_traza)
+    sys.exit(codigo_salida)
@@ -0,0 +1,172 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import hash_perceptual
+import miniaturas
+
+# =========================================================================
+# Mantenimiento de la biblioteca de imágenes
+# =========================================================================
+# Recorre las imágenes referenciadas por los campos foto_* de la colección y, en
+# un pool de procesos (la decodificación de imágenes no escala con hilos por el GIL):
+#   - comprueba que cada archivo existe y se puede decodificar,
+#   - genera la miniatura que falte o esté desactualizada,
+#   - calcula el hash perceptual que falte o esté desactualizado (hash_perceptual),
+# y además detecta los archivos del directorio de imágenes que ninguna moneda usa
+# (huérfanos), las miniaturas que ya no corresponden a ninguna imagen y las fotos
+# que parecen la misma imagen guardada varias veces (posibles monedas duplicadas).
+#
+# Cada imagen distinta se procesa una sola vez aunque la usen varias monedas, y las
+# imágenes se reparten en bloques entre los procesos para que el coste de
+# comunicación no limite la escalabilidad.
+# =========================================================================
+
+DIRECTORIO_BASE = os.path.dirname(os.path.abspath(__file__))
+DIRECTORIO_IMAGENES = os.path.join(DIRECTORIO_BASE, 'assets', 'imagenes_monedas')
+EXTENSIONES_IMAGEN = ('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp')
+# Imágenes por bloque enviado a cada proceso
+TAMANO_BLOQUE = 32
+
+ESTADO_OK = "ok"
+ESTADO_NO_EXISTE = "no_existe"
+ESTADO_CORRUPTA = "corrupta"
+
+
+def _resolver_ruta(ruta, directorio_base):
+    """Las rutas de la colección son relativas al directorio de la aplicación."""
+    return os.path.normpath(ruta if os.path.isabs(ruta) else os.path.join(directorio_base, ruta))
+
+
+def recopilar_referencias(monedas, campos_foto, directorio_base=DIRECTORIO_BASE):
+    """Retorna {ruta absoluta: [(codigo_unico, campo), ...]} de las fotos de las monedas."""
+    referencias = {}
+    for moneda in monedas:
+        for campo in campos_foto:
+            ruta = moneda.get(campo)
+            if ruta:
+                referencias.setdefault(_resolver_ruta(ruta, directorio_base), []).append(
+                    (moneda.get('codigo_unico'), campo))
+    return referencias
+
+
+def _procesar_imagen(ruta, directorio_miniaturas, forzar, calcular_hash):
+    """
+    Se ejecuta en un proceso del pool. Retorna (ruta, estado, miniatura_generada, detalle, phash);
+    phash es None si no se pidió calcularlo. Generar la miniatura decodifica la imagen,
+    así que sirve también de comprobación.
+    """
+    if not os.path.isfile(ruta):
+        return ruta, ESTADO_NO_EXISTE, False, "", None
+    generada = False
+    vigente = not forzar and miniaturas.miniatura_vigente(ruta, directorio_miniaturas) is not None
+    try:
+        # Si la miniatura está al día, la imagen se decodificó al generarla y no ha cambiado desde entonces
+        if not vigente:
+            miniaturas.generar_miniatura(ruta, directorio_miniaturas, forzar=True)
+            generada = True
+        phash = hash_perceptual.calcular_phash(ruta) if calcular_hash else None
+    except (OSError, ValueError) as e:
+        return ruta, ESTADO_CORRUPTA, generada, str(e), None
+    return ruta, ESTADO_OK, generada, "", phash
+
+
+def _procesar_bloque(rutas, directorio_miniaturas, forzar, calcular_hash):
+    return [_procesar_imagen(ruta, directorio_miniaturas, forzar, ruta in calcular_hash) for ruta in rutas]
+
+
+def _listar_archivos(directorio, extensiones=None):
+    try:
+        nombres = os.listdir(directorio)
+    except FileNotFoundError:
+        return []
+    return [os.path.abspath(os.path.join(directorio, nombre)) for nombre in nombres
+            if extensiones is None or os.path.splitext(nombre)[1].lower() in extensiones]
+
+
+def ejecutar_mantenimiento(referencias, directorio_imagenes=DIRECTORIO_IMAGENES,
+                           directorio_miniaturas=miniaturas.DIRECTORIO_MINIATURAS,
+                           procesos=None, forzar=False, eliminar_miniaturas_huerfanas=False,
+                           almacen_hashes=None):
+    """
+    Comprueba las imágenes referenciadas y genera sus miniaturas y hashes perceptuales
+    con 'procesos' procesos (por defecto, uno por núcleo). 'forzar' vuelve a decodificar
+    todas las imágenes aunque su miniatura y su hash estén al día. Los hashes se guardan
+    en 'almacen_hashes' (por defecto, el de la aplicación). Retorna un informe (dict):
+        imagenes, correctas, miniaturas_generadas, hashes_calculados,
+        no_existen / corruptas: [{"ruta", "monedas": [[codigo, campo]], "error"}],
+        huerfanas: [rutas de imágenes que no usa ninguna moneda],
+        posibles_duplicados: [[claves de imágenes que parecen la misma foto]],
+        miniaturas_huerfanas, miniaturas_eliminadas, procesos, segundos
+    """
+    # Antes de lanzar los procesos: si no hay con qué decodificar, que falle aquí y no en cada imagen
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        import PyQt6.QtGui  # noqa: F401
+
+    inicio = time.perf_counter()
+    procesos = procesos or os.cpu_count() or 1
+    directorio_miniaturas = os.path.abspath(directorio_miniaturas)
+    rutas = sorted(referencias)
+    bloques = [rutas[i:i + TAMANO_BLOQUE] for i in range(0, len(rutas), TAMANO_BLOQUE)]
+    almacen_hashes = almacen_hashes or hash_perceptual.almacen()
+    # A cada bloque solo se le pasan sus rutas cuyo hash falta o está desactualizado
+    pendientes_hash = [{ruta for ruta in bloque if forzar or almacen_hashes.obtener(ruta) is None}
+                       for bloque in bloques]
+
+    resultados = []
+    if procesos == 1:
+        for bloque, calcular_hash in zip(bloques, pendientes_hash):
+            resultados.extend(_procesar_bloque(bloque, directorio_miniaturas, forzar, calcular_hash))
+    else:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            n = len(bloques)
+            for parcial in pool.map(_procesar_bloque, bloques, [directorio_miniaturas] * n, [forzar] * n,
+                                    pendientes_hash):
+                resultados.extend(parcial)
+
+    informe = {
+        "imagenes": len(rutas), "correctas": 0, "miniaturas_generadas": 0, "hashes_calculados": 0,
+        "no_existen": [], "corruptas": [], "huerfanas": [], "posibles_duplicados": [],
+        "miniaturas_huerfanas": 0, "miniaturas_eliminadas": 0,
+    }
+    hashes = {}
+    for ruta, estado, generada, detalle, phash in resultados:
+        informe["miniaturas_generadas"] += generada
+        if phash is not None:
+            hashes[ruta] = phash
+        if estado == ESTADO_OK:
+            informe["correctas"] += 1
+            continue
+        entrada = {"ruta": ruta, "monedas": [list(referencia) for referencia in referencias[ruta]]}
+        if estado == ESTADO_CORRUPTA:
+            entrada["error"] = detalle
+            informe["corruptas"].append(entrada)
+        else:
+            informe["no_existen"].append(entrada)
+
+    # Todos los hashes nuevos se guardan con una sola escritura
+    almacen_hashes.guardar(hashes)
+    informe["hashes_calculados"] = len(hashes)
+    informe["posibles_duplicados"] = almacen_hashes.buscar_grupos_duplicados(claves=rutas)
+
+    referenciadas = set(rutas)
+    informe["huerfanas"] = sorted(ruta for ruta in _listar_archivos(directorio_imagenes, EXTENSIONES_IMAGEN)
+                                  if ruta not in referenciadas)
+
+    miniaturas_validas = {os.path.normpath(miniaturas.ruta_miniatura(ruta, directorio_miniaturas)) for ruta in rutas}
+    miniaturas_huerfanas = [ruta for ruta in _listar_archivos(directorio_miniaturas, ('.png',))
+                            if ruta not in miniaturas_validas]
+    informe["miniaturas_huerfanas"] = len(miniaturas_huerfanas)
+    if eliminar_miniaturas_huerfanas:
+        for ruta in miniaturas_huerfanas:
+            try:
+                os.remove(ruta)
+                informe["miniaturas_eliminadas"] += 1
+            except OSError:
+                pass
+
+    informe["procesos"] = procesos
+    informe["segundos"] = round(time.perf_counter() - inicio, 3)
+    return informe
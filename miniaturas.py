@@ -0,0 +1,90 @@
+import hashlib
+import os
+import threading
+
+# =========================================================================
+# Miniaturas de las imágenes de las monedas
+# =========================================================================
+# Cada imagen tiene una miniatura PNG (lado mayor TAMANO_MINIATURA) en
+# DIRECTORIO_MINIATURAS, con un nombre derivado de la ruta absoluta de la imagen.
+# La miniatura es válida mientras no sea más antigua que la imagen; si la imagen
+# cambia, se regenera la próxima vez que se pida.
+#
+# Estas funciones no dependen de Qt ni del bucle de eventos, así que se pueden
+# llamar desde hilos o procesos de trabajo. Usan Pillow si está instalado y, si no,
+# QImage (que puede usarse fuera del hilo principal).
+# =========================================================================
+
+DIRECTORIO_MINIATURAS = os.path.join('assets', 'miniaturas')
+TAMANO_MINIATURA = 256
+
+
+def ruta_miniatura(ruta_imagen, directorio=DIRECTORIO_MINIATURAS):
+    """Ruta de la miniatura de una imagen (exista o no)."""
+    clave = hashlib.sha1(os.path.abspath(ruta_imagen).encode('utf-8')).hexdigest()
+    return os.path.join(directorio, f"{clave}.png")
+
+
+def miniatura_vigente(ruta_imagen, directorio=DIRECTORIO_MINIATURAS):
+    """Retorna la ruta de la miniatura si existe y está al día, o None."""
+    ruta = ruta_miniatura(ruta_imagen, directorio)
+    try:
+        if os.path.getmtime(ruta) >= os.path.getmtime(ruta_imagen):
+            return ruta
+    except OSError:
+        pass
+    return None
+
+
+def _guardar_con_pillow(ruta_imagen, destino, tamano):
+    from PIL import Image
+    with Image.open(ruta_imagen) as imagen:
+        imagen.thumbnail((tamano, tamano))
+        if imagen.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+            imagen = imagen.convert('RGBA')
+        imagen.save(destino, 'PNG')
+
+
+def _guardar_con_qt(ruta_imagen, destino, tamano):
+    from PyQt6.QtCore import Qt
+    from PyQt6.QtGui import QImage
+    imagen = QImage(ruta_imagen)
+    if imagen.isNull():
+        raise ValueError(f"No se pudo decodificar la imagen '{ruta_imagen}'.")
+    if imagen.width() > tamano or imagen.height() > tamano:
+        imagen = imagen.scaled(tamano, tamano, Qt.AspectRatioMode.KeepAspectRatio,
+                               Qt.TransformationMode.SmoothTransformation)
+    if not imagen.save(destino, 'PNG'):
+        raise OSError(f"No se pudo guardar la miniatura '{destino}'.")
+
+
+def generar_miniatura(ruta_imagen, directorio=DIRECTORIO_MINIATURAS, tamano=TAMANO_MINIATURA, forzar=False):
+    """
+    Retorna la ruta de la miniatura de la imagen, generándola si no existe o está
+    desactualizada. Lanza OSError/ValueError si la imagen no existe o no se puede decodificar,
+    e ImportError si no hay ni Pillow ni PyQt6 para decodificarla.
+    """
+    if not forzar:
+        vigente = miniatura_vigente(ruta_imagen, directorio)
+        if vigente is not None:
+            return vigente
+    if not os.path.isfile(ruta_imagen):
+        raise FileNotFoundError(f"No existe la imagen '{ruta_imagen}'.")
+    os.makedirs(directorio, exist_ok=True)
+    destino = ruta_miniatura(ruta_imagen, directorio)
+    # Se escribe en un temporal por si otro hilo o proceso genera la misma miniatura a la vez
+    ruta_temporal = f"{destino}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        try:
+            _guardar_con_pillow(ruta_imagen, ruta_temporal, tamano)
+        except ImportError:
+            _guardar_con_qt(ruta_imagen, ruta_temporal, tamano)
+        os.replace(ruta_temporal, destino)
+    except Exception as e:
+        if os.path.exists(ruta_temporal):
+            os.remove(ruta_temporal)
+        if isinstance(e, (OSError, ValueError, ImportError)):
+            raise
+        # Pillow lanza sus propias excepciones de decodificación
+        raise ValueError(f"No se pudo decodificar la imagen '{ruta_imagen}': {e}") from e
+    return destino
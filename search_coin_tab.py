@@ -2,15 +2,92 @@ from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
     QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView,
     QMessageBox, QDialog, QFormLayout, QDateEdit, QCheckBox, QSpinBox,
-    QScrollArea, QFrame
+    QScrollArea, QFrame, QTreeWidget, QTreeWidgetItem, QComboBox, QGridLayout, QFileDialog
 )
-from PyQt6.QtCore import Qt, QDate, pyqtSignal
+from PyQt6.QtCore import Qt, QDate, QTimer, pyqtSignal
 from PyQt6.QtGui import QPixmap 
+import itertools
 import os 
-import shutil 
 import uuid 
 
 import coin_data_manager 
+import compresion
+import hash_perceptual
+import instrumentacion
+import thumbnail_loader
+
+# Filas que se añaden a la tabla de una vez: la primera página se muestra al instante
+# y el resto se va añadiendo en segundo plano sin bloquear la interfaz
+TAMANO_PAGINA_TABLA = 200
+
+# Facetas que se muestran en el panel de filtros, con su título
+FACET_TITLES = {
+    'pais': "País",
+    'ceca': "Ceca",
+    'estado': "Estado",
+    'tipo': "Tipo",
+    'composicion': "Composición",
+    'desmonetizada': "Desmonetizada",
+    'decada': "Década",
+}
+# Valores que se muestran como máximo por faceta (los más frecuentes y los seleccionados)
+MAX_FACET_VALUES = 30
+
+# Campos editables en el diálogo de edición (las fotos se editan aparte)
+EDIT_FIELD_DEFINITIONS = [
+    (coin_data_manager.CAMPO_PAIS_EMISOR, "País Emisor:", QLineEdit),
+    (coin_data_manager.CAMPO_ANO_ACUNACION, "Año de Acuñación:", QLineEdit),
+    (coin_data_manager.CAMPO_TIPO, "Tipo:", QLineEdit),
+    (coin_data_manager.CAMPO_ANOS_DE_EMISION, "Años De Emisión:", QLineEdit),
+    (coin_data_manager.CAMPO_VALOR, "Valor:", QLineEdit),
+    (coin_data_manager.CAMPO_VALOR_NOMINAL, "Valor Nominal:", QLineEdit),
+    (coin_data_manager.CAMPO_UNIDAD_MONETARIA, "Unidad monetaria:", QLineEdit),
+    (coin_data_manager.CAMPO_COMPOSICION, "Composición:", QLineEdit),
+    (coin_data_manager.CAMPO_PESO, "Peso:", QLineEdit),
+    (coin_data_manager.CAMPO_DIAMETRO, "Diámetro:", QLineEdit),
+    (coin_data_manager.CAMPO_GROSOR, "Grosor:", QLineEdit),
+    (coin_data_manager.CAMPO_ORIENTACION, "Orientación:", QLineEdit),
+    (coin_data_manager.CAMPO_DESMONETIZADA, "Desmonetizada:", QCheckBox),
+    (coin_data_manager.CAMPO_CANTO, "Canto:", QLineEdit),
+    (coin_data_manager.CAMPO_CECA, "Ceca:", QLineEdit),
+    (coin_data_manager.CAMPO_TIRADA, "Tirada:", QLineEdit),
+    (coin_data_manager.CAMPO_CANTIDAD, "Cantidad:", QSpinBox),
+    (coin_data_manager.CAMPO_ESTADO, "Estado:", QLineEdit),
+    (coin_data_manager.CAMPO_NOTA_IMPORTANTE, "Nota Importante:", QLineEdit),
+]
+
+def convert_edit_value(field_name, value):
+    """
+    Convierte el texto de un campo del formulario de edición al tipo que se guarda,
+    igual que en add_coin_tab. Lanza ValueError con el mensaje para el usuario si no es válido.
+    """
+    field_title = field_name.replace('_', ' ').title()
+    if field_name in [coin_data_manager.CAMPO_VALOR, coin_data_manager.CAMPO_PESO,
+                      coin_data_manager.CAMPO_DIAMETRO, coin_data_manager.CAMPO_GROSOR]:
+        value_cleaned = value.replace('.', '').replace(',', '.')
+        if not value_cleaned:
+            return None
+        try:
+            return float(value_cleaned)
+        except ValueError:
+            raise ValueError(f"Valor inválido para '{field_title}'. "
+                             "Por favor, introduzca un número válido (ej. 12,34 o 1.234,56).") from None
+    if field_name == coin_data_manager.CAMPO_ANO_ACUNACION:
+        if value.isdigit():
+            return int(value)
+        if value == "":
+            return None
+        raise ValueError(f"Valor inválido para '{field_title}'. "
+                         "Por favor, introduzca un año numérico válido (ej. 1971).")
+    if field_name == coin_data_manager.CAMPO_TIRADA:
+        value_cleaned = value.replace('.', '').replace(',', '')
+        if value_cleaned.isdigit():
+            return int(value_cleaned)
+        if value_cleaned == "":
+            return None
+        raise ValueError(f"Valor inválido para '{field_title}'. "
+                         "Por favor, introduzca un número entero válido (ej. 73.641.000).")
+    return value if value else None
 
 class SearchCoinTab(QWidget):
     # Señal para notificar a la ventana principal que los datos han cambiado
@@ -19,9 +96,19 @@ class SearchCoinTab(QWidget):
     def __init__(self):
         super().__init__()
         self.init_ui()
-        self.load_initial_data() # Cargar datos al iniciar la pestaña
-        self.dialog = None # Referencia al diálogo de edición
+        # Los datos se cargan cuando la ventana principal activa la pestaña por primera vez
+        self.dialog = None # Diálogo de edición; se construye una vez y se reutiliza
         self.current_editing_coin_id = None # ID de la moneda que se está editando
+        self._result_stream = None # Resultados pendientes de añadir a la tabla
+        self._on_results_finished = None
+        self._results_timer = QTimer(self)
+        self._results_timer.setSingleShot(True)
+        self._results_timer.timeout.connect(self._load_next_page)
+        self.current_criteria = {} # Criterios de la búsqueda de texto actual
+        self.facet_filters = {} # {faceta: [valores seleccionados]}
+        self.fuzzy_text = None # Texto de la búsqueda aproximada actual, si la hay
+        # Construir el diálogo de edición cuando la pestaña ya se ha mostrado, para que abrirlo sea inmediato
+        QTimer.singleShot(1000, self.build_edit_dialog)
 
     def init_ui(self):
         main_layout = QVBoxLayout()
@@ -76,8 +163,13 @@ class SearchCoinTab(QWidget):
             }
         """)
 
+        self.fuzzy_checkbox = QCheckBox("Búsqueda aproximada")
+        self.fuzzy_checkbox.setToolTip("Ignora acentos y tolera erratas; ordena los resultados por parecido.")
+        self.fuzzy_checkbox.setStyleSheet("font-size: 14px;")
+
         search_layout.addWidget(search_label)
         search_layout.addWidget(self.search_input)
+        search_layout.addWidget(self.fuzzy_checkbox)
         search_layout.addWidget(search_button)
         search_layout.addWidget(show_all_button)
         main_layout.addLayout(search_layout)
@@ -93,6 +185,8 @@ class SearchCoinTab(QWidget):
         self.results_table = QTableWidget()
         self.results_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers) # Hacerla de solo lectura
         self.results_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows) # Seleccionar filas completas
+        # Permitir seleccionar varias filas (Ctrl/Mayús) para editarlas o eliminarlas a la vez
+        self.results_table.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
         self.results_table.setStyleSheet("""
             QTableWidget {
                 border: 1px solid #D3D3D3;
@@ -116,13 +210,24 @@ class SearchCoinTab(QWidget):
         
         # Conectar el doble clic a la función de edición
         self.results_table.doubleClicked.connect(self.edit_selected_coin)
-        main_layout.addWidget(self.results_table)
+
+        # Panel de facetas a la izquierda de la tabla
+        self.facets_tree = QTreeWidget()
+        self.facets_tree.setHeaderLabel("Filtros")
+        self.facets_tree.setFixedWidth(260)
+        self.facets_tree.setStyleSheet("QTreeWidget { border: 1px solid #D3D3D3; border-radius: 8px; font-size: 13px; }")
+        self.facets_tree.itemChanged.connect(self.on_facet_item_changed)
+
+        results_layout = QHBoxLayout()
+        results_layout.addWidget(self.facets_tree)
+        results_layout.addWidget(self.results_table)
+        main_layout.addLayout(results_layout)
 
         # Botones de acción (Editar y Eliminar)
         action_buttons_layout = QHBoxLayout()
         action_buttons_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
         
-        edit_button = QPushButton("Editar Moneda Seleccionada")
+        edit_button = QPushButton("Editar Selección")
         edit_button.clicked.connect(self.edit_selected_coin)
         edit_button.setStyleSheet("""
             QPushButton {
@@ -140,7 +245,7 @@ class SearchCoinTab(QWidget):
             }
         """)
 
-        delete_button = QPushButton("Eliminar Moneda Seleccionada")
+        delete_button = QPushButton("Eliminar Selección")
         delete_button.clicked.connect(self.delete_selected_coin)
         delete_button.setStyleSheet("""
             QPushButton {
@@ -157,8 +262,27 @@ class SearchCoinTab(QWidget):
                 background-color: #C0392B;
             }
         """)
+
+        duplicates_button = QPushButton("Buscar Duplicados")
+        duplicates_button.clicked.connect(self.show_duplicates_dialog)
+        duplicates_button.setStyleSheet("""
+            QPushButton {
+                background-color: #8E44AD; /* Morado */
+                color: white;
+                padding: 10px 20px;
+                border: none;
+                border-radius: 5px;
+                font-weight: bold;
+                font-size: 16px;
+                margin-top: 10px;
+            }
+            QPushButton:hover {
+                background-color: #7D3C98;
+            }
+        """)
         action_buttons_layout.addWidget(edit_button)
         action_buttons_layout.addWidget(delete_button)
+        action_buttons_layout.addWidget(duplicates_button)
         main_layout.addLayout(action_buttons_layout)
         
         # Inicializar la tabla con las columnas
@@ -200,35 +324,174 @@ class SearchCoinTab(QWidget):
         self.results_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch) # Ajustar al ancho
 
     def load_initial_data(self):
-        """Carga y muestra todas las monedas en la tabla."""
-        coin_data_manager.cargar_coleccion()
-        self.display_results(coin_data_manager.mi_coleccion)
+        """Muestra todas las monedas en la tabla."""
+        # La colección en memoria ya está al día (los cambios de otras instancias los
+        # incorpora CollectionWatcher): recargarla del disco reconstruiría todos los índices
         self.search_input.clear() # Limpiar el campo de búsqueda
+        self.current_criteria = {}
+        self.fuzzy_text = None
+        self.facet_filters = {}
+        self.refresh_results()
 
-    def display_results(self, coins):
-        """Muestra una lista de monedas en la tabla de resultados."""
-        self.results_table.setRowCount(len(coins))
-        for row_idx, coin in enumerate(coins):
-            for col_idx, key in enumerate(self.display_order_keys):
-                value = coin.get(key, "")
-                if key == coin_data_manager.CAMPO_DESMONETIZADA:
-                    item_value = "Sí" if value else "No"
-                elif key == coin_data_manager.CAMPO_CANTIDAD and value is None:
-                    item_value = "1" # Por defecto 1 si no está especificado
-                else:
-                    item_value = str(value) if value is not None else ""
-                
-                item = QTableWidgetItem(item_value)
-                item.setTextAlignment(Qt.AlignmentFlag.AlignCenter) # Centrar texto
-                self.results_table.setItem(row_idx, col_idx, item)
-        self.data_changed.emit() # Emitir señal de que los datos han cambiado
+    def refresh_results(self, on_finished=None):
+        """Muestra los resultados de la búsqueda de texto y los filtros actuales y actualiza las facetas."""
+        if self.fuzzy_text:
+            ranked = coin_data_manager.buscar_monedas_difusa(self.fuzzy_text, filtros=self.facet_filters)
+            coins = (coin for coin, _ in ranked)
+        elif self.facet_filters:
+            coins = coin_data_manager.iterar_monedas_facetadas(self.current_criteria, self.facet_filters)
+        else:
+            coins = coin_data_manager.iterar_monedas(self.current_criteria)
+        self.display_results(coins, on_finished=on_finished)
+        self.update_facets()
+
+    def update_facets(self):
+        """Rellena el panel de facetas con los recuentos del conjunto de resultados actual."""
+        _, conteos = coin_data_manager.obtener_conteos_facetas(self.current_criteria, self.facet_filters,
+                                                             texto_difuso=self.fuzzy_text)
+        expanded = {self.facets_tree.topLevelItem(i).data(0, Qt.ItemDataRole.UserRole)
+                    for i in range(self.facets_tree.topLevelItemCount())
+                    if self.facets_tree.topLevelItem(i).isExpanded()}
+        self.facets_tree.blockSignals(True)
+        self.facets_tree.clear()
+        for facet, title in FACET_TITLES.items():
+            counts = conteos.get(facet, {})
+            selected = self.facet_filters.get(facet, [])
+            values = sorted(counts, key=lambda value: -counts[value])[:MAX_FACET_VALUES]
+            values += [value for value in selected if value not in values]
+            facet_item = QTreeWidgetItem([title])
+            facet_item.setData(0, Qt.ItemDataRole.UserRole, facet)
+            for value in values:
+                child = QTreeWidgetItem([f"{value} ({counts.get(value, 0)})"])
+                child.setData(0, Qt.ItemDataRole.UserRole, value)
+                child.setFlags(child.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+                child.setCheckState(0, Qt.CheckState.Checked if value in selected else Qt.CheckState.Unchecked)
+                facet_item.addChild(child)
+            self.facets_tree.addTopLevelItem(facet_item)
+            facet_item.setExpanded(facet in expanded or bool(selected))
+        self.facets_tree.blockSignals(False)
+
+    def on_facet_item_changed(self, item, column):
+        """Añade o quita un valor de los filtros al marcarlo en el panel de facetas."""
+        parent = item.parent()
+        if parent is None:
+            return
+        facet = parent.data(0, Qt.ItemDataRole.UserRole)
+        value = item.data(0, Qt.ItemDataRole.UserRole)
+        selected = [v for v in self.facet_filters.get(facet, []) if v != value]
+        if item.checkState(0) == Qt.CheckState.Checked:
+            selected.append(value)
+        if selected:
+            self.facet_filters[facet] = selected
+        else:
+            self.facet_filters.pop(facet, None)
+        # Actualizar después de que Qt termine de procesar el cambio del elemento
+        QTimer.singleShot(0, self.refresh_results)
+
+    def display_results(self, coins, on_finished=None):
+        """
+        Muestra monedas en la tabla de resultados. 'coins' puede ser una lista o un
+        generador: se muestra la primera página enseguida y el resto por páginas.
+        Al terminar se llama a on_finished(número_de_filas) si se indica.
+        """
+        self._results_timer.stop()
+        self.results_table.setRowCount(0)
+        self._result_stream = iter(coins)
+        self._on_results_finished = on_finished
+        self._load_next_page()
+
+    def _load_next_page(self):
+        """Añade la siguiente página de resultados pendientes a la tabla."""
+        if self._result_stream is None:
+            return
+        pagina = list(itertools.islice(self._result_stream, TAMANO_PAGINA_TABLA))
+        row_idx = self.results_table.rowCount()
+        self.results_table.setRowCount(row_idx + len(pagina))
+        for coin in pagina:
+            self._fill_row(row_idx, coin)
+            row_idx += 1
+        if len(pagina) == TAMANO_PAGINA_TABLA:
+            self._results_timer.start(0)
+            return
+        self._result_stream = None
+        on_finished, self._on_results_finished = self._on_results_finished, None
+        if on_finished is not None:
+            on_finished(self.results_table.rowCount())
+
+    def _finish_loading_results(self):
+        """Añade de inmediato todos los resultados que falten por mostrar."""
+        while self._result_stream is not None:
+            self._load_next_page()
+
+    def _fill_row(self, row_idx, coin):
+        """Rellena una fila de la tabla con los datos de una moneda."""
+        for col_idx, key in enumerate(self.display_order_keys):
+            value = coin.get(key, "")
+            if key == coin_data_manager.CAMPO_DESMONETIZADA:
+                item_value = "Sí" if value else "No"
+            elif key == coin_data_manager.CAMPO_CANTIDAD and value is None:
+                item_value = "1" # Por defecto 1 si no está especificado
+            else:
+                item_value = str(value) if value is not None else ""
+            
+            item = QTableWidgetItem(item_value)
+            item.setTextAlignment(Qt.AlignmentFlag.AlignCenter) # Centrar texto
+            self.results_table.setItem(row_idx, col_idx, item)
+
+    def apply_coin_changes(self, added_ids, modified_ids, deleted_ids):
+        """
+        Aplica a la tabla solo los cambios hechos desde fuera (otra instancia o un script):
+        actualiza las filas modificadas, quita las eliminadas y, si se están mostrando
+        todas las monedas, añade las nuevas al final.
+        """
+        # Si aún se están añadiendo resultados, completarlos antes de aplicar los cambios
+        self._finish_loading_results()
+        id_col = self.display_order_keys.index(coin_data_manager.CAMPO_CODIGO_UNICO)
+        filas_por_id = {}
+        for row_idx in range(self.results_table.rowCount()):
+            item = self.results_table.item(row_idx, id_col)
+            if item:
+                filas_por_id[item.text()] = row_idx
+
+        for coin_id in modified_ids:
+            row_idx = filas_por_id.get(coin_id)
+            coin = coin_data_manager.obtener_moneda_por_id(coin_id)
+            if row_idx is not None and coin is not None:
+                self._fill_row(row_idx, coin)
+
+        # Eliminar de abajo hacia arriba para no desplazar los índices pendientes
+        for row_idx in sorted((filas_por_id[c] for c in deleted_ids if c in filas_por_id), reverse=True):
+            self.results_table.removeRow(row_idx)
+
+        if added_ids and not self.search_input.text().strip() and not self.facet_filters:
+            for coin_id in added_ids:
+                coin = coin_data_manager.obtener_moneda_por_id(coin_id)
+                if coin is not None:
+                    row_idx = self.results_table.rowCount()
+                    self.results_table.insertRow(row_idx)
+                    self._fill_row(row_idx, coin)
+
+        self.update_facets()
 
     def perform_search(self):
         """Realiza una búsqueda basada en el texto de entrada y actualiza la tabla."""
         search_text = self.search_input.text().strip()
         if not search_text:
-            self.load_initial_data() # Si no hay texto, mostrar todo
+            if self.facet_filters:
+                # Sin texto pero con filtros: mostrar todas las monedas que cumplen los filtros
+                self.current_criteria = {}
+                self.fuzzy_text = None
+                self.refresh_results()
+            else:
+                self.load_initial_data() # Si no hay texto, mostrar todo
+            return
+
+        if self.fuzzy_checkbox.isChecked():
+            self.current_criteria = {}
+            self.fuzzy_text = search_text
+            self.refresh_results(on_finished=self._show_search_summary)
             return
+        self.fuzzy_text = None
 
         criterios = {}
         # Asumiendo que el usuario podría buscar por estos campos principales
@@ -244,29 +507,43 @@ class SearchCoinTab(QWidget):
         criterios[coin_data_manager.CAMPO_CANTO] = search_text
 
 
-        found_coins = coin_data_manager.buscar_monedas(criterios)
-        if found_coins:
-            self.display_results(found_coins)
-            QMessageBox.information(self, "Búsqueda Exitosa", f"Se encontraron {len(found_coins)} monedas.")
+        self.current_criteria = criterios
+        self.refresh_results(on_finished=self._show_search_summary)
+
+    def _show_search_summary(self, found_count):
+        """Informa del resultado de la búsqueda una vez mostradas todas las coincidencias."""
+        if found_count:
+            QMessageBox.information(self, "Búsqueda Exitosa", f"Se encontraron {found_count} monedas.")
         else:
-            self.results_table.setRowCount(0) # Limpiar tabla
             QMessageBox.information(self, "No se Encontraron Monedas", "No se encontraron monedas que coincidan con los criterios de búsqueda.")
 
-    def get_selected_coin_id(self):
-        """Retorna el código único de la moneda seleccionada en la tabla."""
-        selected_rows = self.results_table.selectionModel().selectedRows()
+    def get_selected_coin_ids(self):
+        """Retorna los códigos únicos de las monedas seleccionadas en la tabla, en orden de fila."""
+        selected_rows = sorted(index.row() for index in self.results_table.selectionModel().selectedRows())
         if not selected_rows:
             QMessageBox.warning(self, "Ninguna Moneda Seleccionada", "Por favor, seleccione una moneda de la tabla para realizar esta acción.")
-            return None
-        
-        row_index = selected_rows[0].row()
-        # El código único siempre está en la primera columna (índice 0)
-        coin_id_item = self.results_table.item(row_index, self.display_order_keys.index(coin_data_manager.CAMPO_CODIGO_UNICO))
-        return coin_id_item.text() if coin_id_item else None
+            return []
+
+        id_col = self.display_order_keys.index(coin_data_manager.CAMPO_CODIGO_UNICO)
+        coin_ids = []
+        for row_index in selected_rows:
+            coin_id_item = self.results_table.item(row_index, id_col)
+            if coin_id_item:
+                coin_ids.append(coin_id_item.text())
+        return coin_ids
+
+    def get_selected_coin_id(self):
+        """Retorna el código único de la primera moneda seleccionada en la tabla."""
+        coin_ids = self.get_selected_coin_ids()
+        return coin_ids[0] if coin_ids else None
 
     def edit_selected_coin(self):
-        """Abre un diálogo para editar la moneda seleccionada."""
-        coin_id = self.get_selected_coin_id()
+        """Abre el diálogo de edición con la moneda seleccionada (o la edición por lotes si hay varias)."""
+        coin_ids = self.get_selected_coin_ids()
+        if len(coin_ids) > 1:
+            self.edit_selected_coins_batch(coin_ids)
+            return
+        coin_id = coin_ids[0] if coin_ids else None
         if not coin_id:
             return
 
@@ -276,8 +553,18 @@ class SearchCoinTab(QWidget):
             return
 
         self.current_editing_coin_id = coin_id # Guardar el ID de la moneda que se está editando
+        self.build_edit_dialog()
+        self.bind_edit_dialog(coin_to_edit)
+        self.dialog.exec() # Mostrar el diálogo de forma modal
+
+    def build_edit_dialog(self):
+        """
+        Construye el diálogo de edición una sola vez. Después se reutiliza para cada
+        moneda con bind_edit_dialog, así que abrirlo no vuelve a crear los widgets.
+        """
+        if self.dialog is not None:
+            return
         self.dialog = QDialog(self)
-        self.dialog.setWindowTitle(f"Editar Moneda: {coin_id}")
         self.dialog.setGeometry(100, 100, 800, 700) # Tamaño más grande para el diálogo
         
         dialog_main_layout = QVBoxLayout()
@@ -293,58 +580,26 @@ class SearchCoinTab(QWidget):
         
         self.edit_fields = {} # Para almacenar los widgets del diálogo de edición
 
-        # Definición de todos los campos para edición, incluyendo fotos
-        # Usamos TODAS las llaves para asegurar que todos los campos sean editables
-        edit_field_definitions = [
-            (coin_data_manager.CAMPO_PAIS_EMISOR, "País Emisor:", QLineEdit),
-            (coin_data_manager.CAMPO_ANO_ACUNACION, "Año de Acuñación:", QLineEdit),
-            (coin_data_manager.CAMPO_TIPO, "Tipo:", QLineEdit),
-            (coin_data_manager.CAMPO_ANOS_DE_EMISION, "Años De Emisión:", QLineEdit),
-            (coin_data_manager.CAMPO_VALOR, "Valor:", QLineEdit),
-            (coin_data_manager.CAMPO_VALOR_NOMINAL, "Valor Nominal:", QLineEdit),
-            (coin_data_manager.CAMPO_UNIDAD_MONETARIA, "Unidad monetaria:", QLineEdit),
-            (coin_data_manager.CAMPO_COMPOSICION, "Composición:", QLineEdit),
-            (coin_data_manager.CAMPO_PESO, "Peso:", QLineEdit),
-            (coin_data_manager.CAMPO_DIAMETRO, "Diámetro:", QLineEdit),
-            (coin_data_manager.CAMPO_GROSOR, "Grosor:", QLineEdit),
-            (coin_data_manager.CAMPO_ORIENTACION, "Orientación:", QLineEdit),
-            (coin_data_manager.CAMPO_DESMONETIZADA, "Desmonetizada:", QCheckBox),
-            (coin_data_manager.CAMPO_CANTO, "Canto:", QLineEdit),
-            (coin_data_manager.CAMPO_CECA, "Ceca:", QLineEdit),
-            (coin_data_manager.CAMPO_TIRADA, "Tirada:", QLineEdit),
-            (coin_data_manager.CAMPO_CANTIDAD, "Cantidad:", QSpinBox),
-            (coin_data_manager.CAMPO_ESTADO, "Estado:", QLineEdit),
-            (coin_data_manager.CAMPO_NOTA_IMPORTANTE, "Nota Importante:", QLineEdit),
-        ]
-
-        for field_name, label_text, widget_type in edit_field_definitions:
+        for field_name, label_text, widget_type in EDIT_FIELD_DEFINITIONS:
             label = QLabel(label_text)
             widget = None
-            current_value = coin_to_edit.get(field_name)
 
             if widget_type == QLineEdit:
                 widget = QLineEdit()
-                widget.setText(str(current_value) if current_value is not None else "")
                 widget.setStyleSheet("padding: 5px; border-radius: 4px; border: 1px solid #ccc;")
             elif widget_type == QDateEdit:
                 widget = QDateEdit()
                 widget.setCalendarPopup(True)
-                if current_value:
-                    widget.setDate(QDate.fromString(str(current_value), "yyyy-MM-dd"))
-                else:
-                    widget.setDate(QDate.currentDate())
                 widget.setDisplayFormat("yyyy-MM-dd")
                 widget.setStyleSheet("padding: 5px; border-radius: 4px; border: 1px solid #ccc;")
             elif widget_type == QCheckBox:
                 widget = QCheckBox()
                 widget.setText("Sí")
-                widget.setChecked(bool(current_value))
                 widget.setStyleSheet("margin-top: 5px; margin-bottom: 5px;")
             elif widget_type == QSpinBox:
                 widget = QSpinBox()
                 widget.setMinimum(1)
                 widget.setMaximum(999999999)
-                widget.setValue(int(current_value) if isinstance(current_value, (int, float)) else 1)
                 widget.setStyleSheet("padding: 5px; border-radius: 4px; border: 1px solid #ccc;")
             
             if widget:
@@ -369,12 +624,6 @@ class SearchCoinTab(QWidget):
         dialog_image_grid_layout.setSpacing(20)
         dialog_image_grid_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
-        # Atributos para almacenar las rutas de imagen en el diálogo de edición
-        self.edit_anverso_path = coin_to_edit.get(coin_data_manager.CAMPO_FOTO_ANVERSO, '') or ''
-        self.edit_reverso_path = coin_to_edit.get(coin_data_manager.CAMPO_FOTO_REVERSO, '') or ''
-        self.edit_bandera_path = coin_to_edit.get(coin_data_manager.CAMPO_FOTO_BANDERA, '') or ''
-        self.edit_escudo_path = coin_to_edit.get(coin_data_manager.CAMPO_FOTO_ESCUDO, '') or ''
-
         # Función auxiliar para añadir widgets de imagen en el diálogo
         def add_dialog_image_widget(layout, row, col, label_text, image_key, path_attr_name, image_label_ref):
             v_layout = QVBoxLayout()
@@ -384,22 +633,9 @@ class SearchCoinTab(QWidget):
             
             image_label = QLabel("No hay imagen")
             image_label.setFixedSize(160, 160)
-            image_label.setStyleSheet("border: 2px dashed #D3D3D3; background-color: #FAFAFA; border-radius: 8px; font-style: italic; color: #888;")
             image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
             setattr(self, image_label_ref, image_label)
-
-            # Cargar la imagen existente si hay una ruta
-            initial_path = getattr(self, path_attr_name)
-            if initial_path and os.path.exists(initial_path):
-                pixmap = QPixmap(initial_path)
-                if not pixmap.isNull():
-                    image_label.setPixmap(pixmap.scaled(image_label.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
-                    image_label.setText("")
-                    image_label.setStyleSheet("border: 2px solid #5DADE2; border-radius: 8px;")
-                else:
-                    image_label.setText("Error al cargar imagen")
-                    image_label.setStyleSheet("border: 2px dashed #E74C3C; background-color: #FAE0E0; border-radius: 8px; color: #E74C3C;")
-
+            self._dialog_image_labels[path_attr_name] = image_label
 
             button = QPushButton(f"Cambiar {label_text.split()[0]}")
             button.setStyleSheet("""
@@ -422,6 +658,8 @@ class SearchCoinTab(QWidget):
             v_layout.addWidget(button, alignment=Qt.AlignmentFlag.AlignCenter)
             layout.addLayout(v_layout, row, col)
 
+        # Atributo con la ruta de cada foto -> QLabel donde se muestra
+        self._dialog_image_labels = {}
         add_dialog_image_widget(dialog_image_grid_layout, 0, 0, "Foto Anverso", coin_data_manager.CAMPO_FOTO_ANVERSO, "edit_anverso_path", "dialog_anverso_image")
         add_dialog_image_widget(dialog_image_grid_layout, 0, 1, "Foto Reverso", coin_data_manager.CAMPO_FOTO_REVERSO, "edit_reverso_path", "dialog_reverso_image")
         add_dialog_image_widget(dialog_image_grid_layout, 1, 0, "Foto Bandera", coin_data_manager.CAMPO_FOTO_BANDERA, "edit_bandera_path", "dialog_bandera_image")
@@ -473,7 +711,62 @@ class SearchCoinTab(QWidget):
         dialog_buttons_layout.addWidget(cancel_edit_button)
         dialog_main_layout.addLayout(dialog_buttons_layout)
 
-        self.dialog.exec() # Mostrar el diálogo de forma modal
+        # Las fotos se muestran desde sus miniaturas, que se cargan en segundo plano
+        thumbnail_loader.shared_loader().thumbnail_ready.connect(self._on_dialog_thumbnail_ready)
+
+    def bind_edit_dialog(self, coin_to_edit):
+        """Rellena el diálogo de edición con los datos de una moneda."""
+        self.dialog.setWindowTitle(f"Editar Moneda: {coin_to_edit.get(coin_data_manager.CAMPO_CODIGO_UNICO)}")
+        for field_name, widget in self.edit_fields.items():
+            current_value = coin_to_edit.get(field_name)
+            if isinstance(widget, QLineEdit):
+                widget.setText(str(current_value) if current_value is not None else "")
+            elif isinstance(widget, QDateEdit):
+                if current_value:
+                    widget.setDate(QDate.fromString(str(current_value), "yyyy-MM-dd"))
+                else:
+                    widget.setDate(QDate.currentDate())
+            elif isinstance(widget, QCheckBox):
+                widget.setChecked(bool(current_value))
+            elif isinstance(widget, QSpinBox):
+                widget.setValue(int(current_value) if isinstance(current_value, (int, float)) else 1)
+
+        # Atributos para almacenar las rutas de imagen en el diálogo de edición
+        self.edit_anverso_path = coin_to_edit.get(coin_data_manager.CAMPO_FOTO_ANVERSO, '') or ''
+        self.edit_reverso_path = coin_to_edit.get(coin_data_manager.CAMPO_FOTO_REVERSO, '') or ''
+        self.edit_bandera_path = coin_to_edit.get(coin_data_manager.CAMPO_FOTO_BANDERA, '') or ''
+        self.edit_escudo_path = coin_to_edit.get(coin_data_manager.CAMPO_FOTO_ESCUDO, '') or ''
+        for path_attr_name, image_label in self._dialog_image_labels.items():
+            self._show_dialog_thumbnail(image_label, getattr(self, path_attr_name))
+
+    def _show_dialog_thumbnail(self, image_label, path, pixmap=None):
+        """Muestra en el diálogo la miniatura de una foto, o lo que corresponda mientras no esté."""
+        if not path:
+            image_label.setPixmap(QPixmap())
+            image_label.setText("No hay imagen")
+            image_label.setStyleSheet("border: 2px dashed #D3D3D3; background-color: #FAFAFA; border-radius: 8px; font-style: italic; color: #888;")
+            return
+        if pixmap is None:
+            pixmap = thumbnail_loader.shared_loader().request(path, priority=1)
+        if pixmap is None:
+            # Se mostrará cuando llegue thumbnail_ready
+            image_label.setPixmap(QPixmap())
+            image_label.setText("Cargando...")
+            image_label.setStyleSheet("border: 2px dashed #D3D3D3; background-color: #FAFAFA; border-radius: 8px; font-style: italic; color: #888;")
+        elif not pixmap.isNull():
+            image_label.setPixmap(pixmap.scaled(image_label.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
+            image_label.setText("")
+            image_label.setStyleSheet("border: 2px solid #5DADE2; border-radius: 8px;")
+        else:
+            image_label.setPixmap(QPixmap())
+            image_label.setText("Error al cargar imagen")
+            image_label.setStyleSheet("border: 2px dashed #E74C3C; background-color: #FAE0E0; border-radius: 8px; color: #E74C3C;")
+
+    def _on_dialog_thumbnail_ready(self, path, pixmap):
+        """Coloca una miniatura recibida en las fotos del diálogo que aún la muestran."""
+        for path_attr_name, image_label in self._dialog_image_labels.items():
+            if getattr(self, path_attr_name, None) == path:
+                self._show_dialog_thumbnail(image_label, path, pixmap)
 
     def load_and_copy_image_for_edit(self, image_label_widget, field_name_key, path_attr_name):
         # Asegurarse de que el directorio de destino exista
@@ -489,11 +782,11 @@ class SearchCoinTab(QWidget):
 
         if file_path:
             # Generar un nombre de archivo único
-            unique_filename = f"{uuid.uuid4().hex}_{os.path.basename(file_path)}"
-            destination_path = os.path.join(initial_dir, unique_filename)
+            # (la extensión la decide la recodificación opcional de la imagen)
+            unique_stem = f"{uuid.uuid4().hex}_{os.path.splitext(os.path.basename(file_path))[0]}"
 
             try:
-                shutil.copyfile(file_path, destination_path)
+                destination_path = compresion.recodificar_imagen(file_path, os.path.join(initial_dir, unique_stem))
             except Exception as e:
                 QMessageBox.critical(self, "Error de Copia", f"No se pudo copiar el archivo: {e}")
                 return
@@ -501,19 +794,38 @@ class SearchCoinTab(QWidget):
             relative_path = os.path.relpath(destination_path, os.path.dirname(os.path.abspath(__file__)))
 
             # Actualizar la imagen en el QLabel del diálogo
-            pixmap = QPixmap(destination_path)
+            with instrumentacion.medir("cargar_imagen", "imagenes"):
+                pixmap = QPixmap(destination_path)
             if not pixmap.isNull():
                 image_label_widget.setPixmap(pixmap.scaled(image_label_widget.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
                 image_label_widget.setText("")
                 image_label_widget.setStyleSheet("border: 2px solid #5DADE2; border-radius: 8px;")
                 # Almacenar la nueva ruta en el atributo del diálogo
                 setattr(self, path_attr_name, relative_path)
+                self._warn_possible_duplicates(destination_path)
             else:
                 QMessageBox.warning(self, "Error de Carga", "No se pudo cargar la imagen seleccionada.")
                 image_label_widget.setText("Error")
                 image_label_widget.setStyleSheet("border: 2px dashed #E74C3C; background-color: #FAE0E0; border-radius: 8px; color: #E74C3C;")
                 setattr(self, path_attr_name, '') # Limpiar la ruta si falla
 
+    def _warn_possible_duplicates(self, image_path):
+        """Avisa si la imagen recién importada parece la misma foto que otra ya guardada."""
+        try:
+            similar = hash_perceptual.registrar_imagen(image_path)
+        except (ImportError, OSError, ValueError):
+            return # Sin hash no se puede comprobar; la imagen se usa igualmente
+        if not similar:
+            return
+        coins_by_image = coin_data_manager.obtener_monedas_por_imagen([key for _, key in similar])
+        lines = []
+        for dist, key in similar[:5]:
+            coins = ", ".join(sorted({code for code, _ in coins_by_image.get(key, [])})) or "ninguna moneda"
+            lines.append(f"• {key} (diferencia {dist}) — {coins}")
+        QMessageBox.warning(self, "Posible Duplicado",
+                            "La imagen seleccionada se parece a otras ya guardadas:\n\n" + "\n".join(lines)
+                            + "\n\nCompruebe que no está registrando una moneda repetida.")
+
     def save_edited_coin(self):
         """Guarda los cambios de la moneda editada."""
         if not self.current_editing_coin_id:
@@ -523,44 +835,11 @@ class SearchCoinTab(QWidget):
         updated_data = {}
         for field_name, widget in self.edit_fields.items():
             if isinstance(widget, QLineEdit):
-                value = widget.text().strip()
-                # Conversión de tipos para campos numéricos y años, igual que en add_coin_tab
-                if field_name in [coin_data_manager.CAMPO_VALOR, coin_data_manager.CAMPO_PESO, 
-                                  coin_data_manager.CAMPO_DIAMETRO, coin_data_manager.CAMPO_GROSOR]:
-                    value_cleaned = value.replace('.', '').replace(',', '.')
-                    if value_cleaned:
-                        try:
-                            updated_data[field_name] = float(value_cleaned)
-                        except ValueError:
-                            QMessageBox.warning(self, "Error de Datos", 
-                                                f"Valor inválido para '{field_name.replace('_', ' ').title()}'. "
-                                                "Por favor, introduzca un número válido (ej. 12,34 o 1.234,56).")
-                            return
-                    else:
-                        updated_data[field_name] = None
-                elif field_name == coin_data_manager.CAMPO_ANO_ACUNACION:
-                    if value.isdigit():
-                        updated_data[field_name] = int(value)
-                    elif value == "":
-                        updated_data[field_name] = None
-                    else:
-                        QMessageBox.warning(self, "Error de Datos", 
-                                            f"Valor inválido para '{field_name.replace('_', ' ').title()}'. "
-                                            "Por favor, introduzca un año numérico válido (ej. 1971).")
-                        return
-                elif field_name == coin_data_manager.CAMPO_TIRADA:
-                    value_cleaned = value.replace('.', '').replace(',', '')
-                    if value_cleaned.isdigit():
-                        updated_data[field_name] = int(value_cleaned)
-                    elif value_cleaned == "":
-                        updated_data[field_name] = None
-                    else:
-                        QMessageBox.warning(self, "Error de Datos", 
-                                            f"Valor inválido para '{field_name.replace('_', ' ').title()}'. "
-                                            "Por favor, introduzca un número entero válido (ej. 73.641.000).")
-                        return
-                else:
-                    updated_data[field_name] = value if value else None
+                try:
+                    updated_data[field_name] = convert_edit_value(field_name, widget.text().strip())
+                except ValueError as e:
+                    QMessageBox.warning(self, "Error de Datos", str(e))
+                    return
             elif isinstance(widget, QDateEdit):
                 updated_data[field_name] = widget.date().toString("yyyy-MM-dd")
             elif isinstance(widget, QCheckBox):
@@ -579,15 +858,136 @@ class SearchCoinTab(QWidget):
             if success:
                 QMessageBox.information(self, "Éxito", "✅ Moneda actualizada correctamente.")
                 self.dialog.accept() # Cerrar el diálogo
-                self.load_initial_data() # Recargar la tabla para mostrar los cambios
+                self.refresh_results() # Repetir la búsqueda actual para mostrar los cambios
+                self.data_changed.emit() # Notificar a las demás pestañas
             else:
                 QMessageBox.warning(self, "Error", "No se pudo actualizar la moneda.")
+        except coin_data_manager.ConflictoDeEdicion as e:
+            # Los cambios sin conflicto se guardaron; mostrar los valores que prevalecieron
+            QMessageBox.warning(self, "Conflicto de Edición", f"⚠️ {e}")
+            self.dialog.accept()
+            self.refresh_results()
+            self.data_changed.emit()
+        except Exception as e:
+            QMessageBox.critical(self, "Error al Actualizar", f"❌ Ocurrió un error: {e}")
+
+    def edit_selected_coins_batch(self, coin_ids):
+        """Abre un diálogo para asignar el mismo valor de un campo a varias monedas a la vez."""
+        self.batch_coin_ids = coin_ids
+        self.batch_dialog = QDialog(self)
+        self.batch_dialog.setWindowTitle(f"Editar {len(coin_ids)} Monedas")
+        dialog_layout = QVBoxLayout(self.batch_dialog)
+
+        info_label = QLabel(f"El valor elegido se asignará a las {len(coin_ids)} monedas seleccionadas.")
+        info_label.setStyleSheet("font-size: 14px; color: #34495E; margin-bottom: 10px;")
+        dialog_layout.addWidget(info_label)
+
+        form_layout = QFormLayout()
+        self.batch_field_combo = QComboBox()
+        for field_name, label_text, widget_type in EDIT_FIELD_DEFINITIONS:
+            self.batch_field_combo.addItem(label_text.rstrip(':'), (field_name, widget_type))
+        self.batch_field_combo.setStyleSheet("padding: 5px;")
+        form_layout.addRow(QLabel("Campo:"), self.batch_field_combo)
+
+        # Un editor por tipo de campo; solo se muestra el del campo elegido
+        value_layout = QHBoxLayout()
+        self.batch_line_edit = QLineEdit()
+        self.batch_line_edit.setPlaceholderText("Vacío para borrar el valor")
+        self.batch_line_edit.setStyleSheet("padding: 5px; border-radius: 4px; border: 1px solid #ccc;")
+        self.batch_checkbox = QCheckBox("Sí")
+        self.batch_spinbox = QSpinBox()
+        self.batch_spinbox.setMinimum(1)
+        self.batch_spinbox.setMaximum(999999999)
+        self.batch_spinbox.setStyleSheet("padding: 5px; border-radius: 4px; border: 1px solid #ccc;")
+        value_layout.addWidget(self.batch_line_edit)
+        value_layout.addWidget(self.batch_checkbox)
+        value_layout.addWidget(self.batch_spinbox)
+        form_layout.addRow(QLabel("Nuevo valor:"), value_layout)
+        dialog_layout.addLayout(form_layout)
+
+        def show_value_editor():
+            _, widget_type = self.batch_field_combo.currentData()
+            self.batch_line_edit.setVisible(widget_type == QLineEdit)
+            self.batch_checkbox.setVisible(widget_type == QCheckBox)
+            self.batch_spinbox.setVisible(widget_type == QSpinBox)
+        self.batch_field_combo.currentIndexChanged.connect(show_value_editor)
+        show_value_editor()
+
+        buttons_layout = QHBoxLayout()
+        apply_button = QPushButton("Aplicar a Todas")
+        apply_button.clicked.connect(self.save_batch_edit)
+        apply_button.setStyleSheet("""
+            QPushButton {
+                background-color: #4CAF50;
+                color: white;
+                padding: 10px 20px;
+                border: none;
+                border-radius: 5px;
+                font-weight: bold;
+                font-size: 16px;
+                margin-top: 15px;
+            }
+            QPushButton:hover {
+                background-color: #45a049;
+            }
+        """)
+        cancel_button = QPushButton("Cancelar")
+        cancel_button.clicked.connect(self.batch_dialog.reject)
+        cancel_button.setStyleSheet("""
+            QPushButton {
+                background-color: #7F8C8D;
+                color: white;
+                padding: 10px 20px;
+                border: none;
+                border-radius: 5px;
+                font-weight: bold;
+                font-size: 16px;
+                margin-top: 15px;
+            }
+            QPushButton:hover {
+                background-color: #6C7A89;
+            }
+        """)
+        buttons_layout.addWidget(apply_button)
+        buttons_layout.addWidget(cancel_button)
+        dialog_layout.addLayout(buttons_layout)
+
+        self.batch_dialog.exec()
+
+    def save_batch_edit(self):
+        """Aplica el campo elegido a todas las monedas seleccionadas en una sola transacción."""
+        field_name, widget_type = self.batch_field_combo.currentData()
+        if widget_type == QCheckBox:
+            value = self.batch_checkbox.isChecked()
+        elif widget_type == QSpinBox:
+            value = self.batch_spinbox.value()
+        else:
+            try:
+                value = convert_edit_value(field_name, self.batch_line_edit.text().strip())
+            except ValueError as e:
+                QMessageBox.warning(self, "Error de Datos", str(e))
+                return
+
+        try:
+            updated = coin_data_manager.actualizar_monedas(self.batch_coin_ids, {field_name: value})
+            QMessageBox.information(self, "Éxito", f"✅ {updated} monedas actualizadas correctamente.")
+        except coin_data_manager.ConflictoDeEdicion as e:
+            QMessageBox.warning(self, "Conflicto de Edición", f"⚠️ {e}")
         except Exception as e:
             QMessageBox.critical(self, "Error al Actualizar", f"❌ Ocurrió un error: {e}")
+            return
+        self.batch_dialog.accept()
+        # Los datos en memoria ya están al día: basta con repetir la búsqueda actual
+        self.refresh_results()
+        self.data_changed.emit()
 
     def delete_selected_coin(self):
-        """Elimina la moneda seleccionada de la colección."""
-        coin_id = self.get_selected_coin_id()
+        """Elimina de la colección las monedas seleccionadas."""
+        coin_ids = self.get_selected_coin_ids()
+        if len(coin_ids) > 1:
+            self.delete_selected_coins_batch(coin_ids)
+            return
+        coin_id = coin_ids[0] if coin_ids else None
         if not coin_id:
             return
 
@@ -600,8 +1000,143 @@ class SearchCoinTab(QWidget):
                 success = coin_data_manager.eliminar_moneda(coin_id)
                 if success:
                     QMessageBox.information(self, "Éxito", "🗑️ Moneda eliminada correctamente.")
-                    self.load_initial_data() # Recargar la tabla para reflejar la eliminación
+                    self.refresh_results() # Repetir la búsqueda actual sin la moneda eliminada
+                    self.data_changed.emit() # Notificar a las demás pestañas
                 else:
                     QMessageBox.warning(self, "Error", "No se pudo eliminar la moneda.")
             except Exception as e:
                 QMessageBox.critical(self, "Error al Eliminar", f"❌ Ocurrió un error: {e}")
+
+    def delete_selected_coins_batch(self, coin_ids):
+        """Elimina varias monedas en una sola transacción (un guardado y un único paso de deshacer)."""
+        reply = QMessageBox.question(self, "Confirmar Eliminación",
+                                     f"¿Está seguro de que desea eliminar las {len(coin_ids)} monedas seleccionadas?",
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        try:
+            deleted = coin_data_manager.eliminar_monedas(coin_ids)
+            QMessageBox.information(self, "Éxito", f"🗑️ {deleted} monedas eliminadas correctamente.")
+        except coin_data_manager.ConflictoDeEdicion as e:
+            QMessageBox.warning(self, "Conflicto de Edición", f"⚠️ {e}")
+        except Exception as e:
+            QMessageBox.critical(self, "Error al Eliminar", f"❌ Ocurrió un error: {e}")
+            return
+        self.refresh_results()
+        self.data_changed.emit()
+
+    def show_duplicates_dialog(self):
+        """Muestra los grupos de posibles monedas duplicadas y permite fusionarlos."""
+        try:
+            groups = coin_data_manager.buscar_monedas_duplicadas()
+        except Exception as e:
+            QMessageBox.critical(self, "Error al Buscar Duplicados", f"❌ Ocurrió un error: {e}")
+            return
+        if not groups:
+            QMessageBox.information(self, "Sin Duplicados", "No se han encontrado monedas duplicadas.")
+            return
+
+        self.duplicates_dialog = QDialog(self)
+        self.duplicates_dialog.setWindowTitle("Posibles Monedas Duplicadas")
+        self.duplicates_dialog.resize(900, 500)
+        dialog_layout = QVBoxLayout(self.duplicates_dialog)
+
+        info_label = QLabel("Monedas con el mismo país, año, valor nominal y ceca. Seleccione en cada grupo "
+                            "la moneda que desea conservar (por defecto, la primera): las demás se eliminarán "
+                            "y sus cantidades se sumarán a ella.")
+        info_label.setWordWrap(True)
+        info_label.setStyleSheet("font-size: 14px; color: #34495E; margin-bottom: 10px;")
+        dialog_layout.addWidget(info_label)
+
+        columns = [
+            (coin_data_manager.CAMPO_CODIGO_UNICO, "Código Único"),
+            (coin_data_manager.CAMPO_PAIS_EMISOR, "País"),
+            (coin_data_manager.CAMPO_ANO_ACUNACION, "Año"),
+            (coin_data_manager.CAMPO_VALOR_NOMINAL, "Valor Nominal"),
+            (coin_data_manager.CAMPO_CECA, "Ceca"),
+            (coin_data_manager.CAMPO_ESTADO, "Estado"),
+            (coin_data_manager.CAMPO_CANTIDAD, "Cantidad"),
+        ]
+        self.duplicates_tree = QTreeWidget()
+        self.duplicates_tree.setHeaderLabels([label for _, label in columns])
+        for index, group in enumerate(groups, start=1):
+            group_item = QTreeWidgetItem([f"Grupo {index} — parecido {group['puntuacion']:.0%}"])
+            group_item.setFirstColumnSpanned(True)
+            self.duplicates_tree.addTopLevelItem(group_item)
+            for coin in group["monedas"]:
+                coin_item = QTreeWidgetItem(group_item, [str(coin.get(field, '') or '') for field, _ in columns])
+                coin_item.setData(0, Qt.ItemDataRole.UserRole, coin.get(coin_data_manager.CAMPO_CODIGO_UNICO))
+            group_item.setExpanded(True)
+        self.duplicates_tree.header().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        dialog_layout.addWidget(self.duplicates_tree)
+
+        buttons_layout = QHBoxLayout()
+        merge_button = QPushButton("Fusionar Grupo Seleccionado")
+        merge_button.clicked.connect(self.merge_selected_duplicates)
+        merge_button.setStyleSheet("""
+            QPushButton {
+                background-color: #4CAF50;
+                color: white;
+                padding: 10px 20px;
+                border: none;
+                border-radius: 5px;
+                font-weight: bold;
+                font-size: 16px;
+                margin-top: 15px;
+            }
+            QPushButton:hover {
+                background-color: #45a049;
+            }
+        """)
+        close_button = QPushButton("Cerrar")
+        close_button.clicked.connect(self.duplicates_dialog.reject)
+        close_button.setStyleSheet("""
+            QPushButton {
+                background-color: #7F8C8D;
+                color: white;
+                padding: 10px 20px;
+                border: none;
+                border-radius: 5px;
+                font-weight: bold;
+                font-size: 16px;
+                margin-top: 15px;
+            }
+            QPushButton:hover {
+                background-color: #6C7A89;
+            }
+        """)
+        buttons_layout.addWidget(merge_button)
+        buttons_layout.addWidget(close_button)
+        dialog_layout.addLayout(buttons_layout)
+
+        self.duplicates_dialog.exec()
+
+    def merge_selected_duplicates(self):
+        """Fusiona el grupo seleccionado en la moneda seleccionada (o en la primera del grupo)."""
+        item = self.duplicates_tree.currentItem()
+        if item is None:
+            QMessageBox.warning(self, "Ningún Grupo Seleccionado", "Por favor, seleccione un grupo o una moneda de la lista.")
+            return
+        group_item = item.parent() or item
+        coin_ids = [group_item.child(i).data(0, Qt.ItemDataRole.UserRole) for i in range(group_item.childCount())]
+        keep_id = item.data(0, Qt.ItemDataRole.UserRole) if item.parent() else coin_ids[0]
+        other_ids = [coin_id for coin_id in coin_ids if coin_id != keep_id]
+
+        reply = QMessageBox.question(self, "Confirmar Fusión",
+                                     f"¿Desea fusionar {len(other_ids)} monedas en {keep_id}? "
+                                     "Se sumarán sus cantidades y se eliminarán.",
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        try:
+            merged = coin_data_manager.fusionar_monedas(keep_id, other_ids)
+            if not merged:
+                QMessageBox.warning(self, "Error", "No se pudo fusionar el grupo: las monedas ya no existen.")
+        except coin_data_manager.ConflictoDeEdicion as e:
+            QMessageBox.warning(self, "Conflicto de Edición", f"⚠️ {e}")
+        except Exception as e:
+            QMessageBox.critical(self, "Error al Fusionar", f"❌ Ocurrió un error: {e}")
+            return
+        self.duplicates_tree.takeTopLevelItem(self.duplicates_tree.indexOfTopLevelItem(group_item))
+        self.refresh_results()
+        self.data_changed.emit()
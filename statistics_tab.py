@@ -3,32 +3,324 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QPixmap, QImage
-import matplotlib.pyplot as plt
-import numpy as np
+from collections import OrderedDict
+import hashlib
+import json
+import math
 import os
 from io import BytesIO
 
-# Asegurarse de que el backend de Matplotlib sea compatible con PyQt6
-import matplotlib
-matplotlib.use('QtAgg')
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-
 import coin_data_manager
+import instrumentacion
+
+# Matplotlib tarda cientos de milisegundos en importarse, así que no se importa
+# al cargar este módulo sino la primera vez que hay que dibujar un gráfico
+# que no está en la caché de imágenes.
+_matplotlib_cargado = None
+
+def _cargar_matplotlib():
+    """Importa Matplotlib solo cuando se necesita. Retorna (FigureCanvasAgg, Figure)."""
+    global _matplotlib_cargado
+    if _matplotlib_cargado is None:
+        # Los gráficos se dibujan fuera de pantalla con Agg y se muestran como imágenes,
+        # así que no hace falta el backend de Qt.
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        _matplotlib_cargado = (FigureCanvasAgg, Figure)
+    return _matplotlib_cargado
 
-class MplCanvas(FigureCanvas):
-    """Clase para incrustar un gráfico Matplotlib en una aplicación PyQt."""
-    def __init__(self, parent=None, width=5, height=4, dpi=100):
+class MplCanvas:
+    """Figura de Matplotlib dibujada fuera de pantalla que se exporta como imagen PNG."""
+    def __init__(self, width=5, height=4, dpi=100):
+        FigureCanvas, Figure = _cargar_matplotlib()
         # Asegurarse de que el color de fondo de la figura sea transparente
         # para evitar problemas de superposición con el fondo de PyQt.
         self.fig = Figure(figsize=(width, height), dpi=dpi, facecolor='none') 
         self.axes = self.fig.add_subplot(111)
         # Ocultar el marco del eje por defecto para una apariencia más limpia si no se usa.
         self.axes.set_frame_on(False) 
-        super(MplCanvas, self).__init__(self.fig)
-        self.setParent(parent)
+        self.canvas = FigureCanvas(self.fig)
+
+    def render_png(self):
+        """Dibuja la figura y retorna la imagen PNG resultante en bytes."""
+        buffer = BytesIO()
+        self.fig.savefig(buffer, format='png', dpi=self.fig.dpi, transparent=True)
+        return buffer.getvalue()
+
+# Número máximo de categorías que se dibujan por gráfico; el resto se agrupa en "Otros"
+MAX_CATEGORIAS_GRAFICO = 15
+ETIQUETA_OTROS = "Otros"
+
+def agrupar_categorias(data, max_categorias=MAX_CATEGORIAS_GRAFICO):
+    """
+    Ordena la distribución de mayor a menor y agrupa todo lo que exceda
+    'max_categorias' en una única categoría "Otros". Retorna una lista de (etiqueta, valor).
+    """
+    sorted_data = sorted(data.items(), key=lambda item: item[1], reverse=True)
+    if len(sorted_data) <= max_categorias:
+        return sorted_data
+    top = sorted_data[:max_categorias]
+    resto = sum(valor for _, valor in sorted_data[max_categorias:])
+    return top + [(ETIQUETA_OTROS, resto)]
+
+class BarChart(MplCanvas):
+    """
+    Gráfico de barras reutilizable. Las barras se crean una sola vez y en las
+    actualizaciones posteriores solo se cambian sus alturas y etiquetas.
+    """
+    def __init__(self, title, xlabel, ylabel, **kwargs):
+        super().__init__(**kwargs)
+        self.title = title
+        self.xlabel = xlabel
+        self.ylabel = ylabel
+        self._datos_actuales = None
+        self._barras = None
+        self._etiquetas = None
+
+    @staticmethod
+    def preparar_datos(data):
+        """Convierte una distribución en la lista de (etiqueta, valor) que se dibuja."""
+        return agrupar_categorias(data) if data else []
+
+    def update_data(self, datos):
+        """Actualiza las barras con datos ya preparados. No hace nada si no han cambiado."""
+        if datos == self._datos_actuales:
+            return
+        self._datos_actuales = datos
+
+        labels = [str(item[0]) for item in datos]
+        values = [item[1] for item in datos]
+        ax = self.axes
+        if self._barras is not None and len(self._barras) == len(values):
+            # Reutilizar las barras existentes
+            for barra, valor in zip(self._barras, values):
+                barra.set_height(valor)
+            ax.set_ylim(0, max(values) * 1.05)
+            if labels != self._etiquetas:
+                ax.set_xticks(range(len(labels)), labels, rotation=45, ha='right')
+                self._etiquetas = labels
+                self.fig.tight_layout()
+        else:
+            # El número de categorías ha cambiado: reconstruir las barras una única vez
+            ax.clear()
+            self._barras = ax.bar(range(len(values)), values, color='#3498DB') # Color azul
+            ax.set_title(self.title)
+            ax.set_xlabel(self.xlabel)
+            ax.set_ylabel(self.ylabel)
+            ax.set_ylim(0, max(values) * 1.05)
+            # Rotar etiquetas para que no se superpongan
+            ax.set_xticks(range(len(labels)), labels, rotation=45, ha='right')
+            self._etiquetas = labels
+            self.fig.tight_layout() # Ajustar el diseño para que no se superpongan los elementos
+
+class PieChart(MplCanvas):
+    """
+    Gráfico circular reutilizable. Si las categorías no cambian, se actualizan
+    los ángulos de los sectores y los porcentajes en lugar de volver a dibujarlo.
+    """
+    # Colores bonitos para el gráfico circular
+    COLORES = ['#2ECC71', '#E74C3C', '#F1C40F', '#9B59B6', '#3498DB', '#1ABC9C']
+    ANGULO_INICIAL = 90
+    DISTANCIA_PORCENTAJE = 0.6
+    DISTANCIA_ETIQUETA = 1.1
+
+    def __init__(self, title, **kwargs):
+        super().__init__(**kwargs)
+        self.title = title
+        self._datos_actuales = None
+        self._sectores = None
+        self._textos = None
+        self._porcentajes = None
+
+    @staticmethod
+    def preparar_datos(data):
+        """Convierte una distribución en la lista de (etiqueta, valor) que se dibuja."""
+        # Asegurarse de que haya datos y que la suma sea mayor que 0
+        return list(data.items()) if data and sum(data.values()) > 0 else []
+
+    def update_data(self, datos):
+        """Actualiza los sectores con datos ya preparados. No hace nada si no han cambiado."""
+        if datos == self._datos_actuales:
+            return
+        etiquetas_anteriores = [item[0] for item in self._datos_actuales] if self._datos_actuales else None
+        self._datos_actuales = datos
+
+        labels = [item[0] for item in datos]
+        values = [item[1] for item in datos]
+        if self._sectores is not None and labels == etiquetas_anteriores:
+            self._actualizar_sectores(values)
+        else:
+            ax = self.axes
+            ax.clear()
+            self._sectores, self._textos, self._porcentajes = ax.pie(
+                values, labels=labels, autopct='%1.1f%%', startangle=self.ANGULO_INICIAL,
+                colors=self.COLORES[:len(labels)],
+                pctdistance=self.DISTANCIA_PORCENTAJE, labeldistance=self.DISTANCIA_ETIQUETA,
+            )
+            ax.set_title(self.title)
+            ax.axis('equal') # Asegura que el círculo sea un círculo.
+            self.fig.tight_layout()
+
+    def _actualizar_sectores(self, values):
+        """Recalcula los ángulos de los sectores existentes igual que lo haría ax.pie."""
+        total = float(sum(values))
+        theta1 = self.ANGULO_INICIAL
+        for sector, texto, porcentaje, valor in zip(self._sectores, self._textos, self._porcentajes, values):
+            fraccion = valor / total
+            theta2 = theta1 + 360 * fraccion
+            sector.set_theta1(theta1)
+            sector.set_theta2(theta2)
+            medio = math.radians((theta1 + theta2) / 2)
+            x, y = math.cos(medio), math.sin(medio)
+            texto.set_position((self.DISTANCIA_ETIQUETA * x, self.DISTANCIA_ETIQUETA * y))
+            texto.set_horizontalalignment('left' if x > 0 else 'right')
+            porcentaje.set_position((self.DISTANCIA_PORCENTAJE * x, self.DISTANCIA_PORCENTAJE * y))
+            porcentaje.set_text('%1.1f%%' % (100 * fraccion))
+            theta1 = theta2
+
+# =========================================================================
+# Caché de imágenes de gráficos
+# =========================================================================
+# Directorio de la caché en disco; None para usar solo la caché en memoria
+DIRECTORIO_CACHE_GRAFICOS = os.path.join('assets', 'cache_graficos')
+MAX_IMAGENES_CACHE_MEMORIA = 64
+MAX_IMAGENES_CACHE_DISCO = 256
+
+class ChartImageCache:
+    """
+    Caché de gráficos ya dibujados, como imágenes PNG, indexada por
+    (gráfico, hash de la distribución, tamaño, dpi). Se guarda en memoria (LRU)
+    y opcionalmente en disco, de modo que al reiniciar con los mismos datos
+    los gráficos se muestran sin invocar a Matplotlib.
+    """
+    def __init__(self, directorio=DIRECTORIO_CACHE_GRAFICOS, max_memoria=MAX_IMAGENES_CACHE_MEMORIA,
+                 max_disco=MAX_IMAGENES_CACHE_DISCO):
+        self.directorio = directorio
+        self.max_memoria = max_memoria
+        self.max_disco = max_disco
+        self._memoria = OrderedDict()
+
+    @staticmethod
+    def crear_clave(chart_name, datos, width, height, dpi):
+        """Crea la clave de caché a partir de los datos ya preparados para dibujar."""
+        contenido = json.dumps([chart_name, datos], ensure_ascii=False, default=str)
+        hash_datos = hashlib.sha1(contenido.encode('utf-8')).hexdigest()
+        return f"{chart_name}_{hash_datos}_{width}x{height}_{dpi}"
+
+    def _ruta_disco(self, clave):
+        return os.path.join(self.directorio, f"{clave}.png")
+
+    def obtener(self, clave):
+        """Retorna los bytes PNG de la clave, o None si no está en caché."""
+        png = self._memoria.get(clave)
+        if png is not None:
+            self._memoria.move_to_end(clave)
+            return png
+        if self.directorio:
+            try:
+                with open(self._ruta_disco(clave), 'rb') as f:
+                    png = f.read()
+            except OSError:
+                return None
+            self._guardar_en_memoria(clave, png)
+        return png
+
+    def guardar(self, clave, png):
+        """Guarda una imagen en memoria y, si está habilitado, en disco."""
+        self._guardar_en_memoria(clave, png)
+        if not self.directorio:
+            return
+        try:
+            os.makedirs(self.directorio, exist_ok=True)
+            ruta = self._ruta_disco(clave)
+            with open(f"{ruta}.tmp", 'wb') as f:
+                f.write(png)
+            os.replace(f"{ruta}.tmp", ruta)
+            self._limpiar_disco()
+        except OSError as e:
+            print(f"Advertencia: no se pudo guardar el gráfico en la caché de disco: {e}")
+
+    def _guardar_en_memoria(self, clave, png):
+        self._memoria[clave] = png
+        self._memoria.move_to_end(clave)
+        while len(self._memoria) > self.max_memoria:
+            self._memoria.popitem(last=False)
+
+    def _limpiar_disco(self):
+        """Elimina las imágenes más antiguas si la caché en disco supera su tamaño máximo."""
+        archivos = [os.path.join(self.directorio, nombre) for nombre in os.listdir(self.directorio) if nombre.endswith('.png')]
+        if len(archivos) <= self.max_disco:
+            return
+        archivos.sort(key=os.path.getmtime)
+        for ruta in archivos[:len(archivos) - self.max_disco]:
+            try:
+                os.remove(ruta)
+            except OSError:
+                pass
+
+class ChartWidget(QLabel):
+    """
+    Muestra un gráfico como imagen. La figura de Matplotlib (BarChart o PieChart)
+    solo se crea y se dibuja cuando la imagen no está en la caché.
+    """
+    def __init__(self, parent, chart_name, chart_class, cache, *chart_args, width=8, height=6, dpi=100):
+        super().__init__(parent)
+        self.chart_name = chart_name
+        self.chart_class = chart_class
+        self.chart_args = chart_args
+        self.width_in = width
+        self.height_in = height
+        self.dpi = dpi
+        self.cache = cache
+        self._figura = None
+        self._clave_actual = None
+        self.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.setMinimumHeight(int(height * dpi))
         self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-        self.updateGeometry()
+
+    def update_data(self, data):
+        """Muestra la distribución dada. Retorna True si hay datos que mostrar."""
+        datos = self.chart_class.preparar_datos(data)
+        if not datos:
+            self._clave_actual = None
+            self.clear()
+            self.setText("No hay datos para este gráfico.")
+            self.setStyleSheet("font-size: 14px; color: gray;")
+            return False
+
+        # En pantallas de alta densidad se dibuja con más dpi para que la imagen sea nítida
+        ratio = self.devicePixelRatioF()
+        dpi = int(round(self.dpi * ratio))
+        clave = ChartImageCache.crear_clave(self.chart_name, datos, self.width_in, self.height_in, dpi)
+        if clave == self._clave_actual:
+            # La distribución no ha cambiado: no hace falta redibujar
+            return True
+
+        png = self.cache.obtener(clave)
+        if png is None:
+            instrumentacion.contar("cache_graficos_fallos")
+            with instrumentacion.medir(f"dibujar_grafico.{self.chart_name}", "graficos"):
+                if self._figura is None:
+                    self._figura = self.chart_class(*self.chart_args, width=self.width_in, height=self.height_in, dpi=dpi)
+                self._figura.fig.set_dpi(dpi)
+                self._figura.update_data(datos)
+                png = self._figura.render_png()
+            self.cache.guardar(clave, png)
+        else:
+            instrumentacion.contar("cache_graficos_aciertos")
+
+        pixmap = QPixmap()
+        if pixmap.loadFromData(png, 'PNG'):
+            pixmap.setDevicePixelRatio(ratio)
+            self.setStyleSheet("")
+            self.setPixmap(pixmap)
+            self._clave_actual = clave
+        return True
+
+def format_amount(amount, currency):
+    """Importe con separador de miles y dos decimales al estilo español: 1.234,56 Euro."""
+    text = f"{amount:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".")
+    return f"{text} {currency}"
 
 class StatisticsTab(QWidget):
     def __init__(self):
@@ -37,10 +329,15 @@ class StatisticsTab(QWidget):
         self.kpi_value_unique_coins_label = QLabel("0")
         self.kpi_value_total_coins_label = QLabel("0")
         self.kpi_value_unique_countries_label = QLabel("0")
+        self.kpi_value_total_value_label = QLabel("0")
+        self.kpi_value_top_country_label = QLabel("-")
+        self.kpi_value_missing_rates_label = QLabel("0")
+
+        # Gráficos cuyos datos han cambiado y aún no se han dibujado
+        self._graficos_pendientes = set()
 
         self.init_ui()
-        # Se llama a update_statistics al inicio para cargar los datos iniciales
-        self.update_statistics()
+        # Los datos se cargan con update_statistics cuando la pestaña se activa por primera vez
 
     def init_ui(self):
         main_layout = QVBoxLayout(self)
@@ -66,6 +363,18 @@ class StatisticsTab(QWidget):
         kpi_layout.addWidget(self.kpi_unique_countries)
         main_layout.addLayout(kpi_layout)
 
+        # KPIs de valoración (valor × cantidad, convertido a la moneda base)
+        value_kpi_layout = QHBoxLayout()
+        value_kpi_layout.setSpacing(20)
+        value_kpi_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.kpi_total_value = self._create_kpi_widget("Valor Total de la Colección", self.kpi_value_total_value_label, 'moneda_oro_kpi.png')
+        self.kpi_top_country = self._create_kpi_widget("País de Mayor Valor", self.kpi_value_top_country_label, 'moneda_plata_kpi.png')
+        self.kpi_missing_rates = self._create_kpi_widget("Unidades sin Tipo de Cambio", self.kpi_value_missing_rates_label, 'moneda_bronce_kpi.png')
+        value_kpi_layout.addWidget(self.kpi_total_value)
+        value_kpi_layout.addWidget(self.kpi_top_country)
+        value_kpi_layout.addWidget(self.kpi_missing_rates)
+        main_layout.addLayout(value_kpi_layout)
+
         # --- Área de Gráficos (Scrollable) ---
         chart_scroll_area = QScrollArea()
         chart_scroll_area.setWidgetResizable(True)
@@ -75,14 +384,20 @@ class StatisticsTab(QWidget):
         self.chart_layout.setSpacing(30) # Espacio entre gráficos
         chart_scroll_area.setWidget(chart_content_widget)
         main_layout.addWidget(chart_scroll_area)
+        # Dibujar los gráficos pendientes a medida que entran en la zona visible
+        chart_scroll_area.verticalScrollBar().valueChanged.connect(self._render_visible_charts)
+        self.chart_scroll_area = chart_scroll_area
 
-        # Contenedores para los gráficos (Matplotlib Canvas)
-        self.canvas_pais = MplCanvas(self, width=8, height=6, dpi=100)
-        self.canvas_ceca = MplCanvas(self, width=8, height=6, dpi=100)
-        self.canvas_estado = MplCanvas(self, width=8, height=6, dpi=100)
-        self.canvas_desmonetizada = MplCanvas(self, width=8, height=6, dpi=100)
-        self.canvas_tipo = MplCanvas(self, width=8, height=6, dpi=100)
-        self.canvas_orientacion = MplCanvas(self, width=8, height=6, dpi=100)
+        # Contenedores para los gráficos. Se muestran como imágenes que se toman de la
+        # caché si la distribución no ha cambiado; Matplotlib solo se usa si falta la imagen.
+        self.chart_cache = ChartImageCache()
+        self.canvas_pais = ChartWidget(self, 'pais', BarChart, self.chart_cache, "Distribución por País Emisor", "País", "Número de Monedas")
+        self.canvas_ceca = ChartWidget(self, 'ceca', BarChart, self.chart_cache, "Distribución por Ceca", "Ceca", "Número de Monedas")
+        self.canvas_estado = ChartWidget(self, 'estado', BarChart, self.chart_cache, "Distribución por Estado de Conservación", "Estado", "Número de Monedas")
+        self.canvas_desmonetizada = ChartWidget(self, 'desmonetizada', PieChart, self.chart_cache, "Monedas Desmonetizadas")
+        self.canvas_tipo = ChartWidget(self, 'tipo', BarChart, self.chart_cache, "Distribución por Tipo de Moneda", "Tipo", "Número de Monedas")
+        self.canvas_orientacion = ChartWidget(self, 'orientacion', BarChart, self.chart_cache, "Distribución por Orientación", "Orientación", "Número de Monedas")
+        self.canvas_valor_pais = ChartWidget(self, 'valor_pais', BarChart, self.chart_cache, "Valor por País Emisor", "País", "Valor")
 
         self.chart_layout.addWidget(self.canvas_pais)
         self.chart_layout.addWidget(self.canvas_ceca)
@@ -90,6 +405,7 @@ class StatisticsTab(QWidget):
         self.chart_layout.addWidget(self.canvas_desmonetizada)
         self.chart_layout.addWidget(self.canvas_tipo)
         self.chart_layout.addWidget(self.canvas_orientacion)
+        self.chart_layout.addWidget(self.canvas_valor_pais)
 
         # Etiquetas para mostrar mensajes de "No hay datos"
         self.no_data_labels = {}
@@ -99,7 +415,8 @@ class StatisticsTab(QWidget):
             "estado": self.canvas_estado, 
             "desmonetizada": self.canvas_desmonetizada, 
             "tipo": self.canvas_tipo, 
-            "orientacion": self.canvas_orientacion
+            "orientacion": self.canvas_orientacion,
+            "valor_pais": self.canvas_valor_pais,
         }
         for chart_name, canvas_widget in chart_types.items():
             no_data_label = QLabel("No hay suficientes datos para este gráfico.")
@@ -110,6 +427,18 @@ class StatisticsTab(QWidget):
             # Insertar la etiqueta debajo de su gráfico correspondiente
             self.chart_layout.insertWidget(self.chart_layout.indexOf(canvas_widget) + 1, no_data_label)
 
+        # Definición de cada gráfico: canvas y función que obtiene sus datos.
+        # Los datos solo se calculan cuando el gráfico se va a dibujar.
+        self.chart_definitions = {
+            'pais': (self.canvas_pais, coin_data_manager.obtener_distribucion_por_pais),
+            'ceca': (self.canvas_ceca, coin_data_manager.obtener_distribucion_por_ceca),
+            'estado': (self.canvas_estado, coin_data_manager.obtener_distribucion_por_estado_conservacion),
+            'desmonetizada': (self.canvas_desmonetizada, coin_data_manager.obtener_distribucion_desmonetizacion),
+            'tipo': (self.canvas_tipo, coin_data_manager.obtener_distribucion_por_tipo),
+            'orientacion': (self.canvas_orientacion, coin_data_manager.obtener_distribucion_por_orientacion),
+            'valor_pais': (self.canvas_valor_pais, lambda: coin_data_manager.obtener_valoracion()["por_pais"]),
+        }
+
 
     def _create_kpi_widget(self, title, value_label_ref, icon_filename):
         """
@@ -127,7 +456,8 @@ class StatisticsTab(QWidget):
         icon_label = QLabel()
         icon_path = os.path.join('assets', icon_filename)
         if os.path.exists(icon_path):
-            pixmap = QPixmap(icon_path)
+            with instrumentacion.medir("cargar_imagen", "imagenes"):
+                pixmap = QPixmap(icon_path)
             if not pixmap.isNull():
                 icon_label.setPixmap(pixmap.scaled(50, 50, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
         icon_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
@@ -146,68 +476,57 @@ class StatisticsTab(QWidget):
         return kpi_widget
 
     def update_statistics(self):
-        """Actualiza todos los KPIs y gráficos con los datos actuales de la colección."""
+        """Actualiza los KPIs y marca los gráficos para redibujarse cuando sean visibles."""
         
         # --- Actualizar KPIs ---
         self.kpi_value_unique_coins_label.setText(str(coin_data_manager.obtener_conteo_monedas_unicas()))
         self.kpi_value_total_coins_label.setText(str(coin_data_manager.obtener_conteo_monedas_total()))
         self.kpi_value_unique_countries_label.setText(str(coin_data_manager.obtener_conteo_paises_unicos()))
 
-        # --- Actualizar Gráficos ---
-        # Pasamos el Matplotlib Canvas.ax y el Matplotlib Canvas.fig al método de trazado
-        self._plot_bar_chart(self.canvas_pais.axes, self.canvas_pais.fig, coin_data_manager.obtener_distribucion_por_pais(), 
-                             "Distribución por País Emisor", "País", "Número de Monedas", 'pais')
-        self._plot_bar_chart(self.canvas_ceca.axes, self.canvas_ceca.fig, coin_data_manager.obtener_distribucion_por_ceca(), 
-                             "Distribución por Ceca", "Ceca", "Número de Monedas", 'ceca')
-        self._plot_bar_chart(self.canvas_estado.axes, self.canvas_estado.fig, coin_data_manager.obtener_distribucion_por_estado_conservacion(), 
-                             "Distribución por Estado de Conservación", "Estado", "Número de Monedas", 'estado')
-        self._plot_pie_chart(self.canvas_desmonetizada.axes, self.canvas_desmonetizada.fig, coin_data_manager.obtener_distribucion_desmonetizacion(), 
-                             "Monedas Desmonetizadas", 'desmonetizada')
-        self._plot_bar_chart(self.canvas_tipo.axes, self.canvas_tipo.fig, coin_data_manager.obtener_distribucion_por_tipo(), 
-                             "Distribución por Tipo de Moneda", "Tipo", "Número de Monedas", 'tipo')
-        self._plot_bar_chart(self.canvas_orientacion.axes, self.canvas_orientacion.fig, coin_data_manager.obtener_distribucion_por_orientacion(), 
-                             "Distribución por Orientación", "Orientación", "Número de Monedas", 'orientacion')
-
-
-    def _plot_bar_chart(self, ax, fig, data, title, xlabel, ylabel, chart_name):
-        """Dibuja un gráfico de barras."""
-        ax.clear()
-        if data:
-            # Ordenar los datos por valor de mayor a menor para mejor visualización
-            sorted_data = sorted(data.items(), key=lambda item: item[1], reverse=True)
-            labels = [item[0] for item in sorted_data]
-            values = [item[1] for item in sorted_data]
-
-            ax.bar(labels, values, color='#3498DB') # Color azul
-            ax.set_title(title)
-            ax.set_xlabel(xlabel)
-            ax.set_ylabel(ylabel)
-            ax.tick_params(axis='x', rotation=45, ha='right') # Rotar etiquetas para que no se superpongan
-            self.no_data_labels[chart_name].hide()
-        else:
-            ax.text(0.5, 0.5, "No hay datos para este gráfico.", horizontalalignment='center', 
-                    verticalalignment='center', transform=ax.transAxes, fontsize=14, color='gray')
-            self.no_data_labels[chart_name].show() # Mostrar etiqueta de no datos
-        fig.tight_layout() # Ajustar el diseño para que no se superpongan los elementos
-        fig.canvas.draw_idle() # Redibujar el canvas asociado a la figura
-
-    def _plot_pie_chart(self, ax, fig, data, title, chart_name):
-        """Dibuja un gráfico circular."""
-        ax.clear()
-        if data and sum(data.values()) > 0: # Asegurarse de que haya datos y que la suma sea mayor que 0
-            labels = list(data.keys())
-            values = list(data.values())
-            
-            # Colores bonitos para el gráfico circular
-            colors = ['#2ECC71', '#E74C3C', '#F1C40F', '#9B59B6', '#3498DB', '#1ABC9C']
-            
-            ax.pie(values, labels=labels, autopct='%1.1f%%', startangle=90, colors=colors[:len(labels)])
-            ax.set_title(title)
-            ax.axis('equal') # Asegura que el círculo sea un círculo.
-            self.no_data_labels[chart_name].hide()
+        # La valoración se mantiene al día con cada cambio, así que consultarla es inmediato
+        valuation = coin_data_manager.obtener_valoracion()
+        currency = valuation["moneda_base"]
+        self.kpi_value_total_value_label.setText(format_amount(valuation["total"], currency))
+        by_country = valuation["por_pais"]
+        if by_country:
+            top_country = max(by_country, key=by_country.get)
+            self.kpi_value_top_country_label.setText(top_country)
+            self.kpi_value_top_country_label.setToolTip(format_amount(by_country[top_country], currency))
         else:
-            ax.text(0.5, 0.5, "No hay datos para este gráfico.", horizontalalignment='center', 
-                    verticalalignment='center', transform=ax.transAxes, fontsize=14, color='gray')
-            self.no_data_labels[chart_name].show() # Mostrar etiqueta de no datos
-        fig.tight_layout()
-        fig.canvas.draw_idle() # Redibujar el canvas asociado a la figura
+            self.kpi_value_top_country_label.setText("-")
+            self.kpi_value_top_country_label.setToolTip("")
+        missing_rates = valuation["sin_tipo_cambio"]
+        self.kpi_value_missing_rates_label.setText(str(len(missing_rates)))
+        self.kpi_value_missing_rates_label.setToolTip(
+            "No se incluyen en el valor total: " + ", ".join(missing_rates) if missing_rates else "")
+
+        # --- Actualizar Gráficos ---
+        # No se dibuja nada todavía: solo los gráficos visibles se dibujan ahora
+        # y el resto cuando el usuario se desplace hasta ellos.
+        self._graficos_pendientes = set(self.chart_definitions)
+        self._render_visible_charts()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        # Esperar a que el diseño se haya calculado para saber qué gráficos son visibles
+        QTimer.singleShot(0, self._render_visible_charts)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self._graficos_pendientes:
+            QTimer.singleShot(0, self._render_visible_charts)
+
+    def _render_visible_charts(self):
+        """Dibuja los gráficos pendientes que estén dentro de la zona visible."""
+        if not self._graficos_pendientes or not self.isVisible():
+            return
+        for chart_name in list(self._graficos_pendientes):
+            canvas, obtener_datos = self.chart_definitions[chart_name]
+            if canvas.visibleRegion().isEmpty():
+                continue
+            self._graficos_pendientes.discard(chart_name)
+            # El gráfico solo se dibuja con Matplotlib si su imagen no está en la caché
+            if canvas.update_data(obtener_datos()):
+                self.no_data_labels[chart_name].hide()
+            else:
+                self.no_data_labels[chart_name].show() # Mostrar etiqueta de no datos
@@ -0,0 +1,115 @@
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QImage, QPixmap
+from collections import OrderedDict
+
+import instrumentacion
+import miniaturas
+
+# Memoria máxima (aproximada) de las miniaturas decodificadas que se conservan
+MAX_MEMORIA_CACHE_BYTES = 64 * 1024 * 1024
+
+
+class _LoaderSignals(QObject):
+    # (ruta de la imagen, miniatura; QImage nula si no se pudo cargar)
+    loaded = pyqtSignal(str, QImage)
+
+
+class _ThumbnailTask(QRunnable):
+    """Genera (si hace falta) y decodifica la miniatura de una imagen en un hilo del pool."""
+    def __init__(self, path, signals):
+        super().__init__()
+        self.path = path
+        self.signals = signals
+
+    def run(self):
+        image = QImage()
+        try:
+            with instrumentacion.medir("cargar_miniatura", "imagenes"):
+                image = QImage(miniaturas.generar_miniatura(self.path))
+        except (OSError, ValueError):
+            pass
+        # QImage se puede crear fuera del hilo principal; el QPixmap se crea al recibir la señal
+        self.signals.loaded.emit(self.path, image)
+
+
+class ThumbnailLoader(QObject):
+    """
+    Carga miniaturas de imágenes en segundo plano (QThreadPool) y conserva las últimas
+    usadas en una caché LRU limitada por memoria. Las peticiones repetidas de una
+    imagen que ya se está cargando no lanzan otra tarea.
+    """
+    # (ruta de la imagen, miniatura; QPixmap nulo si no se pudo cargar)
+    thumbnail_ready = pyqtSignal(str, QPixmap)
+
+    def __init__(self, parent=None, max_bytes=MAX_MEMORIA_CACHE_BYTES):
+        super().__init__(parent)
+        self.max_bytes = max_bytes
+        self._cache = OrderedDict() # ruta -> QPixmap
+        self._cache_bytes = 0
+        self._pending = set()
+        self._pool = QThreadPool(self)
+        self._signals = _LoaderSignals()
+        self._signals.loaded.connect(self._on_loaded)
+
+    def cached(self, path):
+        """Retorna la miniatura si ya está en memoria, o None."""
+        pixmap = self._cache.get(path)
+        if pixmap is not None:
+            self._cache.move_to_end(path)
+        return pixmap
+
+    def request(self, path, priority=0):
+        """
+        Pide la miniatura de una imagen. Si está en memoria se retorna directamente;
+        si no, se carga en segundo plano, se emite thumbnail_ready y se retorna None.
+        Las peticiones con mayor prioridad se atienden antes.
+        """
+        pixmap = self.cached(path)
+        if pixmap is not None:
+            return pixmap
+        if path and path not in self._pending:
+            self._pending.add(path)
+            self._pool.start(_ThumbnailTask(path, self._signals), priority)
+        return None
+
+    def cancel_pending(self):
+        """Descarta las peticiones que aún no han empezado (p. ej. al desplazarse lejos)."""
+        self._pool.clear()
+        # Las tareas en curso terminarán y emitirán su resultado igualmente
+        self._pending.clear()
+
+    def invalidate(self, path):
+        """Olvida la miniatura de una imagen que ha cambiado en disco."""
+        pixmap = self._cache.pop(path, None)
+        if pixmap is not None:
+            self._cache_bytes -= self._pixmap_bytes(pixmap)
+
+    @staticmethod
+    def _pixmap_bytes(pixmap):
+        return pixmap.width() * pixmap.height() * 4
+
+    def _on_loaded(self, path, image):
+        self._pending.discard(path)
+        pixmap = QPixmap.fromImage(image) if not image.isNull() else QPixmap()
+        if not pixmap.isNull():
+            self.invalidate(path)
+            self._cache[path] = pixmap
+            self._cache_bytes += self._pixmap_bytes(pixmap)
+            while self._cache_bytes > self.max_bytes and len(self._cache) > 1:
+                _, oldest = self._cache.popitem(last=False)
+                self._cache_bytes -= self._pixmap_bytes(oldest)
+        self.thumbnail_ready.emit(path, pixmap)
+
+    def memory_usage(self):
+        """(miniaturas en memoria, bytes aproximados)"""
+        return len(self._cache), self._cache_bytes
+
+
+_shared_loader = None
+
+def shared_loader():
+    """Cargador de miniaturas compartido por todas las pestañas y diálogos."""
+    global _shared_loader
+    if _shared_loader is None:
+        _shared_loader = ThumbnailLoader()
+    return _shared_loader
@@ -0,0 +1,213 @@
+import json
+import os
+
+from busqueda_difusa import normalizar_texto
+
+# =========================================================================
+# Valoración de la colección
+# =========================================================================
+# El valor de cada moneda es valor × cantidad, expresado en su unidad monetaria.
+# Para sumar monedas de distintas unidades se convierten a una moneda base con una
+# tabla local de tipos de cambio (ARCHIVO_TIPOS_CAMBIO); si no existe se usan las
+# paridades fijas de las monedas que sustituyó el euro.
+#
+# El motor se construye en una pasada por columna (como el índice de facetas) y
+# guarda por posición solo los cuatro campos que necesita, de modo que añadir o
+# editar una moneda ajusta los totales restando su aportación anterior y sumando
+# la nueva, sin volver a recorrer la colección.
+# =========================================================================
+
+DIRECTORIO_BASE = os.path.dirname(os.path.abspath(__file__))
+# Formato: {"moneda_base": "Euro", "tipos": {"Peseta": 0.00601012, ...}}
+# cada tipo son unidades de la moneda base por una unidad de esa moneda.
+ARCHIVO_TIPOS_CAMBIO = os.path.join(DIRECTORIO_BASE, 'assets', 'tipos_cambio.json')
+
+MONEDA_BASE_PREDETERMINADA = "Euro"
+# Paridades irrevocables con el euro; el resto de monedas hay que añadirlas al archivo.
+# "Céntimo" no se incluye: sin saber si es de euro o de peseta no se puede convertir,
+# así que aparece entre las unidades sin tipo de cambio.
+TIPOS_CAMBIO_PREDETERMINADOS = {
+    "Euro": 1.0,
+    "Peseta": 1 / 166.386,
+    "Marco": 1 / 1.95583,
+    "Franco": 1 / 6.55957, # Franco francés
+    "Lira": 1 / 1936.27,
+    "Escudo": 1 / 200.482,
+    "Florín": 1 / 2.20371,
+    "Chelín": 1 / 13.7603,
+    "Dracma": 1 / 340.750,
+    "Marco finlandés": 1 / 5.94573,
+    "Libra irlandesa": 1 / 0.787564,
+}
+
+
+def clave_unidad(unidad):
+    """Clave con la que se agrupa una unidad monetaria ("Pesetas" y "peseta" son la misma)."""
+    clave = normalizar_texto(unidad)
+    if clave.endswith('es') and len(clave) > 4 and clave[-3] not in 'aeiou':
+        return clave[:-2]
+    if clave.endswith('s') and len(clave) > 3:
+        return clave[:-1]
+    return clave
+
+
+def _numero(valor):
+    """Convierte un valor numérico del formulario o del JSON en float, o None si no lo es."""
+    if valor is None or isinstance(valor, bool):
+        return None
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    try:
+        return float(str(valor).strip().replace(',', '.'))
+    except ValueError:
+        return None
+
+
+def _cantidad(valor):
+    # Como obtener_conteo_monedas_total: una cantidad no numérica cuenta como 1
+    try:
+        return int(valor)
+    except (ValueError, TypeError):
+        return 1
+
+
+class TablaTiposCambio:
+    """Tipos de cambio a la moneda base, indexados por clave de unidad."""
+    def __init__(self, moneda_base=MONEDA_BASE_PREDETERMINADA, tipos=None):
+        self.moneda_base = moneda_base
+        tipos = TIPOS_CAMBIO_PREDETERMINADOS if tipos is None else tipos
+        self.tipos = {clave_unidad(unidad): float(tipo) for unidad, tipo in tipos.items()}
+        self.tipos.setdefault(clave_unidad(moneda_base), 1.0)
+
+    def tipo(self, unidad):
+        """Unidades de la moneda base por unidad de 'unidad', o None si no se conoce."""
+        return self.tipos.get(clave_unidad(unidad))
+
+
+_tabla_cargada = None # (firma del archivo, TablaTiposCambio)
+
+def tabla_tipos_cambio(archivo=ARCHIVO_TIPOS_CAMBIO):
+    """
+    Tabla de tipos de cambio del archivo local, o la predeterminada si no existe.
+    Solo se vuelve a leer si el archivo ha cambiado; si no, se retorna el mismo objeto.
+    """
+    global _tabla_cargada
+    try:
+        estado = os.stat(archivo)
+        firma = (archivo, estado.st_mtime_ns, estado.st_size)
+    except FileNotFoundError:
+        firma = (archivo, None)
+    if _tabla_cargada is None or _tabla_cargada[0] != firma:
+        if firma[1] is None:
+            tabla = TablaTiposCambio()
+        else:
+            with open(archivo, 'r', encoding='utf-8') as f:
+                datos = json.load(f)
+            tabla = TablaTiposCambio(datos.get("moneda_base", MONEDA_BASE_PREDETERMINADA), datos.get("tipos", {}))
+        _tabla_cargada = (firma, tabla)
+    return _tabla_cargada[1]
+
+
+class MotorValoracion:
+    """
+    Totales de valor × cantidad de la colección: global (en la moneda base), por país
+    (en la moneda base) y por unidad monetaria (en esa unidad y en la moneda base).
+    """
+    def __init__(self, tabla, campo_pais, campo_unidad, campo_valor, campo_cantidad):
+        self.tabla = tabla
+        self.campos = [campo_pais, campo_unidad, campo_valor, campo_cantidad]
+        self.n = 0
+        # Versión de los datos con la que se corresponde el motor
+        self.version = None
+        self._filas = [] # posición -> [pais, unidad, valor, cantidad]
+        self._total = 0.0
+        self._por_pais = {} # pais -> [importe en moneda base, monedas]
+        self._por_unidad = {} # clave -> [unidad tal como se escribió, importe, monedas]
+        self._sin_valor = 0
+
+    def _sumar(self, fila, signo):
+        pais, unidad, valor, cantidad = fila
+        valor = _numero(valor)
+        if valor is None:
+            self._sin_valor += signo
+            return
+        importe = valor * _cantidad(cantidad)
+        clave = clave_unidad(unidad)
+        entrada = self._por_unidad.setdefault(clave, [unidad or "Sin unidad", 0.0, 0])
+        entrada[1] += signo * importe
+        entrada[2] += signo
+        if entrada[2] == 0:
+            del self._por_unidad[clave]
+        tipo = self.tabla.tipo(unidad)
+        if tipo is None:
+            return
+        importe_base = importe * tipo
+        self._total += signo * importe_base
+        if pais:
+            entrada = self._por_pais.setdefault(pais, [0.0, 0])
+            entrada[0] += signo * importe_base
+            entrada[1] += signo
+            if entrada[1] == 0:
+                del self._por_pais[pais]
+
+    def construir(self, n, valores_campo):
+        """Calcula los totales en una pasada por columna. valores_campo(campo) itera la columna."""
+        self.n = n
+        self._filas = [list(fila) for fila in zip(*(valores_campo(campo) for campo in self.campos))]
+        for fila in self._filas:
+            self._sumar(fila, 1)
+
+    def anadir(self, moneda):
+        """Añade una moneda al final (posición n)."""
+        fila = [moneda.get(campo) for campo in self.campos]
+        self._filas.append(fila)
+        self._sumar(fila, 1)
+        self.n += 1
+
+    def actualizar(self, posicion, diferencias):
+        """Aplica {campo: (valor_anterior, valor_nuevo)} a la moneda de la posición indicada."""
+        fila = self._filas[posicion]
+        self._sumar(fila, -1)
+        for i, campo in enumerate(self.campos):
+            if campo in diferencias:
+                fila[i] = diferencias[campo][1]
+        self._sumar(fila, 1)
+
+    def eliminar(self, posiciones):
+        """Quita las monedas de 'posiciones' (ordenadas) restando su aportación."""
+        filas = []
+        anterior = 0
+        for posicion in posiciones:
+            self._sumar(self._filas[posicion], -1)
+            filas.extend(self._filas[anterior:posicion])
+            anterior = posicion + 1
+        filas.extend(self._filas[anterior:])
+        self._filas = filas
+        self.n -= len(posiciones)
+
+    def resumen(self):
+        """
+        Retorna un diccionario:
+            moneda_base, total, por_pais: {pais: importe},
+            por_unidad: {unidad: {"importe", "importe_base"}} (importe_base None si no hay tipo de cambio),
+            sin_tipo_cambio: [unidades que no se han podido convertir],
+            monedas_valoradas, monedas_sin_valor
+        Los importes se redondean a céntimos.
+        """
+        por_unidad = {}
+        sin_tipo_cambio = []
+        for unidad, importe, _ in self._por_unidad.values():
+            tipo = self.tabla.tipo(unidad)
+            por_unidad[unidad] = {"importe": round(importe, 2),
+                                  "importe_base": round(importe * tipo, 2) if tipo is not None else None}
+            if tipo is None:
+                sin_tipo_cambio.append(unidad)
+        return {
+            "moneda_base": self.tabla.moneda_base,
+            "total": round(self._total, 2),
+            "por_pais": {pais: round(importe, 2) for pais, (importe, _) in self._por_pais.items()},
+            "por_unidad": por_unidad,
+            "sin_tipo_cambio": sorted(sin_tipo_cambio),
+            "monedas_valoradas": self.n - self._sin_valor,
+            "monedas_sin_valor": self._sin_valor,
+        }